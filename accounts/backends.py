@@ -0,0 +1,92 @@
+# accounts/backends.py
+import copy
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+
+from saas_pos.cache import bump_generation, bump_generations, generations
+from .models import User
+
+
+USER_VERSION_KEY = 'auth:user:%s:version'
+BUSINESS_VERSION_KEY = 'auth:business:%s:version'
+
+_lock = threading.Lock()
+# user id -> (loaded at, user version, business version, user)
+_users = {}
+
+
+def _versions(user_id, business_id):
+    keys = [USER_VERSION_KEY % user_id]
+    if business_id:
+        keys.append(BUSINESS_VERSION_KEY % business_id)
+    return tuple(generations(keys))
+
+
+def invalidate_user(user_id):
+    """Drop a user's cached authorization context in every process."""
+    bump_generation(USER_VERSION_KEY % user_id)
+
+
+def invalidate_business(business_id):
+    """Drop the cached context of every user of a business."""
+    bump_generation(BUSINESS_VERSION_KEY % business_id)
+
+
+def invalidate_businesses(business_ids):
+    """Drop the cached context of the users of many businesses at once."""
+    bump_generations([BUSINESS_VERSION_KEY % business_id for business_id in business_ids])
+
+
+def load_user(user_id):
+    """Return a user with their business and license, cached per process.
+
+    The user, business and license are loaded with one joined query and
+    kept for AUTH_CONTEXT_CACHE_TTL seconds, or until a write bumps the
+    user's or business's version in the shared cache. Every call returns
+    its own copy, so requests never share instances.
+    """
+    ttl = settings.AUTH_CONTEXT_CACHE_TTL
+    now = time.monotonic()
+
+    with _lock:
+        entry = _users.get(user_id)
+    business_id = entry[2].business_id if entry is not None else None
+    # Read before loading, so a write during the query leaves the entry stale.
+    versions = _versions(user_id, business_id)
+    if entry is not None:
+        loaded_at, cached_versions, user = entry
+        if now - loaded_at < ttl and versions == cached_versions:
+            return copy.deepcopy(user)
+
+    try:
+        user = User.objects.select_related('business__license').get(pk=user_id)
+    except User.DoesNotExist:
+        return None
+
+    if user.business_id != business_id:
+        # The business version wasn't read before loading; keep the
+        # entry so the next call knows the business, but don't trust it.
+        versions = None
+    with _lock:
+        _users[user_id] = (now, versions, user)
+        # Entries of users who stopped making requests.
+        for stale_id in [key for key, value in _users.items() if now - value[0] >= ttl]:
+            del _users[stale_id]
+    return copy.deepcopy(user)
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend that resolves session users through load_user()."""
+
+    def get_user(self, user_id):
+        user = load_user(int(user_id))
+        return user if user is not None and self.user_can_authenticate(user) else None
+
+    async def aget_user(self, user_id):
+        # ModelBackend's version loads the bare user, whose business and
+        # license async middleware could then not read.
+        return await sync_to_async(self.get_user)(user_id)
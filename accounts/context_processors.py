@@ -1,5 +1,5 @@
 # accounts/context_processors.py
-from superadmin.models import Notification
+from superadmin.notifications import notification_summary
 
 
 def notifications_context(request):
@@ -7,20 +7,12 @@ def notifications_context(request):
     context = {}
 
     if request.user.is_authenticated:
-        # Get unread notifications count
-        unread_count = Notification.objects.filter(
-            is_active=True,
-            is_read=False
-        ).count()
-
-        # Get recent notifications
-        recent_notifications = Notification.objects.filter(
-            is_active=True
-        ).select_related('business').order_by('-created_at')[:5]
+        # Served from the per-user cache, see superadmin.notifications
+        summary = notification_summary(request.user)
 
         context.update({
-            'unread_notifications_count': unread_count,
-            'recent_notifications': recent_notifications,
+            'unread_notifications_count': summary['unread_count'],
+            'recent_notifications': summary['recent'],
         })
 
     return context
@@ -0,0 +1,89 @@
+# accounts/middleware.py
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+
+
+REFRESHED_AT_KEY = '_session_refreshed_at'
+
+
+def refresh_session_expiry(session):
+    """Mark the session for saving once its remaining lifetime is short.
+
+    Sessions are saved only when their data changes; this extends the
+    expiry of active sessions every SESSION_COOKIE_AGE minus
+    SESSION_REFRESH_THRESHOLD seconds instead of on every request.
+    """
+    # Don't load sessions the request never used.
+    if not session.accessed or session.is_empty():
+        return
+
+    now = int(time.time())
+    refreshed_at = session.get(REFRESHED_AT_KEY)
+    lifetime = session.get_expiry_age()
+    if session.modified or refreshed_at is None or \
+            lifetime - (now - refreshed_at) < settings.SESSION_REFRESH_THRESHOLD:
+        session[REFRESHED_AT_KEY] = now
+
+
+class SessionRefreshMiddleware:
+    """Extend session expiry lazily, in place of SESSION_SAVE_EVERY_REQUEST."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        response = self.get_response(request)
+        refresh_session_expiry(request.session)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        refresh_session_expiry(request.session)
+        return response
+
+
+def _set_business_context(request, user):
+    business = getattr(user, 'business', None) if user.is_authenticated else None
+    request.business = business
+    try:
+        request.license = business.license if business is not None else None
+    except ObjectDoesNotExist:
+        request.license = None
+
+
+class BusinessContextMiddleware:
+    """Expose the user's business and license as request attributes.
+
+    With CachedModelBackend both come from the same cached joined query
+    as the user, so reading them costs nothing.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        _set_business_context(request, request.user)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        _set_business_context(request, await request.auser())
+        return await self.get_response(request)
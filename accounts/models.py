@@ -3,8 +3,10 @@ from django.db import models
 from django.contrib.auth.models import AbstractUser, Group, Permission
 from django.utils.translation import gettext_lazy as _
 
+from reports.tracking import AuditTrackedMixin
 
-class User(AbstractUser):
+
+class User(AuditTrackedMixin, AbstractUser):
     """Custom User model with role-based permissions."""
 
     class Role(models.TextChoices):
@@ -80,6 +82,9 @@ class User(AbstractUser):
         related_query_name="custom_user",
     )
 
+    audit_exclude = ('updated_at', 'last_login')
+    audit_mask = ('password', 'email_verification_token')
+
     def __str__(self):
         return f"{self.username} ({self.role})"
 
@@ -0,0 +1,29 @@
+# accounts/signals.py
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from businesses.models import Business
+from licenses.models import License
+from .backends import invalidate_business, invalidate_user
+from .models import User
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    transaction.on_commit(partial(invalidate_user, instance.pk))
+
+
+@receiver(post_save, sender=Business)
+@receiver(post_delete, sender=Business)
+def business_changed(sender, instance, **kwargs):
+    transaction.on_commit(partial(invalidate_business, instance.pk))
+
+
+@receiver(post_save, sender=License)
+@receiver(post_delete, sender=License)
+def license_changed(sender, instance, **kwargs):
+    transaction.on_commit(partial(invalidate_business, instance.business_id))
@@ -1,3 +1,52 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from businesses.models import Business
+from . import backends
+from .backends import CachedModelBackend, invalidate_user, load_user
+from .models import User
+
+
+@override_settings(AUDIT_LOG_SYNC=True, ACTIVITY_LOG_SYNC=True)
+class LoadUserTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        backends._users.clear()
+        self.business = Business.objects.create(
+            name='Shop', email='shop@example.com', phone='1', address='a',
+            city='c', state='s', country='KE', postal_code='1')
+        self.user = User.objects.create_user(
+            'cash', password='pw', business=self.business)
+
+    def test_cached_until_invalidated(self):
+        load_user(self.user.id)
+        load_user(self.user.id)
+        with self.assertNumQueries(0):
+            self.assertEqual(load_user(self.user.id).business, self.business)
+
+        invalidate_user(self.user.id)
+        with self.assertNumQueries(1):
+            load_user(self.user.id)
+
+    def test_write_during_load_is_not_cached(self):
+        load_user(self.user.id)
+        load_user(self.user.id)
+        invalidate_user(self.user.id)
+        select_related = User.objects.select_related
+
+        def racing_write(*fields):
+            queryset = select_related(*fields)
+            invalidate_user(self.user.id)
+            return queryset
+
+        with mock.patch.object(User.objects, 'select_related', racing_write):
+            load_user(self.user.id)
+        with self.assertNumQueries(1):
+            load_user(self.user.id)
+
+    async def test_async_lookup_loads_the_business(self):
+        user = await CachedModelBackend().aget_user(self.user.id)
+        # Raises SynchronousOnlyOperation if the business was not loaded.
+        self.assertEqual(user.business, self.business)
@@ -33,6 +33,8 @@ urlpatterns = [
 
     # API Endpoints for business actions
     path('api/renew-license/', views.renew_license_view, name='renew_license_api'),
+    path('api/business/<int:business_id>/license-token/',
+         views.issue_license_token_view, name='issue_license_token_api'),
     path('api/suspend-business/', views.suspend_business_view,
          name='suspend_business_api'),
     path('api/activate-business/', views.activate_business_view,
@@ -59,6 +61,7 @@ urlpatterns = [
          name='revenue_analytics_api'),
     path('api/analytics/export/', views.export_analytics_api,
          name='export_analytics_api'),
+    path('api/search/', views.global_search_api, name='global_search_api'),
 
     # Notification API Endpoints
     path('api/notification/<int:notification_id>/mark-read/',
@@ -69,6 +72,8 @@ urlpatterns = [
          views.mark_all_notifications_read_view, name='mark_all_notifications_read'),
     path('api/notifications/clear-all/',
          views.clear_all_notifications_view, name='clear_all_notifications'),
+    path('api/notifications/stream/',
+         views.notification_stream_view, name='notification_stream'),
 
     # Dashboard routes
     path('dashboard/business-admin/', views.business_admin_dashboard,
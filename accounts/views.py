@@ -7,23 +7,46 @@ from django.utils import timezone
 from django.contrib import messages
 from django.views.generic import CreateView
 from django import forms
-from django.db.models import Count, Sum, Q, F
+from django.db.models import Q
+from django.core.exceptions import ImproperlyConfigured
 from django.core.paginator import Paginator
-from django.http import JsonResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST, require_http_methods
-from datetime import datetime, timedelta
-from django.db.models.functions import TruncDate, TruncMonth
+from datetime import datetime, timedelta, timezone as dt_timezone
+from asgiref.sync import sync_to_async
+import csv
+import hashlib
 import json
 import secrets
 import string
+import time
 
 
 from .models import User
 from businesses.models import Business
+from businesses.dashboard import dashboard_context
 from licenses.models import License
-from pos.models import Sale
-from superadmin.models import SystemActivity, Notification
+from licenses.tokens import issue_license_token, license_claims
+from licenses.usage import QuotaExceeded, check_quota
+from superadmin.events import event_stream, unread_event
+from superadmin.metrics import platform_metrics
+from superadmin.stats import cached_stats
+from superadmin.activity import log_activity
+from superadmin.analytics import REVENUE_SERIES_TIMEOUT, analytics_snapshot, revenue_series
+from superadmin.exports import (
+    FORMATS as EXPORT_FORMATS, STREAMS, AnalyticsExport, ExportError, stream_async
+)
+from superadmin.models import SystemActivity, Notification, UserNotification, SearchEntry
+from superadmin.search import is_indexed, matching_ids, search
+from superadmin.notifications import (
+    bump_notifications, mark_notification_read, mark_read, notification_summary
+)
+from reports.audit import log_action
+from reports.models import AuditLog
 from businesses.actions import (
     renew_license, suspend_business,
     activate_business, delete_business
@@ -104,7 +127,7 @@ def login_view(request):
                 login(request, user)
 
                 # Log login activity
-                SystemActivity.objects.create(
+                log_activity(
                     activity_type=SystemActivity.ActivityType.LOGIN,
                     description=f"User {user.username} logged in",
                     user=user,
@@ -112,6 +135,7 @@ def login_view(request):
                     ip_address=request.META.get('REMOTE_ADDR'),
                     user_agent=request.META.get('HTTP_USER_AGENT', '')
                 )
+                log_action(AuditLog.ActionType.LOGIN, user, user=user)
 
                 messages.success(
                     request, f'Welcome back, {user.get_full_name() or user.username}!')
@@ -135,13 +159,14 @@ def login_view(request):
 def logout_view(request):
     """User logout view."""
     # Log logout activity
-    SystemActivity.objects.create(
+    log_activity(
         activity_type=SystemActivity.ActivityType.LOGOUT,
         description=f"User {request.user.username} logged out",
         user=request.user,
         performed_by=request.user,
         ip_address=request.META.get('REMOTE_ADDR')
     )
+    log_action(AuditLog.ActionType.LOGOUT, request.user)
 
     logout(request)
     messages.success(request, 'You have been logged out successfully.')
@@ -259,7 +284,7 @@ def business_registration_view(request):
                 admin_user.save()
 
                 # Log activity
-                SystemActivity.objects.create(
+                log_activity(
                     activity_type=SystemActivity.ActivityType.BUSINESS_CREATED,
                     description=f"Business {business.name} created",
                     business=business,
@@ -305,107 +330,29 @@ def super_admin_dashboard(request):
             request, 'Access denied. Super admin privileges required.')
         return redirect('login')
 
-    # Get real data from database
-    businesses_count = Business.objects.count()
-    users_count = User.objects.count()
-    active_licenses = License.objects.filter(is_active=True).count()
-
-    # Calculate monthly revenue in KSH
-    monthly_revenue = Sale.objects.filter(
-        created_at__month=timezone.now().month,
-        created_at__year=timezone.now().year
-    ).aggregate(total=Sum('total_amount'))['total'] or 0
-
-    # Business types distribution
-    business_types_data = Business.objects.values('business_type').annotate(
-        count=Count('business_type')
-    ).order_by('-count')
-
-    business_types = []
-    colors = ['#4e73df', '#1cc88a', '#36b9cc', '#f6c23e', '#e74a3b']
-    for i, data in enumerate(business_types_data[:5]):
-        business_types.append({
-            'name': dict(Business._meta.get_field('business_type').choices).get(data['business_type'], data['business_type']),
-            'count': data['count'],
-            'color': colors[i % len(colors)]
-        })
-
-    # Recent businesses (last 5)
-    recent_businesses = Business.objects.select_related(
-        'license').order_by('-created_at')[:5]
-
-    # Real recent activities from database
-    recent_activities_list = SystemActivity.objects.select_related(
-        'business', 'user').order_by('-created_at')[:10]
-
-    recent_activities = []
-    for activity in recent_activities_list:
-        recent_activities.append({
-            'icon': activity.icon,
-            'color': activity.color,
-            'text': activity.description,
-            'time': timesince(activity.created_at)
-        })
+    metrics = platform_metrics()
 
-    # License statistics
-    total_licenses = License.objects.count()
-    active_licenses_count = License.objects.filter(
-        is_active=True,
-        end_date__gte=timezone.now().date()
-    ).count()
-
-    expired_licenses = License.objects.filter(
-        Q(is_active=False) | Q(end_date__lt=timezone.now().date())
-    ).count()
-
-    demo_licenses = License.objects.filter(tier='DEMO').count()
-
-    # Licenses expiring soon (within 30 days)
-    expiring_date = timezone.now().date() + timedelta(days=30)
-    expiring_soon = License.objects.filter(
-        end_date__gte=timezone.now().date(),
-        end_date__lte=expiring_date,
-        is_active=True
-    ).count()
-
-    # Calculate percentages
-    active_percentage = (active_licenses_count /
-                         total_licenses * 100) if total_licenses > 0 else 0
-    expired_percentage = (expired_licenses / total_licenses *
-                          100) if total_licenses > 0 else 0
-    demo_percentage = (demo_licenses / total_licenses *
-                       100) if total_licenses > 0 else 0
-    expiring_percentage = (expiring_soon / total_licenses *
-                           100) if total_licenses > 0 else 0
-
-    license_stats = {
-        'active': active_licenses_count,
-        'expired': expired_licenses,
-        'demo': demo_licenses,
-        'expiring_soon': expiring_soon,
-        'active_percentage': active_percentage,
-        'expired_percentage': expired_percentage,
-        'demo_percentage': demo_percentage,
-        'expiring_percentage': expiring_percentage,
-    }
-
-    # Get unread notifications count
-    unread_notifications = Notification.objects.filter(
-        is_active=True,
-        is_read=False
-    ).count()
+    recent_activities = [
+        {
+            'icon': activity['icon'],
+            'color': activity['color'],
+            'text': activity['text'],
+            'time': timesince(activity['created_at'])
+        }
+        for activity in metrics['recent_activities']
+    ]
 
     context = {
         'user': request.user,
-        'businesses_count': businesses_count,
-        'users_count': users_count,
-        'active_licenses': active_licenses,
-        'monthly_revenue': monthly_revenue,
-        'business_types': business_types,
-        'recent_businesses': recent_businesses,
+        'businesses_count': metrics['businesses_count'],
+        'users_count': metrics['users_count'],
+        'active_licenses': metrics['active_licenses'],
+        'monthly_revenue': metrics['monthly_revenue'],
+        'business_types': metrics['business_types'],
+        'recent_businesses': metrics['recent_businesses'],
         'recent_activities': recent_activities,
-        'license_stats': license_stats,
-        'unread_notifications': unread_notifications,
+        'license_stats': metrics['license_stats'],
+        'unread_notifications': notification_summary(request.user)['unread_count'],
     }
 
     return render(request, 'super_admin/dashboard.html', context)
@@ -431,7 +378,11 @@ def manage_businesses(request):
     if license_filter:
         businesses = businesses.filter(license__tier=license_filter)
 
-    if search_query:
+    if search_query and is_indexed(SearchEntry.Kind.BUSINESS):
+        businesses = businesses.filter(
+            id__in=matching_ids(search_query, SearchEntry.Kind.BUSINESS))
+    elif search_query:
+        # Substring match until the search index has been built.
         businesses = businesses.filter(
             Q(name__icontains=search_query) |
             Q(email__icontains=search_query) |
@@ -529,21 +480,18 @@ def manage_users(request):
     page_obj = paginator.get_page(page_number)
 
     # Real statistics
-    stats = {
-        'total_users': User.objects.count(),
-        'active_users': User.objects.filter(is_active=True).count(),
-        'inactive_users': User.objects.filter(is_active=False).count(),
-        'super_admins': User.objects.filter(role=User.Role.SUPER_ADMIN).count(),
-        'business_admins': User.objects.filter(role=User.Role.BUSINESS_ADMIN).count(),
-        'cashiers': User.objects.filter(role=User.Role.CASHIER).count(),
-        'staff': User.objects.filter(role=User.Role.STAFF).count(),
-        'users_today': User.objects.filter(
-            date_joined__date=timezone.now().date()
-        ).count(),
-        'users_this_week': User.objects.filter(
-            date_joined__gte=timezone.now() - timedelta(days=7)
-        ).count(),
-    }
+    today = timezone.now().date()
+    stats = cached_stats(User, 'manage_users', {
+        'total_users': None,
+        'active_users': Q(is_active=True),
+        'inactive_users': Q(is_active=False),
+        'super_admins': Q(role=User.Role.SUPER_ADMIN),
+        'business_admins': Q(role=User.Role.BUSINESS_ADMIN),
+        'cashiers': Q(role=User.Role.CASHIER),
+        'staff': Q(role=User.Role.STAFF),
+        'users_today': Q(date_joined__date=today),
+        'users_this_week': Q(date_joined__gte=timezone.now() - timedelta(days=7)),
+    })
 
     context = {
         'users': page_obj,
@@ -568,105 +516,17 @@ def business_admin_dashboard(request):
         messages.error(request, 'No business assigned to your account.')
         return redirect('login')
 
-    # Get real statistics
-    from pos.models import Sale, Product, Category
-    from datetime import datetime, timedelta
+    dashboard = dashboard_context(business)
 
-    today = timezone.now().date()
-    week_ago = today - timedelta(days=7)
-    month_ago = today - timedelta(days=30)
-
-    # Sales statistics
-    today_sales = Sale.objects.filter(
-        business=business,
-        created_at__date=today
-    ).aggregate(
-        total_amount=Sum('total_amount'),
-        count=Count('id')
-    )
-
-    week_sales = Sale.objects.filter(
-        business=business,
-        created_at__date__gte=week_ago
-    ).aggregate(
-        total_amount=Sum('total_amount'),
-        count=Count('id')
-    )
-
-    month_sales = Sale.objects.filter(
-        business=business,
-        created_at__date__gte=month_ago
-    ).aggregate(
-        total_amount=Sum('total_amount'),
-        count=Count('id')
-    )
-
-    # Product statistics
-    total_products = Product.objects.filter(business=business).count()
-    low_stock_products = Product.objects.filter(
-        business=business,
-        stock_quantity__lte=F('low_stock_threshold'),
-        track_inventory=True
-    ).count()
-
-    # Staff statistics
-    total_staff = User.objects.filter(business=business).count()
-
-    # Recent sales
-    recent_sales = Sale.objects.filter(
-        business=business
-    ).select_related('cashier').order_by('-created_at')[:10]
-
-    # Top selling products
-    from django.db.models import Sum
-    top_products = Product.objects.filter(
-        business=business,
-        sale_items__sale__created_at__gte=month_ago
-    ).annotate(
-        total_sold=Sum('sale_items__quantity')
-    ).order_by('-total_sold')[:5]
-
-    # Daily revenue for chart
-    daily_revenue = []
-    for i in range(7):
-        date = today - timedelta(days=i)
-        day_sales = Sale.objects.filter(
-            business=business,
-            created_at__date=date
-        ).aggregate(total=Sum('total_amount'))['total'] or 0
-
-        daily_revenue.append({
-            'date': date.strftime('%a'),
-            'revenue': float(day_sales)
-        })
-
-    daily_revenue.reverse()
-
-    # Get notifications for this business
-    from superadmin.models import Notification
-    recent_notifications = Notification.objects.filter(
-        business=business,
-        is_active=True
-    ).order_by('-created_at')[:5]
-
-    unread_notifications_count = Notification.objects.filter(
-        business=business,
-        is_active=True,
-        is_read=False
-    ).count()
+    # Get notifications for this user
+    notifications = notification_summary(request.user)
+    recent_notifications = notifications['recent']
+    unread_notifications_count = notifications['unread_count']
 
     context = {
         'user': request.user,
         'business': business,
-        'today_sales': today_sales,
-        'week_sales': week_sales,
-        'month_sales': month_sales,
-        'total_products': total_products,
-        'low_stock_products': low_stock_products,
-        'total_staff': total_staff,
-        'recent_sales': recent_sales,
-        'top_products': top_products,
-        'daily_revenue': daily_revenue,
+        **dashboard,
         'recent_notifications': recent_notifications,
         'unread_notifications_count': unread_notifications_count,
     }
@@ -716,6 +576,43 @@ def renew_license_view(request):
         return JsonResponse({'success': False, 'message': str(e)}, status=400)
 
 
+@csrf_exempt
+@require_POST
+@login_required
+@super_admin_required
+def issue_license_token_view(request, business_id):
+    """API endpoint to issue a signed license token for offline terminals."""
+    license_obj = License.objects.filter(business_id=business_id).first()
+    if license_obj is None:
+        return JsonResponse({
+            'success': False,
+            'message': 'Business has no license'
+        }, status=404)
+    if not license_obj.is_active or license_obj.is_expired:
+        return JsonResponse({
+            'success': False,
+            'message': 'License is not active'
+        }, status=400)
+
+    now = timezone.now()
+    try:
+        token = issue_license_token(license_obj, now)
+    except ImproperlyConfigured:
+        return JsonResponse({
+            'success': False,
+            'message': 'License signing keys are not configured'
+        }, status=503)
+    log_action(AuditLog.ActionType.OTHER, license_obj,
+               object_repr=f'License token issued for {license_obj.license_key}')
+    return JsonResponse({
+        'success': True,
+        'message': 'License token issued',
+        'token': token,
+        'expires': datetime.fromtimestamp(
+            license_claims(license_obj, now)['exp'], tz=dt_timezone.utc).isoformat()
+    })
+
+
 @csrf_exempt
 @require_POST
 @login_required
@@ -783,8 +680,14 @@ def delete_business_view(request):
 @super_admin_required
 def notifications_view(request):
     """View all notifications."""
-    notifications = Notification.objects.filter(
-        is_active=True).order_by('-created_at')
+    notifications = list(Notification.objects.filter(
+        is_active=True).order_by('-created_at'))
+
+    # Read state is per user
+    read_ids = set(UserNotification.objects.filter(
+        user=request.user, is_read=True).values_list('notification_id', flat=True))
+    for notification in notifications:
+        notification.is_read = notification.id in read_ids
 
     context = {
         'notifications': notifications,
@@ -797,17 +700,12 @@ def notifications_view(request):
 @require_POST
 @login_required
 def mark_notification_read_view(request, notification_id):
-    """Mark notification as read."""
-    try:
-        notification = Notification.objects.get(
-            id=notification_id, is_active=True)
-        notification.is_read = True
-        notification.save()
-
-        return JsonResponse({'success': True, 'message': 'Notification marked as read'})
-    except Notification.DoesNotExist:
+    """Mark notification as read for the current user."""
+    if not mark_notification_read(request.user, notification_id):
         return JsonResponse({'success': False, 'message': 'Notification not found'}, status=404)
 
+    return JsonResponse({'success': True, 'message': 'Notification marked as read'})
+
 
 @csrf_exempt
 @require_http_methods(["DELETE"])
@@ -828,9 +726,8 @@ def delete_notification_view(request, notification_id):
 @require_POST
 @login_required
 def mark_all_notifications_read_view(request):
-    """Mark all notifications as read."""
-    Notification.objects.filter(
-        is_active=True, is_read=False).update(is_read=True)
+    """Mark all of the current user's notifications as read."""
+    mark_read(request.user)
     return JsonResponse({'success': True, 'message': 'All notifications marked as read'})
 
 
@@ -839,9 +736,44 @@ def mark_all_notifications_read_view(request):
 @login_required
 def clear_all_notifications_view(request):
     """Clear all notifications."""
-    Notification.objects.filter(is_active=True).update(is_active=False)
+    Notification.objects.filter(is_active=True).update(
+        is_active=False, updated_at=timezone.now())
+    bump_notifications()
     return JsonResponse({'success': True, 'message': 'All notifications cleared'})
 
+
+async def notification_stream_view(request):
+    """Stream new notifications to the current user as server-sent events.
+
+    Served only under ASGI, where an idle connection costs a queue and a
+    suspended coroutine rather than a worker thread.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'success': False, 'message': 'Notification streaming requires an ASGI server'}, status=501)
+
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'success': False, 'message': 'Authentication required'}, status=401)
+
+    summary = await sync_to_async(notification_summary)(user)
+    unread_count = summary['unread_count']
+
+    async def resync():
+        # Notifications published by other processes show up here, as a
+        # changed unread count, within a heartbeat interval.
+        nonlocal unread_count
+        summary = await sync_to_async(notification_summary)(user)
+        if summary['unread_count'] == unread_count:
+            return None
+        unread_count = summary['unread_count']
+        return unread_event(unread_count)
+
+    return StreamingHttpResponse(
+        event_stream(user.pk, unread_event(unread_count), resync=resync),
+        content_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 # accounts/views.py (add these functions)
 
 
@@ -911,21 +843,14 @@ def manage_licenses(request):
     licenses = paginator.get_page(page_number)
 
     # Statistics
-    stats = {
-        'total_licenses': License.objects.count(),
-        'active_licenses': License.objects.filter(
-            is_active=True,
-            end_date__gte=timezone.now().date()
-        ).count(),
-        'expiring_soon': License.objects.filter(
-            end_date__gte=timezone.now().date(),
-            end_date__lte=timezone.now().date() + timedelta(days=7),
-            is_active=True
-        ).count(),
-        'expired_licenses': License.objects.filter(
-            Q(is_active=False) | Q(end_date__lt=timezone.now().date())
-        ).count(),
-    }
+    today = timezone.now().date()
+    current = Q(is_active=True, end_date__gte=today)
+    stats = cached_stats(License, 'manage_licenses', {
+        'total_licenses': None,
+        'active_licenses': current,
+        'expiring_soon': current & Q(end_date__lte=today + timedelta(days=7)),
+        'expired_licenses': Q(is_active=False) | Q(end_date__lt=today),
+    })
 
     context = {
         'licenses': licenses,
@@ -940,148 +865,8 @@ def manage_licenses(request):
 @super_admin_required
 def analytics_view(request):
     """Analytics dashboard with real data."""
-    # Calculate dates
-    end_date = timezone.now()
-    start_date_7d = end_date - timedelta(days=7)
-    start_date_30d = end_date - timedelta(days=30)
-
-    # Get revenue data for last 7 days
-    revenue_data = []
-    sales_last_7d = Sale.objects.filter(
-        created_at__gte=start_date_7d,
-        created_at__lte=end_date
-    ).annotate(
-        date=TruncDate('created_at')
-    ).values('date').annotate(
-        total_revenue=Sum('total_amount')
-    ).order_by('date')
-
-    # Fill missing dates with 0
-    date_dict = {item['date']: item['total_revenue'] for item in sales_last_7d}
-    for i in range(7):
-        current_date = (end_date - timedelta(days=i)).date()
-        revenue = date_dict.get(current_date, 0)
-        revenue_data.append({
-            'date': current_date,
-            'revenue': float(revenue) if revenue else 0
-        })
-
-    revenue_data.reverse()  # Oldest to newest
-
-    # Get top businesses by revenue (last 30 days)
-    top_businesses_data = Sale.objects.filter(
-        created_at__gte=start_date_30d,
-        created_at__lte=end_date
-    ).values(
-        'business__id',
-        'business__name',
-        'business__license__tier'
-    ).annotate(
-        revenue=Sum('total_amount'),
-        sale_count=Count('id')
-    ).order_by('-revenue')[:10]
-
-    top_businesses = []
-    for item in top_businesses_data:
-        # Calculate growth (placeholder - implement proper growth calculation)
-        previous_month_revenue = Sale.objects.filter(
-            business_id=item['business__id'],
-            created_at__gte=start_date_30d - timedelta(days=30),
-            created_at__lt=start_date_30d
-        ).aggregate(total=Sum('total_amount'))['total'] or 0
-
-        growth = 0
-        if previous_month_revenue > 0:
-            growth = ((float(item['revenue']) - float(previous_month_revenue)
-                       ) / float(previous_month_revenue)) * 100
-
-        top_businesses.append({
-            'id': item['business__id'],
-            'name': item['business__name'],
-            'license_tier': item['business__license__tier'],
-            'revenue': float(item['revenue']),
-            'sale_count': item['sale_count'],
-            'growth': round(growth, 1)
-        })
-
-    # User growth data (last 6 months)
-    user_growth_data = []
-    for i in range(6):
-        month_start = end_date.replace(day=1) - timedelta(days=30*i)
-        month_end = (month_start + timedelta(days=32)
-                     ).replace(day=1) - timedelta(days=1)
-
-        new_users = User.objects.filter(
-            date_joined__gte=month_start,
-            date_joined__lte=month_end
-        ).count()
-
-        user_growth_data.append({
-            'month': month_start.strftime('%b'),
-            'count': new_users
-        })
-
-    user_growth_data.reverse()
-
-    # License distribution
-    license_distribution = License.objects.values('tier').annotate(
-        count=Count('id')
-    ).order_by('tier')
-
-    # Real statistics
-    stats = {
-        'total_sales': Sale.objects.filter(
-            created_at__gte=start_date_30d,
-            created_at__lte=end_date
-        ).count(),
-        'total_revenue': Sale.objects.filter(
-            created_at__gte=start_date_30d,
-            created_at__lte=end_date
-        ).aggregate(total=Sum('total_amount'))['total'] or 0,
-        'new_users': User.objects.filter(
-            date_joined__gte=start_date_30d,
-            date_joined__lte=end_date
-        ).count(),
-        'new_businesses': Business.objects.filter(
-            created_at__gte=start_date_30d,
-            created_at__lte=end_date
-        ).count(),
-    }
-
-    # Active users (logged in last 30 days)
-    active_users_count = User.objects.filter(
-        last_login__gte=start_date_30d,
-        last_login__lte=end_date
-    ).count()
-
-    # Monthly business growth
-    monthly_business_growth = Business.objects.filter(
-        created_at__gte=start_date_30d - timedelta(days=60),
-        created_at__lt=start_date_30d
-    ).count()
-
-    current_month_growth = stats['new_businesses']
-    business_growth_percentage = 0
-    if monthly_business_growth > 0:
-        business_growth_percentage = (
-            (current_month_growth - monthly_business_growth) / monthly_business_growth) * 100
-
-    context = {
-        'revenue_data': revenue_data,
-        'top_businesses': top_businesses,
-        'user_growth_data': user_growth_data,
-        'license_distribution': license_distribution,
-        'stats': stats,
-        'active_users_count': active_users_count,
-        'business_growth_percentage': round(business_growth_percentage, 1),
-        'current_month': timezone.now().strftime('%B %Y'),
-        'expiring_count': License.objects.filter(
-            end_date__gte=timezone.now().date(),
-            end_date__lte=timezone.now().date() + timedelta(days=30),
-            is_active=True
-        ).count(),
-        'total_revenue_k': round(float(stats['total_revenue'] / 1000), 1) if stats['total_revenue'] else 0,
-    }
+    context = dict(analytics_snapshot())
+    context['current_month'] = timezone.now().strftime('%B %Y')
 
     return render(request, 'super_admin/analytics.html', context)
 
@@ -1132,6 +917,21 @@ def create_user_view(request):
                 'message': 'Email already exists'
             }, status=400)
 
+        # Resolve business if provided, and check it has room for a user
+        business_id = data.get('business')
+        business = None
+        if business_id:
+            business = Business.objects.select_related('license').filter(
+                id=business_id).first()
+        if business is not None:
+            try:
+                check_quota(business, 'users')
+            except QuotaExceeded as e:
+                return JsonResponse({
+                    'success': False,
+                    'message': str(e)
+                }, status=400)
+
         # Generate password if not provided
         password = data.get('password')
         if not password:
@@ -1147,22 +947,13 @@ def create_user_view(request):
             last_name=data.get('last_name', ''),
             phone_number=data.get('phone_number', ''),
             role=data['role'],
+            business=business,
             license_tier=data.get('license_tier', 'DEMO'),
             is_active=data.get('is_active', True)
         )
 
-        # Assign business if provided
-        business_id = data.get('business')
-        if business_id:
-            try:
-                business = Business.objects.get(id=business_id)
-                user.business = business
-                user.save()
-            except Business.DoesNotExist:
-                pass
-
         # Log activity
-        SystemActivity.objects.create(
+        log_activity(
             activity_type=SystemActivity.ActivityType.USER_CREATED,
             description=f"User {user.username} created",
             user=user,
@@ -1296,7 +1087,7 @@ def update_user_view(request, user_id):
         user.save()
 
         # Log activity
-        SystemActivity.objects.create(
+        log_activity(
             activity_type=SystemActivity.ActivityType.USER_UPDATED,
             description=f"User {user.username} updated",
             user=user,
@@ -1340,7 +1131,7 @@ def deactivate_user_view(request, user_id):
         user.save()
 
         # Log activity
-        SystemActivity.objects.create(
+        log_activity(
             activity_type=SystemActivity.ActivityType.USER_UPDATED,
             description=f"User {user.username} deactivated",
             user=user,
@@ -1376,7 +1167,7 @@ def activate_user_view(request, user_id):
         user.save()
 
         # Log activity
-        SystemActivity.objects.create(
+        log_activity(
             activity_type=SystemActivity.ActivityType.USER_UPDATED,
             description=f"User {user.username} activated",
             user=user,
@@ -1417,7 +1208,7 @@ def reset_password_view(request, user_id):
         user.save()
 
         # Log activity
-        SystemActivity.objects.create(
+        log_activity(
             activity_type=SystemActivity.ActivityType.USER_UPDATED,
             description=f"Password reset for user {user.username}",
             user=user,
@@ -1472,7 +1263,7 @@ def delete_user_view(request, user_id):
         user.delete()
 
         # Log activity
-        SystemActivity.objects.create(
+        log_activity(
             activity_type=SystemActivity.ActivityType.USER_DELETED,
             description=f"User {username} deleted",
             performed_by=request.user,
@@ -1502,93 +1293,99 @@ def delete_user_view(request, user_id):
 @super_admin_required
 def revenue_analytics_api(request):
     """API endpoint for revenue analytics data."""
-    period = request.GET.get('period', '7')
-
     try:
-        days = int(period)
-        end_date = timezone.now()
-        start_date = end_date - timedelta(days=days)
-
-        # Get revenue data for the period
-        revenue_data = Sale.objects.filter(
-            created_at__gte=start_date,
-            created_at__lte=end_date
-        ).annotate(
-            date=TruncDate('created_at')
-        ).values('date').annotate(
-            revenue=Sum('total_amount')
-        ).order_by('date')
-
-        # Format data for chart
-        labels = []
-        values = []
-
-        for item in revenue_data:
-            labels.append(item['date'].strftime('%b %d'))
-            values.append(float(item['revenue']) if item['revenue'] else 0)
-
-        return JsonResponse({
-            'success': True,
-            'labels': labels,
-            'values': values
-        })
-
-    except Exception as e:
+        days = int(request.GET.get('period', '7'))
+    except ValueError:
         return JsonResponse({
             'success': False,
-            'message': str(e)
+            'message': 'Period must be a number of days'
         }, status=400)
 
+    series = revenue_series(days)
+    etag = quote_etag(hashlib.md5(
+        json.dumps(series).encode(), usedforsecurity=False).hexdigest())
 
-@login_required
-@super_admin_required
-def export_analytics_api(request):
-    """API endpoint to export analytics data."""
-    from django.http import HttpResponse
-    import csv
-
-    # Create CSV response
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="analytics-{timezone.now().date()}.csv"'
-
-    writer = csv.writer(response)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = JsonResponse({'success': True, **series})
+        response['ETag'] = etag
+    patch_cache_control(response, private=True, max_age=REVENUE_SERIES_TIMEOUT)
+    return response
 
-    # Write headers
-    writer.writerow(['Metric', 'Value', 'Period', 'Date'])
 
-    # Get current date
-    current_date = timezone.now().date()
+@login_required
+@super_admin_required
+def global_search_api(request):
+    """Search businesses, users, licenses and sales at once."""
+    query = request.GET.get('q', '').strip()
+    kinds = [kind for kind in request.GET.getlist('type') if kind in SearchEntry.Kind.values]
 
-    # Write revenue data
-    revenue_30d = Sale.objects.filter(
-        created_at__gte=current_date - timedelta(days=30),
-        created_at__lte=timezone.now()
-    ).aggregate(total=Sum('total_amount'))['total'] or 0
+    try:
+        limit = min(int(request.GET.get('limit', 20)), 50)
+    except ValueError:
+        limit = 20
 
-    writer.writerow(
-        ['Total Revenue', f'KSh {revenue_30d:.2f}', 'Last 30 days', current_date])
+    started = time.perf_counter()
+    results = search(query, kinds=kinds, limit=limit)
 
-    # Write user data
-    new_users_30d = User.objects.filter(
-        date_joined__gte=current_date - timedelta(days=30)
-    ).count()
+    return JsonResponse({
+        'success': True,
+        'query': query,
+        'results': results,
+        'took_ms': round((time.perf_counter() - started) * 1000, 1),
+    })
 
-    writer.writerow(['New Users', new_users_30d, 'Last 30 days', current_date])
 
-    # Write business data
-    new_businesses_30d = Business.objects.filter(
-        created_at__gte=current_date - timedelta(days=30)
-    ).count()
+@login_required
+@super_admin_required
+def export_analytics_api(request):
+    """API endpoint to export analytics data.
 
-    writer.writerow(['New Businesses', new_businesses_30d,
-                    'Last 30 days', current_date])
+    Without a metrics parameter, exports the 30-day summary shown on the
+    analytics page. Otherwise streams the chosen metrics per dimension
+    from the sales rollups, as CSV or JSON lines; under ASGI the rows are
+    streamed through an async iterator instead of being buffered.
+    """
+    current_date = timezone.now().date()
 
-    # Write sales data
-    total_sales_30d = Sale.objects.filter(
-        created_at__gte=current_date - timedelta(days=30)
-    ).count()
+    if 'metrics' not in request.GET:
+        stats = analytics_snapshot()['stats']
+        rows = [
+            ['Metric', 'Value', 'Period', 'Date'],
+            ['Total Revenue', f"KSh {stats['total_revenue']:.2f}", 'Last 30 days', current_date],
+            ['New Users', stats['new_users'], 'Last 30 days', current_date],
+            ['New Businesses', stats['new_businesses'], 'Last 30 days', current_date],
+            ['Total Sales', stats['total_sales'], 'Last 30 days', current_date],
+        ]
+        response = HttpResponse(content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="analytics-{current_date}.csv"'
+        csv.writer(response).writerows(rows)
+
+        log_action(AuditLog.ActionType.EXPORT, model_name='analytics',
+                   object_repr=f'Analytics export {current_date}')
+        return response
+
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in STREAMS:
+        return JsonResponse({
+            'success': False,
+            'message': f'Format must be one of {", ".join(STREAMS)}'
+        }, status=400)
 
-    writer.writerow(['Total Sales', total_sales_30d,
-                    'Last 30 days', current_date])
+    try:
+        export = AnalyticsExport.from_params(request.GET)
+    except ExportError as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
 
+    stream = STREAMS[export_format](export)
+    if isinstance(request, ASGIRequest):
+        stream = stream_async(stream)
+    response = StreamingHttpResponse(stream, content_type=EXPORT_FORMATS[export_format])
+    response['Content-Disposition'] = (
+        f'attachment; filename="analytics-{export.start_date}-{export.end_date}.{export_format}"')
+
+    log_action(AuditLog.ActionType.EXPORT, model_name='analytics',
+               object_repr=(f"Analytics export {', '.join(export.metrics)} by "
+                            f"{', '.join(export.dimensions) or 'total'} "
+                            f"{export.start_date} to {export.end_date}"))
     return response
@@ -4,6 +4,7 @@ from django.db import transaction
 from datetime import timedelta
 from .models import Business
 from licenses.models import License
+from superadmin.activity import log_activity
 from superadmin.models import SystemActivity, Notification
 from accounts.models import User
 
@@ -28,12 +29,20 @@ def renew_license(business_id, duration_days, tier=None, performed_by=None):
                 # Start from today
                 new_end_date = timezone.now().date() + timedelta(days=duration_days)
 
+            reactivate = license_obj.deactivated_business and \
+                business.status == Business.Status.INACTIVE
             license_obj.end_date = new_end_date
             license_obj.is_active = True
+            license_obj.deactivated_business = False
             license_obj.save()
 
+            # Only undo the expiry sweeper's deactivation, not an admin's.
+            if reactivate:
+                business.status = Business.Status.ACTIVE
+                business.save()
+
             # Log activity
-            SystemActivity.objects.create(
+            log_activity(
                 activity_type=SystemActivity.ActivityType.LICENSE_RENEWED,
                 description=f"License renewed for {business.name}",
                 business=business,
@@ -72,7 +81,7 @@ def suspend_business(business_id, reason, performed_by=None):
             business.save()
 
             # Log activity
-            SystemActivity.objects.create(
+            log_activity(
                 activity_type=SystemActivity.ActivityType.BUSINESS_SUSPENDED,
                 description=f"Business {business.name} suspended",
                 business=business,
@@ -104,9 +113,11 @@ def activate_business(business_id, performed_by=None):
             business = Business.objects.get(id=business_id)
             business.status = Business.Status.ACTIVE
             business.save()
+            # A later renewal must not undo a deactivation made after this.
+            License.objects.filter(business=business).update(deactivated_business=False)
 
             # Log activity
-            SystemActivity.objects.create(
+            log_activity(
                 activity_type=SystemActivity.ActivityType.BUSINESS_ACTIVATED,
                 description=f"Business {business.name} activated",
                 business=business,
@@ -138,7 +149,7 @@ def delete_business(business_id, performed_by=None):
             business_email = business.email
 
             # Log activity before deletion
-            SystemActivity.objects.create(
+            log_activity(
                 activity_type=SystemActivity.ActivityType.BUSINESS_DELETED,
                 description=f"Business {business_name} deleted",
                 performed_by=performed_by,
@@ -6,3 +6,6 @@ class BusinessesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'businesses'
     verbose_name = 'Business Management'
+
+    def ready(self):
+        from . import signals  # noqa: F401
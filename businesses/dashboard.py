@@ -0,0 +1,283 @@
+# businesses/dashboard.py
+from datetime import datetime, time, timedelta
+
+from django.core.cache import cache
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from accounts.models import User
+from pos.models import Product, Sale
+from saas_pos.cache import invalidated_timeout
+
+
+SNAPSHOT_KEY = 'dashboard:business:%s'
+LOCK_KEY = 'dashboard:business:%s:lock'
+
+# Deltas keep the snapshot current; rebuilding it this often, and from
+# `manage.py rebuild_dashboards`, catches anything they missed.
+SNAPSHOT_TIMEOUT = 60 * 60
+LOCK_TIMEOUT = 5
+
+# Days of daily totals kept, enough for the month figures.
+HISTORY_DAYS = 31
+WEEK_DAYS = 8
+CHART_DAYS = 7
+RECENT_SALES = 10
+TOP_PRODUCTS = 5
+
+
+def _sale_summary(sale):
+    return {
+        'id': sale.id,
+        'receipt_number': sale.receipt_number,
+        'customer_name': sale.customer_name,
+        'customer_phone': sale.customer_phone,
+        'total_amount': sale.total_amount,
+        'payment_method': sale.payment_method,
+        'payment_method_display': sale.get_payment_method_display(),
+        'cashier_id': sale.cashier_id,
+        'created_at': sale.created_at,
+    }
+
+
+def _with_cashiers(sales):
+    """Sale summaries with their cashiers' usernames, looked up in one query.
+
+    Summaries keep only the cashier id, so saving a sale doesn't load its
+    cashier and a renamed cashier shows up at once.
+    """
+    cashier_ids = {sale.get('cashier_id') for sale in sales} - {None}
+    usernames = dict(
+        User.objects.filter(id__in=cashier_ids).values_list('id', 'username')
+    ) if cashier_ids else {}
+    return [
+        {**sale, 'cashier_username': usernames.get(sale.get('cashier_id'), '')}
+        for sale in sales
+    ]
+
+
+def _is_low_stock(values):
+    return bool(values['track_inventory']) and \
+        values['stock_quantity'] <= values['low_stock_threshold']
+
+
+def build_snapshot(business):
+    """Compute a business's dashboard figures from scratch."""
+    today = timezone.localtime(timezone.now(), business.tzinfo).date()
+    since = today - timedelta(days=HISTORY_DAYS - 1)
+    start = datetime.combine(since, time.min, tzinfo=business.tzinfo)
+
+    daily = {
+        row['day']: {'total': row['total'], 'count': row['count']}
+        for row in Sale.objects.filter(
+            business=business,
+            status=Sale.Status.COMPLETED,
+            created_at__gte=start
+        ).annotate(
+            day=TruncDate('created_at', tzinfo=business.tzinfo)
+        ).values('day').annotate(
+            total=Sum('total_amount'), count=Count('id')
+        ).order_by()
+    }
+
+    products = Product.objects.filter(business=business).aggregate(
+        total=Count('id'),
+        low_stock=Count('id', filter=Q(
+            track_inventory=True, stock_quantity__lte=F('low_stock_threshold')))
+    )
+
+    top_products = Product.objects.filter(
+        business=business,
+        sale_items__sale__status=Sale.Status.COMPLETED,
+        sale_items__sale__created_at__gte=start
+    ).annotate(
+        total_sold=Sum('sale_items__quantity')
+    ).order_by('-total_sold')[:TOP_PRODUCTS]
+
+    return {
+        'date': today,
+        'tzinfo': business.tzinfo,
+        'daily': daily,
+        'total_products': products['total'],
+        'low_stock_products': products['low_stock'],
+        'total_staff': User.objects.filter(business=business).count(),
+        'recent_sales': [
+            _sale_summary(sale)
+            for sale in Sale.objects.filter(business=business).order_by(
+                '-created_at')[:RECENT_SALES]
+        ],
+        'top_products': [
+            {
+                'name': product.name,
+                'image_url': product.primary_image.url if product.primary_image else '',
+                'total_sold': product.total_sold,
+                'selling_price': product.selling_price,
+            }
+            for product in top_products
+        ],
+    }
+
+
+def rebuild_snapshot(business):
+    snapshot = build_snapshot(business)
+    cache.set(SNAPSHOT_KEY % business.id, snapshot, invalidated_timeout(SNAPSHOT_TIMEOUT))
+    return snapshot
+
+
+def dashboard_snapshot(business):
+    """The cached snapshot, rebuilt when missing or from a previous day."""
+    snapshot = cache.get(SNAPSHOT_KEY % business.id)
+    today = timezone.localtime(timezone.now(), business.tzinfo).date()
+    if snapshot is None or snapshot['date'] != today:
+        snapshot = rebuild_snapshot(business)
+    return snapshot
+
+
+def dashboard_context(business):
+    """Template figures for today, the last week and the last month."""
+    snapshot = dashboard_snapshot(business)
+    today = snapshot['date']
+
+    def totals(days):
+        total, count = 0, 0
+        for i in range(days):
+            day = snapshot['daily'].get(today - timedelta(days=i))
+            if day:
+                total += day['total']
+                count += day['count']
+        return {'total_amount': total, 'count': count}
+
+    chart_days = [today - timedelta(days=i) for i in reversed(range(CHART_DAYS))]
+    return {
+        'today_sales': totals(1),
+        'week_sales': totals(WEEK_DAYS),
+        'month_sales': totals(HISTORY_DAYS),
+        'total_products': snapshot['total_products'],
+        'low_stock_products': snapshot['low_stock_products'],
+        'total_staff': snapshot['total_staff'],
+        'recent_sales': _with_cashiers(snapshot['recent_sales']),
+        'top_products': snapshot['top_products'],
+        'daily_revenue': [
+            {
+                'date': day.strftime('%a'),
+                'revenue': float(snapshot['daily'].get(day, {}).get('total', 0)),
+            }
+            for day in chart_days
+        ],
+    }
+
+
+def invalidate_snapshot(business_id):
+    cache.delete(SNAPSHOT_KEY % business_id)
+
+
+def _update(business_id, apply):
+    """Apply a change to a cached snapshot, if there is one.
+
+    Concurrent updates are serialized with a cache lock; a change that
+    can't take the lock, or that apply() can't express and returns False
+    for, drops the snapshot instead, so it is rebuilt.
+    """
+    key = SNAPSHOT_KEY % business_id
+    lock = LOCK_KEY % business_id
+    if not cache.add(lock, True, LOCK_TIMEOUT):
+        cache.delete(key)
+        return
+    try:
+        snapshot = cache.get(key)
+        if snapshot is not None:
+            if apply(snapshot) is False:
+                cache.delete(key)
+            else:
+                cache.set(key, snapshot, invalidated_timeout(SNAPSHOT_TIMEOUT))
+    finally:
+        cache.delete(lock)
+
+
+def _add_to_day(snapshot, created_at, amount, count):
+    day = timezone.localtime(created_at, snapshot['tzinfo']).date()
+    if day < snapshot['date'] - timedelta(days=HISTORY_DAYS - 1):
+        return
+    totals = snapshot['daily'].setdefault(day, {'total': 0, 'count': 0})
+    totals['total'] += amount
+    totals['count'] += count
+    if not totals['count']:
+        del snapshot['daily'][day]
+
+
+def sale_state(sale):
+    """The values a sale's snapshot update needs, taken as it is saved.
+
+    Updates run after the transaction commits, by which time the sale
+    instance may have been changed again.
+    """
+    return {'status': sale.status, 'summary': _sale_summary(sale)}
+
+
+def sale_changed(business_id, state, created, previous=None):
+    """Apply a saved sale to its business's snapshot.
+
+    state comes from sale_state(), and previous holds the sale's field
+    values as loaded before the save.
+    """
+    summary = state['summary']
+    was_completed = bool(previous) and previous.get('status') == Sale.Status.COMPLETED
+    is_completed = state['status'] == Sale.Status.COMPLETED
+
+    def apply(snapshot):
+        if was_completed:
+            _add_to_day(snapshot, previous['created_at'], -previous['total_amount'], -1)
+        if is_completed:
+            _add_to_day(snapshot, summary['created_at'], summary['total_amount'], 1)
+
+        recent = [item for item in snapshot['recent_sales'] if item['id'] != summary['id']]
+        if created or len(recent) < len(snapshot['recent_sales']):
+            recent.append(summary)
+            recent.sort(key=lambda item: item['created_at'], reverse=True)
+        snapshot['recent_sales'] = recent[:RECENT_SALES]
+
+    _update(business_id, apply)
+
+
+def sale_deleted(business_id, state):
+    summary = state['summary']
+
+    def apply(snapshot):
+        if state['status'] == Sale.Status.COMPLETED:
+            _add_to_day(snapshot, summary['created_at'], -summary['total_amount'], -1)
+        recent = [item for item in snapshot['recent_sales'] if item['id'] != summary['id']]
+        if len(recent) < len(snapshot['recent_sales']) == RECENT_SALES:
+            # The next most recent sale isn't in the snapshot.
+            return False
+        snapshot['recent_sales'] = recent
+
+    _update(business_id, apply)
+
+
+def product_changed(business_id, current, previous=None):
+    """Apply a product's creation, stock change or deletion.
+
+    current and previous hold the stock fields after and before the
+    change; current is None for a deleted product and previous for a
+    new one.
+    """
+    was_low = previous is not None and _is_low_stock(previous)
+    is_low = current is not None and _is_low_stock(current)
+
+    def apply(snapshot):
+        if previous is None:
+            snapshot['total_products'] += 1
+        elif current is None:
+            snapshot['total_products'] -= 1
+        snapshot['low_stock_products'] += int(is_low) - int(was_low)
+
+    if previous is None or current is None or was_low != is_low:
+        _update(business_id, apply)
+
+
+def staff_changed(business_id, delta):
+    def apply(snapshot):
+        snapshot['total_staff'] += delta
+
+    _update(business_id, apply)
@@ -0,0 +1,26 @@
+# businesses/management/commands/rebuild_dashboards.py
+from django.core.management.base import BaseCommand
+
+from businesses.dashboard import rebuild_snapshot
+from businesses.models import Business
+
+
+class Command(BaseCommand):
+    help = ('Recompute the cached business admin dashboard snapshots, correcting '
+            'any drift from incremental updates.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--business', type=int, action='append',
+                            help='Only rebuild this business id (repeatable).')
+
+    def handle(self, *args, **options):
+        businesses = Business.objects.filter(status=Business.Status.ACTIVE)
+        if options['business']:
+            businesses = Business.objects.filter(id__in=options['business'])
+
+        count = 0
+        for business in businesses.iterator():
+            rebuild_snapshot(business)
+            count += 1
+
+        self.stdout.write(self.style.SUCCESS(f'{count} dashboards rebuilt'))
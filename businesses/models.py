@@ -3,8 +3,10 @@ from django.db import models
 from django.utils.translation import gettext_lazy as _
 from django_countries.fields import CountryField
 
+from reports.tracking import AuditTrackedMixin
 
-class Business(models.Model):
+
+class Business(AuditTrackedMixin, models.Model):
     """Business/Tenant model for multi-tenancy."""
 
     class Status(models.TextChoices):
@@ -99,6 +101,15 @@ class Business(models.Model):
             return False
         return True
 
+    @property
+    def tzinfo(self):
+        """Timezone used for the business's day and period boundaries."""
+        from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+        try:
+            return ZoneInfo(self.timezone)
+        except (ZoneInfoNotFoundError, ValueError):
+            return ZoneInfo('UTC')
+
     @property
     def subscription_status(self):
         from django.utils import timezone
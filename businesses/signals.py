@@ -0,0 +1,82 @@
+# businesses/signals.py
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from accounts.models import User
+from pos.models import Product, Sale
+from . import dashboard
+
+
+SALE_FIELDS = ('status', 'total_amount', 'created_at')
+STOCK_FIELDS = ('track_inventory', 'stock_quantity', 'low_stock_threshold')
+
+
+def _previous(instance, fields):
+    """Field values as loaded before this save, or None if unknown."""
+    loaded = getattr(instance, '_loaded_values', None)
+    if loaded is None or any(name not in loaded for name in fields):
+        return None
+    return {name: loaded[name] for name in fields}
+
+
+def _stock(instance):
+    return {name: getattr(instance, name) for name in STOCK_FIELDS}
+
+
+# Snapshot updates run on commit, so each receiver passes them the values
+# as of this save rather than the instance, which may change again first.
+
+@receiver(post_save, sender=Sale)
+def sale_saved(sender, instance, created, **kwargs):
+    previous = None if created else _previous(instance, SALE_FIELDS)
+    if not created and previous is None:
+        transaction.on_commit(partial(dashboard.invalidate_snapshot, instance.business_id))
+        return
+    transaction.on_commit(partial(
+        dashboard.sale_changed, instance.business_id,
+        dashboard.sale_state(instance), created, previous))
+
+
+@receiver(post_delete, sender=Sale)
+def sale_deleted(sender, instance, **kwargs):
+    transaction.on_commit(partial(
+        dashboard.sale_deleted, instance.business_id, dashboard.sale_state(instance)))
+
+
+@receiver(post_save, sender=Product)
+def product_saved(sender, instance, created, **kwargs):
+    previous = None if created else _previous(instance, STOCK_FIELDS)
+    if not created and previous is None:
+        transaction.on_commit(partial(dashboard.invalidate_snapshot, instance.business_id))
+        return
+    transaction.on_commit(partial(
+        dashboard.product_changed, instance.business_id, _stock(instance), previous))
+
+
+@receiver(post_delete, sender=Product)
+def product_deleted(sender, instance, **kwargs):
+    transaction.on_commit(partial(
+        dashboard.product_changed, instance.business_id, None, _stock(instance)))
+
+
+@receiver(post_save, sender=User)
+def staff_saved(sender, instance, created, **kwargs):
+    loaded = getattr(instance, '_loaded_values', None) or {}
+    previous_business_id = None if created else loaded.get('business_id', instance.business_id)
+    if previous_business_id == instance.business_id:
+        if created and instance.business_id:
+            transaction.on_commit(partial(dashboard.staff_changed, instance.business_id, 1))
+        return
+    if previous_business_id:
+        transaction.on_commit(partial(dashboard.staff_changed, previous_business_id, -1))
+    if instance.business_id:
+        transaction.on_commit(partial(dashboard.staff_changed, instance.business_id, 1))
+
+
+@receiver(post_delete, sender=User)
+def staff_deleted(sender, instance, **kwargs):
+    if instance.business_id:
+        transaction.on_commit(partial(dashboard.staff_changed, instance.business_id, -1))
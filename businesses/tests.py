@@ -1,3 +1,80 @@
-from django.test import TestCase
+from decimal import Decimal
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, override_settings
+
+from accounts.models import User
+from pos.models import Sale
+from .dashboard import dashboard_context, dashboard_snapshot
+from .models import Business
+
+
+@override_settings(AUDIT_LOG_SYNC=True, ACTIVITY_LOG_SYNC=True)
+class DashboardSnapshotTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.business = Business.objects.create(
+            name='Shop', email='shop@example.com', phone='1', address='a',
+            city='c', state='s', country='KE', postal_code='1')
+
+    def today(self):
+        snapshot = dashboard_snapshot(self.business)
+        return snapshot['daily'][snapshot['date']]
+
+    def create_sale(self, number, total, cashier=None):
+        return Sale.objects.create(
+            business=self.business, transaction_id=f'T{number}',
+            receipt_number=f'R{number}', subtotal=total, total_amount=total,
+            amount_paid=total, cashier=cashier)
+
+    def test_sale_changed_again_in_the_same_transaction(self):
+        self.create_sale(1, 5)
+        dashboard_snapshot(self.business)
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                sale = self.create_sale(2, 5)
+                sale.total_amount = 100
+                sale.save()
+
+        self.assertEqual(self.today(), {'total': Decimal('105'), 'count': 2})
+        self.assertEqual(
+            dashboard_snapshot(self.business)['recent_sales'][0]['total_amount'], 100)
+
+    def test_updates_match_a_rebuilt_snapshot(self):
+        dashboard_snapshot(self.business)
+        with self.captureOnCommitCallbacks(execute=True):
+            sale = self.create_sale(1, 5)
+        with self.captureOnCommitCallbacks(execute=True):
+            sale.total_amount = 7
+            sale.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            sale.status = Sale.Status.REFUNDED
+            sale.save()
+
+        cached = dashboard_snapshot(self.business)
+        cache.clear()
+        rebuilt = dashboard_snapshot(self.business)
+        self.assertEqual(cached['daily'], rebuilt['daily'])
+        self.assertEqual(cached['daily'], {})
+
+    def test_cashiers_are_resolved_when_rendering(self):
+        cashier = User.objects.create_user('till', business=self.business)
+        dashboard_snapshot(self.business)
+        with self.captureOnCommitCallbacks(execute=True):
+            sale = Sale.objects.get(pk=self.create_sale(1, 5, cashier=cashier).pk)
+        sale.total_amount = 7
+        # The update and its audit log; the summary doesn't load the cashier.
+        with self.assertNumQueries(2):
+            with self.captureOnCommitCallbacks(execute=True):
+                sale.save()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_sale(2, 5)
+        cashier.username = 'till-1'
+        cashier.save()
+        with self.assertNumQueries(1):
+            recent = dashboard_context(self.business)['recent_sales']
+        self.assertEqual(
+            [(sale['receipt_number'], sale['cashier_username']) for sale in recent],
+            [('R2', ''), ('R1', 'till-1')])
@@ -1,6 +1,6 @@
 # licenses/admin.py
 from django.contrib import admin
-from .models import License, Feature, BusinessFeature
+from .models import License, Feature, BusinessFeature, BusinessUsage
 
 
 @admin.register(License)
@@ -28,3 +28,11 @@ class BusinessFeatureAdmin(admin.ModelAdmin):
     list_display = ('business', 'feature', 'is_enabled', 'enabled_at')
     list_filter = ('is_enabled', 'feature__category')
     search_fields = ('business__name', 'feature__name')
+
+
+@admin.register(BusinessUsage)
+class BusinessUsageAdmin(admin.ModelAdmin):
+    list_display = ('business', 'users', 'products', 'storage_bytes', 'reconciled_at')
+    search_fields = ('business__name',)
+    readonly_fields = ('users', 'products', 'branches', 'storage_bytes',
+                       'reconciled_at', 'updated_at')
@@ -6,3 +6,6 @@ class LicensesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'licenses'
     verbose_name = 'License Management'
+
+    def ready(self):
+        from . import signals  # noqa: F401
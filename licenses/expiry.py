@@ -0,0 +1,193 @@
+# licenses/expiry.py
+from datetime import timedelta
+from functools import partial
+
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.backends import invalidate_businesses
+from businesses.models import Business
+from reports.tracking import tracked_update
+from superadmin.metrics import invalidate_platform_metrics
+from superadmin.models import Notification, SystemActivity
+from superadmin.notifications import fan_out_to_businesses
+from superadmin.stats import bump_stats
+from .features import invalidate_businesses_features
+from .models import License
+
+
+# Licenses handled per transaction by the sweeper.
+SWEEP_BATCH_SIZE = 1000
+
+# Business admins are reminded to renew this many days before expiry.
+REMINDER_DAYS = (30, 7, 1)
+
+EXPIRED_KIND = 'license_expired'
+REMINDER_KIND = 'license_renewal_reminder'
+
+LICENSE_FIELDS = ('id', 'business_id', 'tier', 'end_date')
+
+
+def _tier_display(tier):
+    return License.Tier(tier).label if tier in License.Tier.values else tier
+
+
+def _notify(kind, business_ids, now):
+    """Fan out the notifications of one kind just written for some businesses.
+
+    bulk_create sends no signals, so they are delivered here; they are
+    read back since not every database returns their primary keys.
+    """
+    fan_out_to_businesses(Notification.objects.filter(
+        business_id__in=business_ids,
+        published_at=now,
+        data__kind=kind
+    ))
+
+
+def _expired(business_ids, now):
+    _notify(EXPIRED_KIND, business_ids, now)
+    # Bulk updates skip the signals that keep these caches current.
+    invalidate_businesses(business_ids)
+    invalidate_businesses_features(business_ids)
+    bump_stats(License)
+    bump_stats(Business)
+    invalidate_platform_metrics()
+
+
+def expire_licenses(today=None, batch_size=SWEEP_BATCH_SIZE):
+    """Deactivate active licenses past their end date, in batches.
+
+    Each batch is an index range scan on (is_active, end_date), claimed
+    with SELECT ... FOR UPDATE SKIP LOCKED so concurrent sweepers split
+    the work. Its licenses and their active businesses are deactivated
+    with tracked_update(), which writes their AuditLog entries, and the
+    LICENSE_EXPIRED activities and business admin notifications are
+    written with bulk_create. Returns the number of licenses expired.
+    """
+    today = today or timezone.localdate()
+    due = License.objects.filter(is_active=True, end_date__lt=today)
+
+    expired = 0
+    while True:
+        now = timezone.now()
+        with transaction.atomic():
+            licenses = list(
+                due.select_for_update(skip_locked=True).order_by(
+                    'end_date', 'id').values(*LICENSE_FIELDS)[:batch_size]
+            )
+            if not licenses:
+                break
+            business_ids = [license['business_id'] for license in licenses]
+            active_ids = list(Business.objects.filter(
+                id__in=business_ids, status=Business.Status.ACTIVE
+            ).values_list('id', flat=True))
+            license_ids = [license['id'] for license in licenses]
+
+            tracked_update(License.objects.filter(
+                id__in=license_ids, business_id__in=active_ids
+            ), is_active=False, deactivated_business=True, updated_at=now)
+            tracked_update(License.objects.filter(
+                id__in=license_ids
+            ).exclude(business_id__in=active_ids), is_active=False, updated_at=now)
+            tracked_update(Business.objects.filter(
+                id__in=active_ids
+            ), status=Business.Status.INACTIVE, updated_at=now)
+
+            SystemActivity.objects.bulk_create([
+                SystemActivity(
+                    activity_type=SystemActivity.ActivityType.LICENSE_EXPIRED,
+                    description=f"License expired on {license['end_date']:%Y-%m-%d}",
+                    business_id=license['business_id'],
+                    data={
+                        'license_id': license['id'],
+                        'tier': license['tier'],
+                        'end_date': license['end_date'].isoformat(),
+                    },
+                    created_at=now
+                )
+                for license in licenses
+            ])
+            Notification.objects.bulk_create([
+                Notification(
+                    title="License Expired",
+                    message=(
+                        f"Your {_tier_display(license['tier'])} license expired on "
+                        f"{license['end_date']:%Y-%m-%d}. Renew it to restore access."
+                    ),
+                    notification_type=Notification.NotificationType.LICENSE,
+                    audience=Notification.Audience.BUSINESS_ADMINS,
+                    business_id=license['business_id'],
+                    data={'kind': EXPIRED_KIND, 'license_id': license['id']},
+                    published_at=now
+                )
+                for license in licenses
+            ])
+            transaction.on_commit(partial(_expired, business_ids, now))
+        expired += len(licenses)
+    return expired
+
+
+def send_renewal_reminders(today=None, batch_size=SWEEP_BATCH_SIZE):
+    """Remind business admins of licenses ending in REMINDER_DAYS days.
+
+    A license gets each reminder once per end date, so reruns on the
+    same day send nothing new while a renewed license is reminded again.
+    Returns the number of reminders sent.
+    """
+    today = today or timezone.localdate()
+    due = License.objects.filter(
+        is_active=True,
+        end_date__in=[today + timedelta(days=days) for days in REMINDER_DAYS]
+    ).order_by('id').values(*LICENSE_FIELDS)
+
+    sent = 0
+    last_id = 0
+    while True:
+        licenses = list(due.filter(id__gt=last_id)[:batch_size])
+        if not licenses:
+            break
+        last_id = licenses[-1]['id']
+
+        # Keyed by end date too: a renewed license is reminded again.
+        reminded = {
+            (data.get('license_id'), data.get('end_date'), data.get('days'))
+            for data in Notification.objects.filter(
+                business_id__in=[license['business_id'] for license in licenses],
+                data__kind=REMINDER_KIND
+            ).values_list('data', flat=True)
+        }
+        now = timezone.now()
+        reminders = []
+        for license in licenses:
+            days = (license['end_date'] - today).days
+            if (license['id'], license['end_date'].isoformat(), days) in reminded:
+                continue
+            reminders.append(Notification(
+                title="License Renewal Reminder",
+                message=(
+                    f"Your {_tier_display(license['tier'])} license expires in "
+                    f"{days} day{'s' if days != 1 else ''}, on "
+                    f"{license['end_date']:%Y-%m-%d}. Renew it to avoid interruption."
+                ),
+                notification_type=Notification.NotificationType.LICENSE,
+                audience=Notification.Audience.BUSINESS_ADMINS,
+                business_id=license['business_id'],
+                data={
+                    'kind': REMINDER_KIND,
+                    'license_id': license['id'],
+                    'end_date': license['end_date'].isoformat(),
+                    'days': days,
+                },
+                published_at=now
+            ))
+        if not reminders:
+            continue
+
+        with transaction.atomic():
+            Notification.objects.bulk_create(reminders)
+            transaction.on_commit(partial(
+                _notify, REMINDER_KIND,
+                [reminder.business_id for reminder in reminders], now))
+        sent += len(reminders)
+    return sent
@@ -0,0 +1,165 @@
+# licenses/features.py
+from functools import wraps
+
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+from django.http import JsonResponse
+from django.utils import timezone
+
+from saas_pos.cache import bump_generation, bump_generations, generations, invalidated_timeout
+from .models import BusinessFeature, Feature, License
+
+
+CATALOG_VERSION_KEY = 'features:version'
+BUSINESS_VERSION_KEY = 'features:business:%s:version'
+BITMAP_KEY = 'features:business:%s:%s:%s:%s'
+
+# Feature codes checked in code; migrations create their Feature rows.
+REPORTS = 'reports'
+
+# Bitmaps are invalidated by version bumps; the timeout only bounds how
+# long an unused one lingers.
+CACHE_TIMEOUT = 60 * 60 * 24
+
+TIER_FIELDS = {
+    License.Tier.DEMO: 'available_in_demo',
+    License.Tier.BASIC: 'available_in_basic',
+    License.Tier.PRO: 'available_in_pro',
+    License.Tier.ENTERPRISE: 'available_in_enterprise',
+}
+
+# catalog version -> catalog, for this process
+_catalogs = {}
+
+
+def invalidate_catalog():
+    """Recompile every bitmap, after features or their tier defaults change."""
+    bump_generation(CATALOG_VERSION_KEY)
+
+
+def invalidate_business_features(business_id):
+    """Recompile one business's bitmap, after its tier or overrides change."""
+    bump_generation(BUSINESS_VERSION_KEY % business_id)
+
+
+def invalidate_businesses_features(business_ids):
+    """Recompile the bitmaps of many businesses, after bulk license updates."""
+    bump_generations([BUSINESS_VERSION_KEY % business_id for business_id in business_ids])
+
+
+def _catalog(version):
+    """Feature codes and per-tier default bitmaps; a feature's bit is its id."""
+    catalog = _catalogs.get(version)
+    if catalog is None:
+        codes = {}
+        tiers = dict.fromkeys(TIER_FIELDS, 0)
+        for feature in Feature.objects.values('id', 'code', *TIER_FIELDS.values()):
+            codes[feature['code']] = feature['id']
+            for tier, field in TIER_FIELDS.items():
+                if feature[field]:
+                    tiers[tier] |= 1 << feature['id']
+        catalog = {'codes': codes, 'tiers': tiers}
+        _catalogs.clear()
+        _catalogs[version] = catalog
+    return catalog
+
+
+def compile_bitmap(business, catalog, today=None):
+    """Tier defaults of the business's license, with its overrides applied.
+
+    A license that is inactive or past its end date only gets the demo
+    tier's defaults, without overrides.
+    """
+    today = today or timezone.localdate()
+    try:
+        license_obj = business.license
+    except ObjectDoesNotExist:
+        return 0
+    if not license_obj.is_active or license_obj.end_date < today:
+        return catalog['tiers'][License.Tier.DEMO]
+
+    bitmap = catalog['tiers'].get(license_obj.tier, 0)
+    overrides = BusinessFeature.objects.filter(
+        business_id=business.id
+    ).values_list('feature_id', 'is_enabled')
+    for feature_id, is_enabled in overrides:
+        if is_enabled:
+            bitmap |= 1 << feature_id
+        else:
+            bitmap &= ~(1 << feature_id)
+    return bitmap
+
+
+class FeatureSet:
+    """The features enabled for a business; membership tests are O(1)."""
+
+    def __init__(self, bitmap, codes):
+        self.bitmap = bitmap
+        self.codes = codes
+
+    def __contains__(self, code):
+        bit = self.codes.get(code)
+        return bit is not None and bool(self.bitmap >> bit & 1)
+
+    def __iter__(self):
+        return (code for code in self.codes if code in self)
+
+
+class _AllFeatures:
+    def __contains__(self, code):
+        return True
+
+
+ALL_FEATURES = _AllFeatures()
+NO_FEATURES = FeatureSet(0, {})
+
+
+def business_features(business):
+    """Return the cached FeatureSet of a business."""
+    catalog_version, business_version = generations(
+        [CATALOG_VERSION_KEY, BUSINESS_VERSION_KEY % business.id])
+    catalog = _catalog(catalog_version)
+
+    # Keyed by date too, so a license that runs out is caught the next day
+    # even before the expiry sweeper deactivates it.
+    today = timezone.localdate()
+    key = BITMAP_KEY % (business.id, catalog_version, business_version, today.isoformat())
+    bitmap = cache.get(key)
+    if bitmap is None:
+        bitmap = compile_bitmap(business, catalog, today)
+        cache.set(key, bitmap, invalidated_timeout(CACHE_TIMEOUT))
+    return FeatureSet(bitmap, catalog['codes'])
+
+
+def request_features(request):
+    """The features available to the request's user, resolved once per request."""
+    features = getattr(request, '_features', None)
+    if features is None:
+        user = request.user
+        business = getattr(request, 'business', None) or getattr(user, 'business', None)
+        if user.is_authenticated and user.is_super_admin:
+            features = ALL_FEATURES
+        elif user.is_authenticated and business is not None:
+            features = business_features(business)
+        else:
+            features = NO_FEATURES
+        request._features = features
+    return features
+
+
+def require_feature(code):
+    """Decorator for API views that need a feature enabled for the user's business.
+
+    Requests without the feature get a JSON 403 rather than an error page.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            if code not in request_features(request):
+                return JsonResponse({
+                    'success': False,
+                    'message': f'Your license does not include {code}.'
+                }, status=403)
+            return view_func(request, *args, **kwargs)
+        return _wrapped_view
+    return decorator
@@ -0,0 +1,20 @@
+# licenses/management/commands/expire_licenses.py
+from django.core.management.base import BaseCommand
+
+from licenses.expiry import SWEEP_BATCH_SIZE, expire_licenses, send_renewal_reminders
+
+
+class Command(BaseCommand):
+    help = ('Deactivate licenses past their end date with their businesses, '
+            'and remind business admins of licenses about to expire. Run daily.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=SWEEP_BATCH_SIZE,
+                            help='Licenses handled per transaction.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        expired = expire_licenses(batch_size=batch_size)
+        reminded = send_renewal_reminders(batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(
+            f'{expired} licenses expired, {reminded} renewal reminders sent'))
@@ -0,0 +1,20 @@
+# licenses/management/commands/generate_license_signing_key.py
+from django.core.management.base import BaseCommand, CommandError
+
+from licenses.tokens import generate_signing_key
+
+
+class Command(BaseCommand):
+    help = ('Create an Ed25519 key pair for license tokens. Prepend the private '
+            'key to LICENSE_SIGNING_KEYS on the server and the public key to '
+            'LICENSE_VERIFY_KEYS on terminals.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('key_id', help='Id recorded in the tokens the key signs.')
+
+    def handle(self, *args, **options):
+        if any(char in options['key_id'] for char in '.:,'):
+            raise CommandError('Key ids cannot contain ".", ":" or ","')
+        private_key, public_key = generate_signing_key()
+        self.stdout.write(f"LICENSE_SIGNING_KEYS entry: {options['key_id']}:{private_key}")
+        self.stdout.write(f"LICENSE_VERIFY_KEYS entry: {options['key_id']}:{public_key}")
@@ -0,0 +1,30 @@
+# licenses/management/commands/reconcile_usage.py
+from django.core.management.base import BaseCommand
+
+from businesses.models import Business
+from licenses.usage import reconcile_usage
+
+
+class Command(BaseCommand):
+    help = ('Recount each business\'s users, products and storage, correcting '
+            'any drift in the usage counters.')
+
+    # Businesses recounted per batch of grouped queries.
+    batch_size = 500
+
+    def add_arguments(self, parser):
+        parser.add_argument('--business', type=int, action='append',
+                            help='Only reconcile this business id (repeatable).')
+
+    def handle(self, *args, **options):
+        businesses = Business.objects.order_by('id')
+        if options['business']:
+            businesses = businesses.filter(id__in=options['business'])
+        business_ids = list(businesses.values_list('id', flat=True))
+
+        drifted = 0
+        for i in range(0, len(business_ids), self.batch_size):
+            drifted += reconcile_usage(business_ids[i:i + self.batch_size])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(business_ids)} businesses reconciled, {drifted} corrected'))
@@ -0,0 +1,32 @@
+# Generated by Django 6.0 on 2026-10-19 00:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('businesses', '0001_initial'),
+        ('licenses', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BusinessUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('users', models.PositiveIntegerField(default=0)),
+                ('products', models.PositiveIntegerField(default=0)),
+                ('branches', models.PositiveIntegerField(default=0)),
+                ('storage_bytes', models.PositiveBigIntegerField(default=0)),
+                ('reconciled_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('business', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='usage', to='businesses.business')),
+            ],
+            options={
+                'verbose_name': 'Business Usage',
+                'verbose_name_plural': 'Business Usage',
+            },
+        ),
+    ]
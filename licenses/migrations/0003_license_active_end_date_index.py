@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-19 00:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('businesses', '0001_initial'),
+        ('licenses', '0002_businessusage'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='license',
+            index=models.Index(fields=['is_active', 'end_date'], name='licenses_li_is_acti_1ab489_idx'),
+        ),
+    ]
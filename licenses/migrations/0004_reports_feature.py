@@ -0,0 +1,34 @@
+# Generated by Django 6.0 on 2026-10-19 09:12
+
+from django.db import migrations
+
+
+def create_reports_feature(apps, schema_editor):
+    # Report generation is gated on this feature (licenses.features.REPORTS).
+    Feature = apps.get_model('licenses', 'Feature')
+    Feature.objects.get_or_create(code='reports', defaults={
+        'name': 'Reports',
+        'description': 'Generate sales, inventory, staff, financial and tax reports.',
+        'category': 'REPORTING',
+        'icon': 'fa-chart-bar',
+        'is_premium': True,
+        'available_in_demo': False,
+        'available_in_basic': True,
+        'available_in_pro': True,
+        'available_in_enterprise': True,
+    })
+
+
+def delete_reports_feature(apps, schema_editor):
+    apps.get_model('licenses', 'Feature').objects.filter(code='reports').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('licenses', '0003_license_active_end_date_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_reports_feature, delete_reports_feature),
+    ]
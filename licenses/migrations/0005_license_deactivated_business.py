@@ -0,0 +1,35 @@
+# Generated by Django 6.0 on 2026-10-19 00:45
+
+from django.db import migrations, models
+
+
+def mark_swept_businesses(apps, schema_editor):
+    # Businesses still inactive since the sweeper expired their license.
+    License = apps.get_model('licenses', 'License')
+    SystemActivity = apps.get_model('superadmin', 'SystemActivity')
+    expired_ids = {
+        data.get('license_id')
+        for data in SystemActivity.objects.filter(
+            activity_type='LICENSE_EXPIRED'
+        ).values_list('data', flat=True).iterator()
+    }
+    License.objects.filter(
+        is_active=False, business__status='INACTIVE', id__in=expired_ids
+    ).update(deactivated_business=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('licenses', '0004_reports_feature'),
+        ('superadmin', '0006_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='license',
+            name='deactivated_business',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(mark_swept_businesses, migrations.RunPython.noop),
+    ]
@@ -4,8 +4,10 @@ from django.utils.translation import gettext_lazy as _
 import secrets
 import string
 
+from reports.tracking import AuditTrackedMixin
 
-class License(models.Model):
+
+class License(AuditTrackedMixin, models.Model):
     """License model for subscription management."""
 
     class Tier(models.TextChoices):
@@ -33,6 +35,9 @@ class License(models.Model):
     start_date = models.DateField()
     end_date = models.DateField()
     is_active = models.BooleanField(default=True)
+    # Set when the expiry sweeper deactivated the business along with this
+    # license, so renewing reactivates it; cleared on renewal.
+    deactivated_business = models.BooleanField(default=False, editable=False)
 
     # Pricing
     monthly_price = models.DecimalField(max_digits=10, decimal_places=2)
@@ -93,6 +98,9 @@ class License(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['is_active', 'end_date']),
+        ]
         verbose_name = _('License')
         verbose_name_plural = _('Licenses')
 
@@ -138,7 +146,6 @@ class Feature(models.Model):
     def __str__(self):
         return self.name
 
-    @property
     def is_available_in_tier(self, tier):
         """Check if feature is available in given tier."""
         tier_map = {
@@ -193,3 +200,32 @@ class BusinessFeature(models.Model):
         unique_together = ['business', 'feature']
         verbose_name = _('Business Feature')
         verbose_name_plural = _('Business Features')
+
+
+class BusinessUsage(models.Model):
+    """Running counts of what a business uses against its license limits.
+
+    Kept current by signals in the same transaction as each create and
+    delete, and corrected by `manage.py reconcile_usage`.
+    """
+
+    business = models.OneToOneField(
+        'businesses.Business',
+        on_delete=models.CASCADE,
+        related_name='usage'
+    )
+
+    users = models.PositiveIntegerField(default=0)
+    products = models.PositiveIntegerField(default=0)
+    branches = models.PositiveIntegerField(default=0)
+    storage_bytes = models.PositiveBigIntegerField(default=0)
+
+    reconciled_at = models.DateTimeField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.business_id} usage"
+
+    class Meta:
+        verbose_name = _('Business Usage')
+        verbose_name_plural = _('Business Usage')
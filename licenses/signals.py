@@ -0,0 +1,61 @@
+# licenses/signals.py
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from accounts.models import User
+from pos.models import Product
+from .features import invalidate_business_features, invalidate_catalog
+from .models import BusinessFeature, Feature, License
+from .usage import adjust_usage
+
+
+@receiver(post_save, sender=Feature)
+@receiver(post_delete, sender=Feature)
+def feature_changed(sender, instance, **kwargs):
+    transaction.on_commit(invalidate_catalog)
+
+
+@receiver(post_save, sender=BusinessFeature)
+@receiver(post_delete, sender=BusinessFeature)
+@receiver(post_save, sender=License)
+@receiver(post_delete, sender=License)
+def business_features_changed(sender, instance, **kwargs):
+    transaction.on_commit(partial(invalidate_business_features, instance.business_id))
+
+
+def _count_moves(instance, created, resource):
+    """Move a saved user or product's count between businesses."""
+    loaded = getattr(instance, '_loaded_values', None) or {}
+    previous_business_id = None if created else loaded.get('business_id', instance.business_id)
+    if previous_business_id == instance.business_id:
+        if created and instance.business_id:
+            adjust_usage(instance.business_id, **{resource: 1})
+        return
+    if previous_business_id:
+        adjust_usage(previous_business_id, **{resource: -1})
+    if instance.business_id:
+        adjust_usage(instance.business_id, **{resource: 1})
+
+
+@receiver(post_save, sender=User)
+def user_usage_saved(sender, instance, created, **kwargs):
+    _count_moves(instance, created, 'users')
+
+
+@receiver(post_delete, sender=User)
+def user_usage_deleted(sender, instance, **kwargs):
+    if instance.business_id:
+        adjust_usage(instance.business_id, users=-1)
+
+
+@receiver(post_save, sender=Product)
+def product_usage_saved(sender, instance, created, **kwargs):
+    _count_moves(instance, created, 'products')
+
+
+@receiver(post_delete, sender=Product)
+def product_usage_deleted(sender, instance, **kwargs):
+    adjust_usage(instance.business_id, products=-1)
@@ -0,0 +1,13 @@
+# licenses/templatetags/features.py
+from django import template
+
+from licenses.features import request_features
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def has_feature(context, code):
+    """{% has_feature 'code' as enabled %} for the current request's business."""
+    request = context.get('request')
+    return request is not None and code in request_features(request)
@@ -1,3 +1,303 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+from io import StringIO
+from datetime import timedelta
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts import backends
+from accounts.models import User
+from businesses.actions import renew_license
+from businesses.models import Business
+from pos.admin import ProductAdminForm
+from pos.models import Product
+from reports.models import AuditLog
+from superadmin.models import Notification
+from .expiry import REMINDER_KIND, expire_licenses, send_renewal_reminders
+from .features import REPORTS, business_features
+from .models import BusinessFeature, BusinessUsage, Feature, License
+from .tokens import (
+    InvalidLicenseToken, generate_signing_key, issue_license_token, verify_license_token
+)
+from .usage import (
+    QuotaExceeded, adjust_usage, check_quota, reconcile_usage, reserve_quota, usage_status
+)
+
+
+def create_business(name='Shop', tier=License.Tier.PRO, end_date=None, **license_fields):
+    business = Business.objects.create(
+        name=name, email=f'{name.lower()}@example.com', phone='1', address='a',
+        city='c', state='s', country='KE', postal_code='1')
+    today = timezone.localdate()
+    License.objects.create(
+        business=business, license_key=f'KEY-{name}', tier=tier,
+        start_date=today - timedelta(days=30),
+        end_date=end_date or today + timedelta(days=30),
+        monthly_price=10, **license_fields)
+    return Business.objects.select_related('license').get(pk=business.pk)
+
+
+@override_settings(AUDIT_LOG_SYNC=True, ACTIVITY_LOG_SYNC=True)
+class FeatureGateTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Feature.objects.create(
+            name='Receipts', code='receipts', description='',
+            available_in_demo=True, available_in_pro=True)
+
+    def test_tier_defaults_and_overrides(self):
+        business = create_business()
+        self.assertEqual(set(business_features(business)), {REPORTS, 'receipts'})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            BusinessFeature.objects.create(
+                business=business, feature=Feature.objects.get(code=REPORTS), is_enabled=False)
+        self.assertEqual(set(business_features(business)), {'receipts'})
+
+    def test_expired_or_inactive_license_gets_demo_features(self):
+        yesterday = timezone.localdate() - timedelta(days=1)
+        expired = create_business('Expired', end_date=yesterday)
+        inactive = create_business('Inactive', is_active=False)
+        for business in (expired, inactive):
+            BusinessFeature.objects.create(
+                business=business, feature=Feature.objects.get(code=REPORTS), is_enabled=True)
+            self.assertEqual(set(business_features(business)), {'receipts'})
+
+    def test_report_views_require_the_feature(self):
+        allowed = create_business('Pro')
+        denied = create_business('Demo', tier=License.Tier.DEMO)
+        for business, status in ((allowed, 202), (denied, 403)):
+            user = User.objects.create_user(
+                f'admin-{business.id}', password='pw', business=business,
+                role=User.Role.BUSINESS_ADMIN)
+            self.client.force_login(user)
+            response = self.client.post(
+                reverse('generate_report_api'),
+                json.dumps({'report_type': 'SALES_SUMMARY', 'file_format': 'CSV'}),
+                content_type='application/json')
+            self.assertEqual(response.status_code, status)
+        self.assertEqual(response.json(), {
+            'success': False, 'message': f'Your license does not include {REPORTS}.'})
+
+
+@override_settings(AUDIT_LOG_SYNC=True, ACTIVITY_LOG_SYNC=True)
+class UsageTests(TestCase):
+    def setUp(self):
+        self.business = create_business(max_users=2, max_products=3)
+        self.other = create_business('Other')
+
+    def used(self, business, resource):
+        return usage_status(business)[resource]['used']
+
+    def create_user(self, username, business):
+        return User.objects.create_user(username, password='pw', business=business)
+
+    def test_counters_follow_creates_and_deletes(self):
+        self.assertEqual(self.used(self.business, 'users'), 0)
+        user = self.create_user('a', self.business)
+        product = Product.objects.create(
+            business=self.business, name='Tea', sku='T1', cost_price=1, selling_price=2)
+        self.assertEqual(self.used(self.business, 'users'), 1)
+        self.assertEqual(self.used(self.business, 'products'), 1)
+
+        user.delete()
+        product.delete()
+        self.assertEqual(self.used(self.business, 'users'), 0)
+        self.assertEqual(self.used(self.business, 'products'), 0)
+
+    def test_moving_a_user_moves_its_count(self):
+        user = self.create_user('a', self.business)
+        user.business = self.other
+        user.save()
+        self.assertEqual(self.used(self.business, 'users'), 0)
+        self.assertEqual(self.used(self.other, 'users'), 1)
+
+    def test_reconcile_corrects_drift(self):
+        self.create_user('a', self.business)
+        BusinessUsage.objects.filter(business=self.business).update(users=7)
+        self.assertEqual(reconcile_usage([self.business.id, self.other.id]), 1)
+        self.assertEqual(self.used(self.business, 'users'), 1)
+
+    def test_limits(self):
+        self.create_user('a', self.business)
+        check_quota(self.business, 'users')
+        self.create_user('b', self.business)
+        with self.assertRaises(QuotaExceeded):
+            check_quota(self.business, 'users')
+
+    def test_reserve_quota(self):
+        with self.assertRaises(QuotaExceeded):
+            with reserve_quota(self.business, 'products', 4):
+                pass
+
+        with reserve_quota(self.business, 'products', 3):
+            Product.objects.bulk_create([
+                Product(business=self.business, name=f'P{i}', sku=f'P{i}', cost_price=1, selling_price=2)
+                for i in range(3)
+            ])
+            adjust_usage(self.business.id, products=3)
+        self.assertEqual(self.used(self.business, 'products'), 3)
+        with self.assertRaises(QuotaExceeded):
+            check_quota(self.business, 'products')
+
+    def test_counters_stop_at_zero(self):
+        usage_status(self.business)
+        adjust_usage(self.business.id, users=-1)
+        self.assertEqual(self.used(self.business, 'users'), 0)
+
+    def test_admin_form_checks_the_product_quota(self):
+        creator = self.create_user('a', self.other)
+
+        def form(business, instance=None):
+            return ProductAdminForm(instance=instance, data={
+                'business': business.id, 'name': 'Tea', 'sku': f'T{Product.objects.count()}',
+                'cost_price': 1, 'selling_price': 2, 'tax_rate': 0, 'stock_quantity': 0,
+                'low_stock_threshold': 0, 'unit': 'pcs', 'status': Product.Status.ACTIVE,
+                'additional_images': '[]',
+                'created_by': creator.id,
+            })
+
+        product = form(self.other).save()
+        Product.objects.bulk_create([
+            Product(business=self.business, name=f'P{i}', sku=f'P{i}', cost_price=1, selling_price=2)
+            for i in range(3)
+        ])
+        adjust_usage(self.business.id, products=3)
+        moved = form(self.business, instance=product)
+        self.assertFalse(moved.is_valid())
+        self.assertIn('Product limit of 3 reached', str(moved.errors))
+
+    def import_products(self, *rows):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as f:
+            f.write('name,sku,cost_price,selling_price\n')
+            f.writelines(f'{row}\n' for row in rows)
+        self.addCleanup(os.remove, f.name)
+        call_command('import_products', self.business.id, f.name, stdout=StringIO())
+
+    def test_import_is_all_or_nothing(self):
+        with self.assertRaisesMessage(CommandError, 'Product limit of 3 reached'):
+            self.import_products('A,A,1,2', 'B,B,1,2', 'C,C,1,2', 'D,D,1,2')
+        with self.assertRaisesMessage(CommandError, 'Line 3'):
+            self.import_products('A,A,1,2', 'B,B,x,2')
+        self.assertFalse(Product.objects.exists())
+
+        self.import_products('A,A,1,2', 'B,B,1,2')
+        self.assertEqual(self.used(self.business, 'products'), 2)
+
+
+@override_settings(AUDIT_LOG_SYNC=True, ACTIVITY_LOG_SYNC=True)
+class ExpiryTests(TestCase):
+    def setUp(self):
+        yesterday = timezone.localdate() - timedelta(days=1)
+        self.business = create_business(end_date=yesterday)
+        Business.objects.filter(pk=self.business.pk).update(status=Business.Status.ACTIVE)
+
+    def test_expiry_is_audited_and_undone_by_renewal(self):
+        self.assertEqual(expire_licenses(), 1)
+        self.business.refresh_from_db()
+        self.assertEqual(self.business.status, Business.Status.INACTIVE)
+        changes = dict(AuditLog.objects.filter(
+            business=self.business, action_type=AuditLog.ActionType.UPDATE
+        ).values_list('model_name', 'changes'))
+        self.assertEqual(changes, {
+            'licenses.License': {
+                'is_active': [True, False], 'deactivated_business': [False, True]},
+            'businesses.Business': {'status': ['ACTIVE', 'INACTIVE']},
+        })
+
+        self.assertEqual(renew_license(self.business.id, 30)[0], True)
+        self.business.refresh_from_db()
+        self.assertEqual(self.business.status, Business.Status.ACTIVE)
+        self.assertTrue(self.business.license.is_active)
+
+    def test_renewal_keeps_a_business_an_admin_deactivated(self):
+        Business.objects.filter(pk=self.business.pk).update(status=Business.Status.INACTIVE)
+        expire_licenses()
+        self.assertEqual(renew_license(self.business.id, 30)[0], True)
+        self.business.refresh_from_db()
+        self.assertEqual(self.business.status, Business.Status.INACTIVE)
+
+    def test_renewed_license_is_reminded_again(self):
+        today = timezone.localdate()
+        license_obj = self.business.license
+        License.objects.filter(pk=license_obj.pk).update(end_date=today + timedelta(days=7))
+        self.assertEqual(send_renewal_reminders(today), 1)
+        self.assertEqual(send_renewal_reminders(today), 0)
+
+        renew_license(self.business.id, 30)
+        license_obj.refresh_from_db()
+        self.assertEqual(send_renewal_reminders(license_obj.end_date - timedelta(days=7)), 1)
+        self.assertEqual(Notification.objects.filter(data__kind=REMINDER_KIND).count(), 2)
+
+
+OLD_PRIVATE, OLD_PUBLIC = generate_signing_key()
+NEW_PRIVATE, NEW_PUBLIC = generate_signing_key()
+
+
+@override_settings(LICENSE_SIGNING_KEYS=[('new', NEW_PRIVATE)], LICENSE_VERIFY_KEYS=[],
+                   LICENSE_TOKEN_MAX_AGE_DAYS=7)
+class LicenseTokenTests(TestCase):
+    def setUp(self):
+        self.license = create_business().license
+
+    def test_terminal_verifies_with_the_public_key_only(self):
+        token = issue_license_token(self.license)
+        with self.settings(LICENSE_SIGNING_KEYS=[], LICENSE_VERIFY_KEYS=[('new', NEW_PUBLIC)]):
+            claims = verify_license_token(token)
+        self.assertEqual(claims['key'], self.license.license_key)
+        self.assertEqual(claims['tier'], License.Tier.PRO)
+
+    def test_tokens_expire_after_the_max_age(self):
+        token = issue_license_token(self.license)
+        verify_license_token(token, now=timezone.now() + timedelta(days=6))
+        with self.assertRaisesMessage(InvalidLicenseToken, 'expired'):
+            verify_license_token(token, now=timezone.now() + timedelta(days=8))
+
+    def test_tokens_expire_with_the_license(self):
+        self.license.end_date = timezone.localdate() + timedelta(days=2)
+        token = issue_license_token(self.license)
+        with self.assertRaisesMessage(InvalidLicenseToken, 'expired'):
+            verify_license_token(token, now=timezone.now() + timedelta(days=4))
+
+    def test_forged_and_rotated_tokens(self):
+        token = issue_license_token(self.license)
+        key_id, payload, signature = token.split('.')
+        forged = f"{key_id}.{payload[:-2]}AA.{signature}"
+        with self.assertRaises(InvalidLicenseToken):
+            verify_license_token(forged)
+
+        with self.settings(LICENSE_SIGNING_KEYS=[('old', OLD_PRIVATE)]):
+            old_token = issue_license_token(self.license)
+        with self.assertRaisesMessage(InvalidLicenseToken, 'unknown key'):
+            verify_license_token(old_token)
+        with self.settings(LICENSE_VERIFY_KEYS=[('old', OLD_PUBLIC)]):
+            verify_license_token(old_token)
+
+    def test_issue_endpoint_for_a_future_license(self):
+        cache.clear()
+        backends._users.clear()
+        self.license.start_date = timezone.localdate() + timedelta(days=3)
+        self.license.save()
+        admin = User.objects.create_user(
+            'root', password='pw', role=User.Role.SUPER_ADMIN, is_staff=True)
+        self.client.force_login(admin)
+        response = self.client.post(
+            reverse('issue_license_token_api', args=[self.license.business_id]))
+        self.assertEqual(response.status_code, 200)
+        with self.assertRaisesMessage(InvalidLicenseToken, 'not yet valid'):
+            verify_license_token(response.json()['token'])
+        verify_license_token(
+            response.json()['token'], now=timezone.now() + timedelta(days=4))
+
+    def test_no_keys_no_tokens(self):
+        with self.settings(LICENSE_SIGNING_KEYS=[]):
+            with self.assertRaises(ImproperlyConfigured):
+                issue_license_token(self.license)
+            with self.assertRaises(ImproperlyConfigured):
+                verify_license_token('a.b.c')
@@ -0,0 +1,154 @@
+# licenses/tokens.py
+import base64
+import json
+from datetime import date, datetime, timedelta
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives.asymmetric.ed25519 import (
+    Ed25519PrivateKey, Ed25519PublicKey
+)
+from cryptography.hazmat.primitives.serialization import Encoding, PublicFormat
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+
+
+TOKEN_VERSION = 2
+
+
+class InvalidLicenseToken(Exception):
+    """Raised for a license token that is malformed, forged or expired."""
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+def _public_bytes(public_key):
+    return public_key.public_bytes(Encoding.Raw, PublicFormat.Raw)
+
+
+def generate_signing_key():
+    """A new (private key, public key) pair, each as base64url text."""
+    private_key = Ed25519PrivateKey.generate()
+    return (
+        _b64encode(private_key.private_bytes_raw()),
+        _b64encode(_public_bytes(private_key.public_key())),
+    )
+
+
+def _signing_key():
+    """The id and private key new tokens are signed with.
+
+    LICENSE_SIGNING_KEYS lists (key id, private key) pairs, newest first.
+    Rotate by adding a new first pair, then drop the old one once the
+    tokens it signed have expired.
+    """
+    keys = list(settings.LICENSE_SIGNING_KEYS)
+    if not keys:
+        raise ImproperlyConfigured('LICENSE_SIGNING_KEYS is not set')
+    key_id, private_key = keys[0]
+    return key_id, Ed25519PrivateKey.from_private_bytes(_b64decode(private_key))
+
+
+def verification_keys():
+    """{key id: public key} of the keys tokens are accepted from.
+
+    LICENSE_VERIFY_KEYS lists (key id, public key) pairs, which is all a
+    terminal needs. The server also accepts its own signing keys.
+    """
+    keys = {
+        key_id: _b64encode(_public_bytes(
+            Ed25519PrivateKey.from_private_bytes(_b64decode(private_key)).public_key()))
+        for key_id, private_key in settings.LICENSE_SIGNING_KEYS
+    }
+    keys.update(settings.LICENSE_VERIFY_KEYS)
+    if not keys:
+        raise ImproperlyConfigured('Neither LICENSE_VERIFY_KEYS nor LICENSE_SIGNING_KEYS is set')
+    return keys
+
+
+def license_claims(license_obj, now=None):
+    """The entitlement a token carries for a license.
+
+    Tokens expire LICENSE_TOKEN_MAX_AGE_DAYS after issue, or when the
+    license ends if that is sooner; terminals fetch a new one while online.
+    """
+    now = now or timezone.now()
+    expires = min(
+        now + timedelta(days=settings.LICENSE_TOKEN_MAX_AGE_DAYS),
+        datetime.combine(license_obj.end_date + timedelta(days=1),
+                         datetime.min.time(), tzinfo=timezone.get_current_timezone())
+    )
+    return {
+        'v': TOKEN_VERSION,
+        'key': license_obj.license_key,
+        'business': license_obj.business_id,
+        'tier': license_obj.tier,
+        'limits': {
+            'users': license_obj.max_users,
+            'products': license_obj.max_products,
+            'branches': license_obj.max_branches,
+            'storage_mb': license_obj.max_storage_mb,
+        },
+        'start': license_obj.start_date.isoformat(),
+        'end': license_obj.end_date.isoformat(),
+        'iat': int(now.timestamp()),
+        'exp': int(expires.timestamp()),
+    }
+
+
+def issue_license_token(license_obj, now=None):
+    """Sign a license's claims as a `key id.payload.signature` token.
+
+    The payload is base64url JSON and the signature an Ed25519 signature
+    of `key id.payload`, so a terminal holding only the public key can
+    check the token with no database or network access.
+    """
+    key_id, private_key = _signing_key()
+    payload = _b64encode(json.dumps(
+        license_claims(license_obj, now), separators=(',', ':'), sort_keys=True
+    ).encode())
+    signed = f'{key_id}.{payload}'
+    return f'{signed}.{_b64encode(private_key.sign(signed.encode()))}'
+
+
+def verify_license_token(token, now=None):
+    """Return a token's claims if its signature is valid and it is current.
+
+    Tokens signed with any key in verification_keys() are accepted.
+    Raises InvalidLicenseToken otherwise.
+    """
+    try:
+        key_id, payload, signature = token.split('.')
+    except (AttributeError, ValueError):
+        raise InvalidLicenseToken('Malformed license token')
+
+    keys = verification_keys()
+    if key_id not in keys:
+        raise InvalidLicenseToken('License token signed with an unknown key')
+    try:
+        Ed25519PublicKey.from_public_bytes(_b64decode(keys[key_id])).verify(
+            _b64decode(signature), f'{key_id}.{payload}'.encode())
+    except (InvalidSignature, ValueError):
+        raise InvalidLicenseToken('Invalid license token signature')
+
+    try:
+        claims = json.loads(_b64decode(payload))
+        start = date.fromisoformat(claims['start'])
+        expires = int(claims['exp'])
+    except (ValueError, KeyError, TypeError):
+        raise InvalidLicenseToken('Malformed license token')
+    if claims.get('v') != TOKEN_VERSION:
+        raise InvalidLicenseToken('Unsupported license token version')
+
+    now = now or timezone.now()
+    if expires <= now.timestamp():
+        raise InvalidLicenseToken('License token expired')
+    if start > timezone.localdate(now):
+        raise InvalidLicenseToken('License not yet valid')
+    return claims
@@ -0,0 +1,203 @@
+# licenses/usage.py
+from contextlib import contextmanager
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from accounts.models import User
+from businesses.models import Business
+from pos.models import Product
+from .models import BusinessUsage
+
+
+# Resource name -> BusinessUsage field
+FIELDS = {
+    'users': 'users',
+    'products': 'products',
+    'branches': 'branches',
+    'storage': 'storage_bytes',
+}
+
+LABELS = {
+    'users': 'User',
+    'products': 'Product',
+    'branches': 'Branch',
+    'storage': 'Storage',
+}
+
+# Uploaded files counted towards a business's storage, as
+# (model, business lookup, file field).
+STORAGE_FIELDS = (
+    (Product, 'business_id', 'primary_image'),
+    (User, 'business_id', 'profile_picture'),
+    (Business, 'id', 'logo'),
+)
+
+MB = 1024 * 1024
+
+
+class QuotaExceeded(Exception):
+    """Raised when a business has no room left under one of its limits."""
+
+    def __init__(self, resource, limit, used):
+        self.resource = resource
+        self.limit = limit
+        self.used = used
+        if resource == 'storage':
+            limit = f'{limit // MB} MB'
+        super().__init__(
+            f'{LABELS[resource]} limit of {limit} reached for this license')
+
+
+def usage_limits(business):
+    """Limits per resource, None where unlimited.
+
+    License limits apply, narrowed to the business's demo limits while
+    it is a demo account.
+    """
+    limits = dict.fromkeys(FIELDS)
+    try:
+        license = business.license
+    except ObjectDoesNotExist:
+        license = None
+    if license is not None:
+        limits.update({
+            'users': license.max_users,
+            'products': license.max_products,
+            'branches': license.max_branches,
+            'storage': license.max_storage_mb * MB,
+        })
+    if business.is_demo_account:
+        for resource, demo_limit in (('users', business.max_demo_users),
+                                     ('products', business.max_demo_products)):
+            limits[resource] = demo_limit if limits[resource] is None \
+                else min(limits[resource], demo_limit)
+    return limits
+
+
+def _storage_bytes(business_ids):
+    totals = dict.fromkeys(business_ids, 0)
+    for model, lookup, field in STORAGE_FIELDS:
+        files = model.objects.filter(**{
+            f'{lookup}__in': business_ids
+        }).exclude(**{field: ''}).exclude(**{
+            f'{field}__isnull': True
+        }).values_list(lookup, field)
+        for business_id, name in files.iterator():
+            try:
+                totals[business_id] += default_storage.size(name)
+            except (OSError, NotImplementedError):
+                pass
+    return totals
+
+
+def count_usage(business_ids):
+    """Actual usage of each business, counted from the tables."""
+    users = dict(User.objects.filter(business_id__in=business_ids).values(
+        'business_id').annotate(count=Count('id')).order_by().values_list(
+        'business_id', 'count'))
+    products = dict(Product.objects.filter(business_id__in=business_ids).values(
+        'business_id').annotate(count=Count('id')).order_by().values_list(
+        'business_id', 'count'))
+    storage = _storage_bytes(business_ids)
+
+    return {
+        business_id: {
+            'users': users.get(business_id, 0),
+            'products': products.get(business_id, 0),
+            # Branches have no model yet, so none are in use.
+            'branches': 0,
+            'storage_bytes': storage[business_id],
+        }
+        for business_id in business_ids
+    }
+
+
+def reconcile_usage(business_ids):
+    """Recount the usage of some businesses; return how many had drifted."""
+    drifted = 0
+    now = timezone.now()
+    existing = BusinessUsage.objects.in_bulk(business_ids, field_name='business_id')
+    for business_id, counts in count_usage(business_ids).items():
+        usage = existing.get(business_id)
+        if usage is None:
+            usage = BusinessUsage(business_id=business_id)
+        elif any(getattr(usage, field) != value for field, value in counts.items()):
+            drifted += 1
+        for field, value in counts.items():
+            setattr(usage, field, value)
+        usage.reconciled_at = now
+        usage.save()
+    return drifted
+
+
+def adjust_usage(business_id, **deltas):
+    """Add deltas (resource=amount) to a business's counters.
+
+    Call it in the transaction making the change, so both commit or roll
+    back together. A business without counters yet is counted instead.
+    Counters stop at zero, so drift never turns a delete into an error.
+    """
+    updated = BusinessUsage.objects.filter(business_id=business_id).update(**{
+        FIELDS[resource]: Greatest(F(FIELDS[resource]) + amount, 0)
+        for resource, amount in deltas.items()
+    })
+    if not updated and any(amount > 0 for amount in deltas.values()):
+        reconcile_usage([business_id])
+
+
+def usage_status(business):
+    """{resource: {'used': n, 'limit': n or None}}.
+
+    Read from the business's usage row on every call; it is a single
+    indexed row, and always current in every process.
+    """
+    usage = BusinessUsage.objects.filter(business_id=business.id).first()
+    if usage is None:
+        reconcile_usage([business.id])
+        usage = BusinessUsage.objects.get(business_id=business.id)
+    limits = usage_limits(business)
+    return {
+        resource: {'used': getattr(usage, field), 'limit': limits[resource]}
+        for resource, field in FIELDS.items()
+    }
+
+
+def check_quota(business, resource, amount=1):
+    """Raise QuotaExceeded unless `amount` more of a resource fit the limits.
+
+    Storage is only recounted by reconcile_usage (the reconcile_usage
+    command), not on each upload, so its check lags by up to one run.
+    """
+    status = usage_status(business)[resource]
+    if status['limit'] is not None and status['used'] + amount > status['limit']:
+        raise QuotaExceeded(resource, status['limit'], status['used'])
+
+
+@contextmanager
+def reserve_quota(business, resource, amount):
+    """Check once for room for `amount` more, then hold it for a bulk create.
+
+    The block runs in a transaction holding the business's usage row
+    locked, so concurrent creators wait instead of overrunning the limit
+    together. Objects saved in the block count themselves through
+    signals; rows written with bulk_create must be added with
+    adjust_usage().
+    """
+    with transaction.atomic():
+        usage = BusinessUsage.objects.select_for_update().filter(
+            business_id=business.id).first()
+        if usage is None:
+            reconcile_usage([business.id])
+            usage = BusinessUsage.objects.select_for_update().get(
+                business_id=business.id)
+
+        limit = usage_limits(business)[resource]
+        used = getattr(usage, FIELDS[resource])
+        if limit is not None and used + amount > limit:
+            raise QuotaExceeded(resource, limit, used)
+        yield usage
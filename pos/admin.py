@@ -1,8 +1,28 @@
 # pos/admin.py
+from django import forms
 from django.contrib import admin
+
+from licenses.usage import QuotaExceeded, check_quota
 from .models import Category, Product, Sale, SaleItem
 
 
+class ProductAdminForm(forms.ModelForm):
+    class Meta:
+        model = Product
+        fields = '__all__'
+
+    def clean(self):
+        cleaned_data = super().clean()
+        business = cleaned_data.get('business')
+        # New products, and products moved to another business, use up a slot.
+        if business is not None and business.pk != self.instance.business_id:
+            try:
+                check_quota(business, 'products')
+            except QuotaExceeded as e:
+                raise forms.ValidationError(str(e))
+        return cleaned_data
+
+
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
     list_display = ('name', 'business', 'parent', 'display_order', 'is_active')
@@ -12,6 +32,7 @@ class CategoryAdmin(admin.ModelAdmin):
 
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
+    form = ProductAdminForm
     list_display = ('name', 'sku', 'business', 'category',
                     'selling_price', 'stock_quantity', 'status', 'is_low_stock')
     list_filter = ('status', 'business', 'category')
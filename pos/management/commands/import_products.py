@@ -0,0 +1,50 @@
+# pos/management/commands/import_products.py
+import csv
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from businesses.models import Business
+from licenses.usage import QuotaExceeded, reserve_quota
+from pos.models import Product
+
+
+# CSV columns read into each product; name, sku and both prices are required.
+COLUMNS = ('name', 'sku', 'barcode', 'description', 'cost_price',
+           'selling_price', 'tax_rate', 'stock_quantity', 'unit')
+
+
+class Command(BaseCommand):
+    help = ('Import products for a business from a CSV file with a header row, '
+            'within the product limit of its license.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('business', type=int, help='Business id.')
+        parser.add_argument('path', help='CSV file to import.')
+
+    def handle(self, *args, **options):
+        business = Business.objects.select_related('license').filter(
+            id=options['business']).first()
+        if business is None:
+            raise CommandError(f"Business {options['business']} does not exist")
+
+        with open(options['path'], newline='', encoding='utf-8-sig') as f:
+            rows = list(csv.DictReader(f))
+
+        # All or nothing: the quota is checked once for the whole file and
+        # a bad row rolls back the rows before it.
+        try:
+            with reserve_quota(business, 'products', len(rows)):
+                for line, row in enumerate(rows, start=2):
+                    product = Product(business=business, **{
+                        column: row[column] for column in COLUMNS if row.get(column)
+                    })
+                    try:
+                        product.full_clean(exclude=['created_by'])
+                    except ValidationError as e:
+                        raise CommandError(f'Line {line}: {"; ".join(e.messages)}')
+                    product.save()
+        except QuotaExceeded as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(f'{len(rows)} products imported'))
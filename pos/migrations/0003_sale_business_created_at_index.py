@@ -0,0 +1,20 @@
+# Generated by Django 6.0 on 2026-10-19 00:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('businesses', '0001_initial'),
+        ('pos', '0002_business_updated_at_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['business', 'created_at'], name='pos_sale_busines_5bf4c6_idx'),
+        ),
+    ]
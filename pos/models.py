@@ -3,6 +3,8 @@ from django.db import models
 from django.utils.translation import gettext_lazy as _
 from decimal import Decimal
 
+from reports.tracking import AuditTrackedMixin
+
 
 class Category(models.Model):
     """Product category model."""
@@ -41,7 +43,7 @@ class Category(models.Model):
         unique_together = ['business', 'name']
 
 
-class Product(models.Model):
+class Product(AuditTrackedMixin, models.Model):
     """Product/Item model for POS."""
 
     class Status(models.TextChoices):
@@ -156,10 +158,11 @@ class Product(models.Model):
             models.Index(fields=['sku']),
             models.Index(fields=['barcode']),
             models.Index(fields=['status']),
+            models.Index(fields=['business', 'updated_at']),
         ]
 
 
-class Sale(models.Model):
+class Sale(AuditTrackedMixin, models.Model):
     """Sales transaction model."""
 
     class PaymentMethod(models.TextChoices):
@@ -250,6 +253,8 @@ class Sale(models.Model):
             models.Index(fields=['receipt_number']),
             models.Index(fields=['created_at']),
             models.Index(fields=['status']),
+            models.Index(fields=['business', 'updated_at']),
+            models.Index(fields=['business', 'created_at']),
         ]
 
 
@@ -280,6 +285,11 @@ class SaleItem(models.Model):
     discount_amount = models.DecimalField(max_digits=12, decimal_places=2)
     total = models.DecimalField(max_digits=12, decimal_places=2)
 
+    # The product's cost price when sold, for cost of goods in reports.
+    # Null for items sold before it was recorded.
+    unit_cost = models.DecimalField(
+        max_digits=10, decimal_places=2, blank=True, null=True)
+
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
@@ -294,6 +304,8 @@ class SaleItem(models.Model):
         self.tax_amount = (discounted_subtotal *
                            self.tax_rate) / Decimal('100')
         self.total = discounted_subtotal + self.tax_amount
+        if self._state.adding and self.unit_cost is None:
+            self.unit_cost = self.product.cost_price
 
         super().save(*args, **kwargs)
 
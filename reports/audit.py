@@ -0,0 +1,327 @@
+# reports/audit.py
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+from contextvars import ContextVar
+from functools import partial
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import (
+    IntegrityError, close_old_connections, connection, models, transaction
+)
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import AuditLog
+
+
+# The request being handled, set by reports.middleware.AuditMiddleware.
+current_request = ContextVar('current_request', default=None)
+
+
+class BufferedWriter:
+    """Per-process buffer that writes rows of a model with bulk_create.
+
+    Entries are dicts of field values. A batch is written when it
+    reaches <PREFIX>_BATCH_SIZE entries or its oldest entry is
+    <PREFIX>_FLUSH_INTERVAL seconds old, checked at request end and by a
+    background thread. Every entry is also appended to a spool file in
+    <PREFIX>_SPOOL_DIR until its batch is written, so nothing is lost if
+    the process dies; `replay_spool()` writes leftovers. Entries logged
+    inside a transaction are only queued once it commits. With
+    <PREFIX>_SYNC every entry is written immediately instead.
+    """
+
+    # Every writer in the process, flushed by AuditMiddleware.
+    writers = []
+
+    def __init__(self, model, setting_prefix):
+        self.writers.append(self)
+        self.model = model
+        self.setting_prefix = setting_prefix
+        self.label = model._meta.label_lower.replace('.', '_')
+        self._lock = threading.Lock()
+        self._reset()
+        atexit.register(self._flush_at_exit)
+
+    def _reset(self):
+        # Also called in a forked child, which must not reuse the
+        # parent's buffer, spool file or flusher thread.
+        self._pid = os.getpid()
+        self._buffer = []
+        self._oldest = None
+        self._spool = None
+        self._spool_sequence = 0
+        self._flusher = None
+        self.stats = {
+            'requests': 0,
+            'entries': 0,
+            'log_ns': 0,
+            'flushes': 0,
+            'flush_ns': 0,
+            'written': 0,
+            'failed_flushes': 0,
+        }
+
+    def _setting(self, name, default=None):
+        return getattr(settings, f'{self.setting_prefix}_{name}', default)
+
+    @property
+    def batch_size(self):
+        return self._setting('BATCH_SIZE', 200)
+
+    @property
+    def flush_interval(self):
+        return self._setting('FLUSH_INTERVAL', 5)
+
+    @property
+    def spool_dir(self):
+        return self._setting('SPOOL_DIR')
+
+    # Spool files
+
+    def _spool_path(self, suffix='jsonl'):
+        return os.path.join(
+            self.spool_dir,
+            f'{self.label}-{self._pid}-{self._spool_sequence}.{suffix}'
+        )
+
+    def _append_to_spool(self, entry):
+        if not self.spool_dir:
+            return
+        if self._spool is None:
+            os.makedirs(self.spool_dir, exist_ok=True)
+            self._spool = open(self._spool_path(), 'a', encoding='utf-8')
+        self._spool.write(json.dumps(entry, cls=DjangoJSONEncoder) + '\n')
+        self._spool.flush()
+
+    def _detach_spool(self):
+        """Close the current spool file and return its in-flight name."""
+        if self._spool is None:
+            return None
+        self._spool.close()
+        self._spool = None
+        flushing_path = self._spool_path('flushing')
+        os.replace(self._spool_path(), flushing_path)
+        self._spool_sequence += 1
+        return flushing_path
+
+    def _entry_from_json(self, line):
+        entry = json.loads(line)
+        for field in self.model._meta.concrete_fields:
+            value = entry.get(field.attname)
+            if isinstance(field, models.DateTimeField) and isinstance(value, str):
+                entry[field.attname] = parse_datetime(value)
+        return entry
+
+    def replay_spool(self):
+        """Write entries left in spool files by failed flushes or dead processes."""
+        if not self.spool_dir:
+            return 0
+
+        written = 0
+        for path in sorted(glob.glob(os.path.join(self.spool_dir, f'{self.label}-*'))):
+            pid = int(os.path.basename(path)[len(self.label) + 1:].split('-')[0])
+            if not path.endswith('.failed') and _process_alive(pid):
+                continue
+
+            with open(path, encoding='utf-8') as spool:
+                entries = []
+                for line in spool:
+                    try:
+                        entries.append(self._entry_from_json(line))
+                    except ValueError:
+                        # A line cut short by a crash mid-write.
+                        continue
+            self._write(entries)
+            os.remove(path)
+            written += len(entries)
+        return written
+
+    # Buffering
+
+    def log(self, **fields):
+        """Queue one row. Returns as soon as the entry is buffered."""
+        started = time.perf_counter_ns()
+        fields.setdefault('created_at', timezone.now())
+
+        if self._setting('SYNC', False):
+            self.model.objects.create(**fields)
+        elif connection.in_atomic_block:
+            transaction.on_commit(partial(self._enqueue, fields))
+        else:
+            self._enqueue(fields)
+
+        self.stats['entries'] += 1
+        self.stats['log_ns'] += time.perf_counter_ns() - started
+
+    def _enqueue(self, fields):
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset()
+            self._append_to_spool(fields)
+            self._buffer.append(fields)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            self._start_flusher()
+            flush_now = len(self._buffer) >= self.batch_size
+
+        if flush_now and not connection.in_atomic_block:
+            self.flush()
+
+    def is_due(self):
+        if not self._buffer:
+            return False
+        return (len(self._buffer) >= self.batch_size or
+                time.monotonic() - self._oldest >= self.flush_interval)
+
+    def flush_if_due(self):
+        """Flush if a threshold was reached. Skipped inside transactions,
+        whose rollback would take the batch with it."""
+        if self.is_due() and not connection.in_atomic_block:
+            self.flush()
+
+    def flush(self):
+        """Write all buffered entries in one bulk_create."""
+        with self._lock:
+            if not self._buffer or self._pid != os.getpid():
+                return 0
+            entries, self._buffer, self._oldest = self._buffer, [], None
+            flushing_path = self._detach_spool()
+
+        started = time.perf_counter_ns()
+        try:
+            self._write(entries)
+        except Exception:
+            self.stats['failed_flushes'] += 1
+            if flushing_path:
+                # Left for replay_spool() once the database is back.
+                os.replace(flushing_path, flushing_path[:-len('flushing')] + 'failed')
+            else:
+                with self._lock:
+                    self._buffer[:0] = entries
+                    self._oldest = self._oldest or time.monotonic()
+            return 0
+
+        if flushing_path:
+            os.remove(flushing_path)
+        self.stats['flushes'] += 1
+        self.stats['written'] += len(entries)
+        self.stats['flush_ns'] += time.perf_counter_ns() - started
+        return len(entries)
+
+    def _write(self, entries):
+        try:
+            self.model.objects.bulk_create(
+                [self.model(**entry) for entry in entries],
+                batch_size=self.batch_size
+            )
+        except IntegrityError:
+            self._write_each(entries)
+
+    def _write_each(self, entries):
+        """Write a batch that failed as a whole one row at a time.
+
+        Entries can refer to rows deleted between queueing and flushing;
+        those references are dropped rather than losing the entry.
+        """
+        nullable = {
+            field.attname: None for field in self.model._meta.concrete_fields
+            if field.is_relation and field.null
+        }
+        for entry in entries:
+            try:
+                with transaction.atomic():
+                    self.model.objects.create(**entry)
+            except IntegrityError:
+                self.model.objects.create(**{**entry, **nullable})
+
+    def _start_flusher(self):
+        if self._flusher is None or not self._flusher.is_alive():
+            self._flusher = threading.Thread(
+                target=self._run_flusher,
+                name=f'{self.label}-flusher',
+                daemon=True
+            )
+            self._flusher.start()
+
+    def _run_flusher(self):
+        while self._pid == os.getpid():
+            time.sleep(self.flush_interval)
+            if self.is_due():
+                close_old_connections()
+                self.flush()
+
+    def _flush_at_exit(self):
+        try:
+            self.flush()
+        except Exception:
+            # The spool file is still on disk for replay_spool().
+            pass
+
+    def overhead(self):
+        """Average time spent queueing entries, per entry and per request."""
+        stats = dict(self.stats)
+        stats['log_us_per_entry'] = (
+            stats['log_ns'] / stats['entries'] / 1000 if stats['entries'] else 0)
+        stats['log_us_per_request'] = (
+            stats['log_ns'] / stats['requests'] / 1000 if stats['requests'] else 0)
+        return stats
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+audit_writer = BufferedWriter(AuditLog, 'AUDIT_LOG')
+
+
+def log_action(action_type, instance=None, changes=None, user=None,
+               business=None, model_name=None, object_id=None,
+               object_repr=None, business_id=None):
+    """Record an AuditLog entry through the batched writer.
+
+    The user, IP address and user agent default to those of the current
+    request, when there is one.
+    """
+    request = current_request.get()
+
+    if user is None and request is not None and request.user.is_authenticated:
+        user = request.user
+
+    if business is not None:
+        business_id = business.pk
+    if business_id is None and instance is not None:
+        if instance._meta.label == 'businesses.Business':
+            business_id = instance.pk
+        else:
+            business_id = getattr(instance, 'business_id', None)
+    if business_id is None and user is not None:
+        business_id = user.business_id
+
+    if instance is not None:
+        model_name = model_name or instance._meta.label
+        object_id = object_id or str(instance.pk)
+        object_repr = object_repr or str(instance)
+
+    audit_writer.log(
+        business_id=business_id,
+        user_id=user.pk if user is not None else None,
+        action_type=action_type,
+        model_name=model_name or '',
+        object_id=object_id or '',
+        object_repr=(object_repr or '')[:255],
+        changes=changes or {},
+        ip_address=request.META.get('REMOTE_ADDR') if request else None,
+        user_agent=request.META.get('HTTP_USER_AGENT', '') if request else None
+    )
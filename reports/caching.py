@@ -0,0 +1,124 @@
+# reports/caching.py
+import hashlib
+import json
+from datetime import timedelta
+
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from pos.models import Product, Sale
+from .generators import parameter_period
+from .models import Report
+from .scheduler import MAX_ATTEMPTS
+
+
+# Data each report type is built from, as (model, period lookup). Rows
+# of a model with a period lookup only count when they fall inside the
+# report's period; the others (current stock and prices) always do. The
+# newest change across these sources is the report's data watermark, and
+# their row counts catch deletes, which leave no updated_at behind.
+WATERMARK_SOURCES = {
+    Report.ReportType.SALES_SUMMARY: ((Sale, 'created_at'),),
+    Report.ReportType.INVENTORY: ((Product, None),),
+    Report.ReportType.STAFF_PERFORMANCE: ((Sale, 'created_at'),),
+    Report.ReportType.CUSTOMER: ((Sale, 'created_at'),),
+    Report.ReportType.FINANCIAL: ((Sale, 'created_at'), (Product, None)),
+    Report.ReportType.TAX: ((Sale, 'created_at'),),
+}
+DEFAULT_WATERMARK_SOURCES = ((Sale, 'created_at'), (Product, None))
+
+# A one-off report claimed by the scheduler (no longer queued, no file
+# yet) is reused for this long; past it the run is presumed lost.
+IN_FLIGHT_TIMEOUT = timedelta(hours=1)
+
+
+def canonical_parameters(parameters):
+    """Serialize parameters so that equal dicts produce equal strings."""
+    return json.dumps(parameters or {}, sort_keys=True,
+                      separators=(',', ':'), default=str)
+
+
+def data_watermark(business, report_type, period_start, period_end):
+    """Return (latest change, row count per source) for a report's data.
+
+    Sales are limited to those made in [period_start, period_end), over
+    the (business, created_at) index, so new sales leave the cached
+    reports of earlier periods valid.
+    """
+    marks = []
+    counts = []
+    for model, period_lookup in WATERMARK_SOURCES.get(
+            report_type, DEFAULT_WATERMARK_SOURCES):
+        rows = model.objects.filter(business=business)
+        if period_lookup:
+            rows = rows.filter(**{
+                f'{period_lookup}__gte': period_start,
+                f'{period_lookup}__lt': period_end,
+            })
+        aggregate = rows.aggregate(latest=Max('updated_at'), rows=Count('id'))
+        marks.append(aggregate['latest'])
+        counts.append(aggregate['rows'])
+    return max((mark for mark in marks if mark), default=None), counts
+
+
+def report_cache_key(report, period_start, period_end, watermark, counts):
+    """Content address for a report's output."""
+    parts = [
+        str(report.business_id),
+        report.report_type,
+        report.file_format,
+        canonical_parameters(report.parameters),
+        period_start.isoformat(),
+        period_end.isoformat(),
+        watermark.isoformat() if watermark else '',
+        ','.join(map(str, counts)),
+    ]
+    return hashlib.sha256('|'.join(parts).encode('utf-8')).hexdigest()
+
+
+def get_or_queue_report(business, report_type, parameters=None,
+                        file_format='PDF', name=None, generated_by=None):
+    """Return a report for the request, reusing identical earlier output.
+
+    When a report with the same content address already has a file, or
+    is queued or being generated, it is returned as is. Otherwise a new report is
+    queued for `run_scheduled_reports`, so generation never happens in
+    the web worker. Returns (report, created).
+    """
+    report = Report(
+        business=business,
+        report_type=report_type,
+        name=name or Report.ReportType(report_type).label,
+        parameters=parameters or {},
+        file_format=file_format,
+        generated_by=generated_by
+    )
+    period_start, period_end = parameter_period(report)
+    watermark, counts = data_watermark(business, report_type, period_start, period_end)
+    cache_key = report_cache_key(report, period_start, period_end, watermark, counts)
+
+    now = timezone.now()
+    existing = Report.objects.filter(
+        business=business,
+        cache_key=cache_key
+    ).filter(
+        Q(file__gt='') |
+        Q(next_scheduled_run__isnull=False) |
+        Q(is_scheduled=False, failed_attempts__lt=MAX_ATTEMPTS,
+          generated_at__gte=now - IN_FLIGHT_TIMEOUT)
+    ).first()
+    if existing:
+        return existing, False
+
+    # Pin the resolved period so a worker picking the report up after
+    # midnight still produces what the key describes.
+    report.parameters = {
+        **report.parameters,
+        'start_date': period_start.date().isoformat(),
+        'end_date': (period_end - timedelta(days=1)).date().isoformat(),
+    }
+    report.cache_key = cache_key
+    report.data_watermark = watermark
+    report.next_scheduled_run = now
+    report.save()
+    return report, True
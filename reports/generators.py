@@ -0,0 +1,290 @@
+# reports/generators.py
+import tempfile
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.core.files import File
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Max, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.utils.text import slugify
+
+from pos.models import Product, Sale, SaleItem
+from .models import Report
+from .tax import vat_return
+from .writers import WRITERS
+
+
+# Rows fetched per database round trip while streaming a report.
+CHUNK_SIZE = 2000
+
+
+class ReportGenerationError(Exception):
+    """Raised when a report cannot be generated."""
+
+
+# Maps Report.ReportType values to generator callables. A generator
+# returns (columns, rows) where rows is a lazy iterable of tuples.
+GENERATORS = {}
+
+
+def register(report_type):
+    """Register a generator for the given report type."""
+    def decorator(func):
+        GENERATORS[report_type] = func
+        return func
+    return decorator
+
+
+def parameter_period(report):
+    """Return the [start, end) period requested in report.parameters.
+
+    `start_date` and `end_date` are inclusive ISO dates interpreted in
+    the business's timezone; the default is the last 30 days.
+    """
+    tz = report.business.tzinfo
+    today = timezone.now().astimezone(tz).date()
+
+    end_date = parse_date(report.parameters.get('end_date') or '') or today
+    start_date = parse_date(report.parameters.get('start_date') or '') or \
+        end_date - timedelta(days=29)
+
+    return (
+        datetime.combine(start_date, time.min, tzinfo=tz),
+        datetime.combine(end_date + timedelta(days=1), time.min, tzinfo=tz),
+    )
+
+
+def generate_report(report, period_start, period_end):
+    """Generate the file for a report covering [period_start, period_end).
+
+    Rows are streamed from the database into the writer for the report's
+    file format, through a temporary file, and saved to report.file.
+    """
+    generator = GENERATORS.get(report.report_type)
+    if generator is None:
+        raise ReportGenerationError(
+            f"No generator registered for {Report.ReportType(report.report_type).label}")
+
+    writer_class = WRITERS.get(report.file_format)
+    if writer_class is None:
+        raise ReportGenerationError(
+            f"Unsupported file format {report.file_format}")
+
+    columns, rows = generator(report, period_start, period_end)
+
+    with tempfile.TemporaryFile() as tmp:
+        writer = writer_class(tmp, report.name, columns)
+        for row in rows:
+            writer.write_row(row)
+        writer.close()
+        tmp.seek(0)
+
+        if report.file:
+            report.file.delete(save=False)
+        filename = "{}-{}.{}".format(
+            slugify(report.name) or 'report',
+            (period_end - timedelta(seconds=1)).strftime('%Y%m%d'),
+            writer_class.extension
+        )
+        report.file.save(filename, File(tmp), save=False)
+
+    report.save(update_fields=['file'])
+    return report
+
+
+def _money(value):
+    if value is None:
+        return None
+    return Decimal(value).quantize(Decimal('0.01'))
+
+
+def _completed_sales(report, period_start, period_end):
+    return Sale.objects.filter(
+        business_id=report.business_id,
+        status=Sale.Status.COMPLETED,
+        created_at__gte=period_start,
+        created_at__lt=period_end
+    )
+
+
+def _completed_sale_items(report, period_start, period_end):
+    return SaleItem.objects.filter(
+        sale__business_id=report.business_id,
+        sale__status=Sale.Status.COMPLETED,
+        sale__created_at__gte=period_start,
+        sale__created_at__lt=period_end
+    )
+
+
+@register(Report.ReportType.SALES_SUMMARY)
+def sales_summary(report, period_start, period_end):
+    """Daily sales totals."""
+    columns = ['Date', 'Sales', 'Subtotal', 'Tax',
+               'Discounts', 'Total', 'Average Sale']
+
+    daily = _completed_sales(report, period_start, period_end).annotate(
+        day=TruncDate('created_at', tzinfo=report.business.tzinfo)
+    ).values('day').annotate(
+        count=Count('id'),
+        subtotal=Sum('subtotal'),
+        tax=Sum('tax_amount'),
+        discount=Sum('discount_amount'),
+        total=Sum('total_amount')
+    ).order_by('day')
+
+    rows = (
+        (row['day'], row['count'], _money(row['subtotal']),
+         _money(row['tax']), _money(row['discount']), _money(row['total']),
+         _money(row['total'] / row['count']))
+        for row in daily.iterator(chunk_size=CHUNK_SIZE)
+    )
+    return columns, rows
+
+
+@register(Report.ReportType.INVENTORY)
+def inventory(report, period_start, period_end):
+    """Current stock levels and stock value per product."""
+    columns = ['SKU', 'Product', 'Category', 'Status', 'Stock',
+               'Low Stock Threshold', 'Cost Price', 'Selling Price', 'Stock Value']
+
+    products = Product.objects.filter(
+        business_id=report.business_id
+    ).annotate(
+        stock_value=ExpressionWrapper(
+            F('stock_quantity') * F('cost_price'),
+            output_field=DecimalField(max_digits=14, decimal_places=2)
+        )
+    ).order_by('name').values_list(
+        'sku', 'name', 'category__name', 'status', 'stock_quantity',
+        'low_stock_threshold', 'cost_price', 'selling_price', 'stock_value'
+    )
+
+    return columns, products.iterator(chunk_size=CHUNK_SIZE)
+
+
+@register(Report.ReportType.STAFF_PERFORMANCE)
+def staff_performance(report, period_start, period_end):
+    """Sales made by each cashier."""
+    columns = ['Username', 'First Name', 'Last Name', 'Sales',
+               'Total', 'Average Sale', 'Discounts Given', 'Last Sale']
+
+    staff = _completed_sales(report, period_start, period_end).values(
+        'cashier__username', 'cashier__first_name', 'cashier__last_name'
+    ).annotate(
+        count=Count('id'),
+        total=Sum('total_amount'),
+        discount=Sum('discount_amount'),
+        last_sale=Max('created_at')
+    ).order_by('-total')
+
+    rows = (
+        (row['cashier__username'], row['cashier__first_name'],
+         row['cashier__last_name'], row['count'], _money(row['total']),
+         _money(row['total'] / row['count']), _money(row['discount']),
+         row['last_sale'])
+        for row in staff.iterator(chunk_size=CHUNK_SIZE)
+    )
+    return columns, rows
+
+
+@register(Report.ReportType.CUSTOMER)
+def customers(report, period_start, period_end):
+    """Purchases per customer, identified by phone number."""
+    columns = ['Customer', 'Phone', 'Email', 'Purchases',
+               'Total Spent', 'Average Sale', 'Last Purchase']
+
+    customer_sales = _completed_sales(
+        report, period_start, period_end
+    ).exclude(
+        customer_phone__isnull=True
+    ).exclude(
+        customer_phone=''
+    ).values('customer_phone').annotate(
+        name=Max('customer_name'),
+        email=Max('customer_email'),
+        count=Count('id'),
+        total=Sum('total_amount'),
+        last_purchase=Max('created_at')
+    ).order_by('-total')
+
+    rows = (
+        (row['name'], row['customer_phone'], row['email'], row['count'],
+         _money(row['total']), _money(row['total'] / row['count']),
+         row['last_purchase'])
+        for row in customer_sales.iterator(chunk_size=CHUNK_SIZE)
+    )
+    return columns, rows
+
+
+@register(Report.ReportType.FINANCIAL)
+def financial(report, period_start, period_end):
+    """Daily revenue, cost of goods sold and gross profit.
+
+    Cost of goods uses the cost recorded on each item when it was sold,
+    or the product's current cost price for items sold before that.
+    """
+    columns = ['Date', 'Gross Sales', 'Discounts', 'Net Sales',
+               'Tax', 'Total Collected', 'Cost of Goods', 'Gross Profit']
+
+    money = DecimalField(max_digits=14, decimal_places=2)
+    daily = _completed_sale_items(report, period_start, period_end).annotate(
+        day=TruncDate('sale__created_at', tzinfo=report.business.tzinfo)
+    ).values('day').annotate(
+        gross=Sum('subtotal'),
+        discount=Sum('discount_amount'),
+        tax=Sum('tax_amount'),
+        total=Sum('total'),
+        cost=Sum(
+            ExpressionWrapper(F('quantity') * Coalesce('unit_cost', 'product__cost_price'),
+                              output_field=money)
+        )
+    ).order_by('day')
+
+    rows = (
+        (row['day'], _money(row['gross']), _money(row['discount']),
+         _money(row['gross'] - row['discount']), _money(row['tax']),
+         _money(row['total']), _money(row['cost']),
+         _money(row['gross'] - row['discount'] - row['cost']))
+        for row in daily.iterator(chunk_size=CHUNK_SIZE)
+    )
+    return columns, rows
+
+
+@register(Report.ReportType.TAX)
+def tax(report, period_start, period_end):
+    """VAT return: tax per rate and per payment method for each period.
+
+    Built from the daily tax rollups; `period` in parameters is one of
+    day, month (default), quarter or year.
+    """
+    columns = ['Period Start', 'Period End', 'Tax Rate (%)', 'Payment Method',
+               'Items', 'Gross Sales', 'Discounts', 'Taxable Amount',
+               'Tax', 'Total']
+
+    tz = report.business.tzinfo
+    summaries = vat_return(
+        report.business,
+        period_start.astimezone(tz).date(),
+        (period_end - timedelta(microseconds=1)).astimezone(tz).date(),
+        period=report.parameters.get('period', 'month')
+    )
+
+    def line(summary, rate, method, totals):
+        return (
+            summary['period_start'], summary['period_end'], rate, method,
+            totals['item_count'], _money(totals['gross_amount']),
+            _money(totals['discount_amount']), _money(totals['taxable_amount']),
+            _money(totals['tax_amount']), _money(totals['total_amount'])
+        )
+
+    def rows():
+        for summary in summaries:
+            for totals in summary['by_rate']:
+                yield line(summary, totals['tax_rate'], 'All', totals)
+            for totals in summary['by_payment_method']:
+                yield line(summary, 'All', totals['payment_method'], totals)
+            yield line(summary, 'All', 'All', summary['totals'])
+
+    return columns, rows()
@@ -0,0 +1,43 @@
+# reports/management/commands/build_rollups.py
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from reports.rollups import rebuild_sales_rollups, rebuild_tax_rollups, refresh_rollups
+
+
+class Command(BaseCommand):
+    help = ('Bring daily reporting rollups up to date with changed sales. Run it '
+            'every few minutes; the first run backfills every business. With '
+            '--days, --start or --end, rebuild that date range instead.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int,
+                            help='Rebuild this many most recent days.')
+        parser.add_argument('--start', help='First date to rebuild (YYYY-MM-DD).')
+        parser.add_argument('--end', help='Last date to rebuild (YYYY-MM-DD).')
+        parser.add_argument('--business', type=int, action='append',
+                            help='Only rebuild this business id (repeatable).')
+
+    def handle(self, *args, **options):
+        if not (options['days'] or options['start'] or options['end']):
+            rebuilt = refresh_rollups(options['business'])
+            self.stdout.write(self.style.SUCCESS(
+                f'Rollups refreshed, {rebuilt} business days rebuilt'))
+            return
+
+        # A day of slack either side covers every business timezone.
+        end_date = parse_date(options['end'] or '') or \
+            timezone.now().date() + timedelta(days=1)
+        start_date = parse_date(options['start'] or '') or \
+            end_date - timedelta(days=options['days'] or 2)
+        if start_date > end_date:
+            raise CommandError('--start must not be after --end')
+
+        rebuild_tax_rollups(start_date, end_date, options['business'])
+        rebuild_sales_rollups(start_date, end_date, options['business'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rollups rebuilt for {start_date} to {end_date}'))
@@ -0,0 +1,28 @@
+# reports/management/commands/prune_audit_logs.py
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from reports.retention import prune_audit_logs
+
+
+class Command(BaseCommand):
+    help = 'Delete audit log entries older than the retention window of their license tier.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000,
+                            help='Rows deleted per transaction.')
+        parser.add_argument('--archive-dir', default=settings.AUDIT_LOG_ARCHIVE_DIR,
+                            help='Write pruned rows to monthly archives here first.')
+        parser.add_argument('--sleep', type=float, default=0,
+                            help='Seconds to pause between chunks.')
+
+    def handle(self, *args, **options):
+        deleted = prune_audit_logs(
+            chunk_size=options['chunk_size'],
+            archive_dir=options['archive_dir'],
+            pause=options['sleep']
+        )
+        for label, count in deleted.items():
+            self.stdout.write(f'{label}: {count} entries pruned')
+        self.stdout.write(self.style.SUCCESS(
+            f'{sum(deleted.values())} audit log entries pruned'))
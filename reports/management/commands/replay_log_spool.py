@@ -0,0 +1,15 @@
+# reports/management/commands/replay_log_spool.py
+from django.core.management.base import BaseCommand
+
+from reports.audit import audit_writer
+from superadmin.activity import activity_writer
+
+
+class Command(BaseCommand):
+    help = 'Write log entries left in spool files by crashed processes or failed flushes.'
+
+    def handle(self, *args, **options):
+        for writer in (audit_writer, activity_writer):
+            written = writer.replay_spool()
+            self.stdout.write(self.style.SUCCESS(
+                f'{written} {writer.model._meta.verbose_name_plural} recovered'))
@@ -0,0 +1,42 @@
+# reports/management/commands/run_scheduled_reports.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from reports.scheduler import run_due_reports
+
+
+class Command(BaseCommand):
+    help = 'Generate scheduled reports that are due, outside the web workers.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int,
+                            help='Maximum number of generator processes.')
+        parser.add_argument('--batch-size', type=int,
+                            help='Maximum number of reports claimed per pass.')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep polling for due reports.')
+        parser.add_argument('--interval', type=int, default=60,
+                            help='Seconds between passes when looping.')
+
+    def handle(self, *args, **options):
+        while True:
+            results = run_due_reports(
+                max_workers=options['workers'],
+                batch_size=options['batch_size']
+            )
+
+            for report_id, error in results:
+                if error is None:
+                    self.stdout.write(self.style.SUCCESS(
+                        f'Report #{report_id} generated'))
+                else:
+                    self.stderr.write(self.style.ERROR(
+                        f'Report #{report_id} failed: {error}'))
+
+            if not options['loop']:
+                break
+
+            # Drain the backlog before sleeping.
+            if not results:
+                time.sleep(options['interval'])
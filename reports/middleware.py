@@ -0,0 +1,48 @@
+# reports/middleware.py
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+
+from .audit import BufferedWriter, current_request
+
+
+def _count_request():
+    for writer in BufferedWriter.writers:
+        writer.stats['requests'] += 1
+
+
+def _flush_due_writers():
+    for writer in BufferedWriter.writers:
+        writer.flush_if_due()
+
+
+class AuditMiddleware:
+    """Expose the request to audit logging and flush due log batches."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        token = current_request.set(request)
+        try:
+            return self.get_response(request)
+        finally:
+            current_request.reset(token)
+            _count_request()
+            _flush_due_writers()
+
+    async def __acall__(self, request):
+        token = current_request.set(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            current_request.reset(token)
+            _count_request()
+            if any(writer.is_due() for writer in BufferedWriter.writers):
+                await sync_to_async(_flush_due_writers)()
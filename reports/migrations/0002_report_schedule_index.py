@@ -0,0 +1,20 @@
+# Generated by Django 6.0 on 2026-10-18 23:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('businesses', '0001_initial'),
+        ('reports', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='report',
+            index=models.Index(fields=['is_scheduled', 'next_scheduled_run'], name='reports_rep_is_sche_b78016_idx'),
+        ),
+    ]
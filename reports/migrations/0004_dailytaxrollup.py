@@ -0,0 +1,38 @@
+# Generated by Django 6.0 on 2026-10-18 23:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('businesses', '0001_initial'),
+        ('reports', '0003_report_cache_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyTaxRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('tax_rate', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('payment_method', models.CharField(max_length=20)),
+                ('item_count', models.IntegerField(default=0)),
+                ('gross_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('discount_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('taxable_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('tax_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('business', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tax_rollups', to='businesses.business')),
+            ],
+            options={
+                'verbose_name': 'Daily Tax Rollup',
+                'verbose_name_plural': 'Daily Tax Rollups',
+                'ordering': ['date', 'tax_rate'],
+                'unique_together': {('business', 'date', 'tax_rate', 'payment_method')},
+            },
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 6.0 on 2026-10-19 00:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('businesses', '0001_initial'),
+        ('reports', '0005_auditlog_created_at_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('payment_method', models.CharField(max_length=20)),
+                ('sale_count', models.IntegerField(default=0)),
+                ('subtotal', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('discount_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('tax_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('business', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sales_rollups', to='businesses.business')),
+            ],
+            options={
+                'verbose_name': 'Daily Sales Rollup',
+                'verbose_name_plural': 'Daily Sales Rollups',
+                'ordering': ['date', 'payment_method'],
+                'indexes': [models.Index(fields=['date', 'business'], name='reports_dai_date_acb9ba_idx')],
+                'unique_together': {('business', 'date', 'payment_method')},
+            },
+        ),
+        migrations.CreateModel(
+            name='MonthlySalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('payment_method', models.CharField(max_length=20)),
+                ('sale_count', models.IntegerField(default=0)),
+                ('subtotal', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('discount_amount', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('tax_amount', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('business', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_sales_rollups', to='businesses.business')),
+            ],
+            options={
+                'verbose_name': 'Monthly Sales Rollup',
+                'verbose_name_plural': 'Monthly Sales Rollups',
+                'ordering': ['month', 'payment_method'],
+                'indexes': [models.Index(fields=['month', 'business'], name='reports_mon_month_5ab3cf_idx')],
+                'unique_together': {('business', 'month', 'payment_method')},
+            },
+        ),
+    ]
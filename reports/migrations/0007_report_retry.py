@@ -0,0 +1,28 @@
+# Generated by Django 6.0 on 2026-10-19 00:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0006_salesrollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='report',
+            name='failed_attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='report',
+            name='last_error',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='report',
+            name='retry_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
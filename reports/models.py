@@ -1,5 +1,6 @@
 # reports/models.py
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 
@@ -64,6 +65,14 @@ class Report(models.Model):
         null=True
     )
     next_scheduled_run = models.DateTimeField(blank=True, null=True)
+    # Failed runs are retried from retry_at (see reports/scheduler.py)
+    failed_attempts = models.PositiveSmallIntegerField(default=0)
+    retry_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True, default='')
+
+    # Result cache (see reports/caching.py)
+    cache_key = models.CharField(max_length=64, blank=True, null=True)
+    data_watermark = models.DateTimeField(blank=True, null=True)
 
     # Audit
     generated_by = models.ForeignKey(
@@ -87,6 +96,10 @@ class Report(models.Model):
         ordering = ['-generated_at']
         verbose_name = _('Report')
         verbose_name_plural = _('Reports')
+        indexes = [
+            models.Index(fields=['is_scheduled', 'next_scheduled_run']),
+            models.Index(fields=['business', 'cache_key']),
+        ]
 
 
 class AuditLog(models.Model):
@@ -133,7 +146,8 @@ class AuditLog(models.Model):
     ip_address = models.GenericIPAddressField(blank=True, null=True)
     user_agent = models.TextField(blank=True, null=True)
 
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Set when the entry is queued, not when its batch is written.
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
 
     def __str__(self):
         return f"{self.user} {self.action_type} {self.model_name} #{self.object_id}"
@@ -147,3 +161,143 @@ class AuditLog(models.Model):
             models.Index(fields=['business', 'created_at']),
             models.Index(fields=['user', 'created_at']),
         ]
+
+
+class DailyTaxRollup(models.Model):
+    """Daily tax totals per business, tax rate and payment method.
+
+    Dates are local to the business's timezone. Rows are rebuilt from
+    completed sale items by reports/rollups.py.
+    """
+
+    business = models.ForeignKey(
+        'businesses.Business',
+        on_delete=models.CASCADE,
+        related_name='tax_rollups'
+    )
+    date = models.DateField()
+    tax_rate = models.DecimalField(max_digits=5, decimal_places=2)
+    payment_method = models.CharField(max_length=20)
+
+    item_count = models.IntegerField(default=0)
+    gross_amount = models.DecimalField(
+        max_digits=14, decimal_places=2, default=0)
+    discount_amount = models.DecimalField(
+        max_digits=14, decimal_places=2, default=0)
+    taxable_amount = models.DecimalField(
+        max_digits=14, decimal_places=2, default=0)
+    tax_amount = models.DecimalField(
+        max_digits=14, decimal_places=2, default=0)
+    total_amount = models.DecimalField(
+        max_digits=14, decimal_places=2, default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.business_id} {self.date} {self.tax_rate}% {self.payment_method}"
+
+    class Meta:
+        ordering = ['date', 'tax_rate']
+        verbose_name = _('Daily Tax Rollup')
+        verbose_name_plural = _('Daily Tax Rollups')
+        unique_together = ['business', 'date', 'tax_rate', 'payment_method']
+
+
+class DailySalesRollup(models.Model):
+    """Daily completed-sale totals per business and payment method.
+
+    Dates are local to the business's timezone. Rows are rebuilt from
+    completed sales by reports/rollups.py.
+    """
+
+    business = models.ForeignKey(
+        'businesses.Business',
+        on_delete=models.CASCADE,
+        related_name='sales_rollups'
+    )
+    date = models.DateField()
+    payment_method = models.CharField(max_length=20)
+
+    sale_count = models.IntegerField(default=0)
+    subtotal = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    discount_amount = models.DecimalField(
+        max_digits=14, decimal_places=2, default=0)
+    tax_amount = models.DecimalField(
+        max_digits=14, decimal_places=2, default=0)
+    total_amount = models.DecimalField(
+        max_digits=14, decimal_places=2, default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.business_id} {self.date} {self.payment_method}"
+
+    class Meta:
+        ordering = ['date', 'payment_method']
+        verbose_name = _('Daily Sales Rollup')
+        verbose_name_plural = _('Daily Sales Rollups')
+        unique_together = ['business', 'date', 'payment_method']
+        indexes = [
+            models.Index(fields=['date', 'business']),
+        ]
+
+
+class MonthlySalesRollup(models.Model):
+    """Monthly completed-sale totals per business and payment method.
+
+    Months are identified by their first day and rebuilt from
+    DailySalesRollup, so long ranges read a few rows per business.
+    """
+
+    business = models.ForeignKey(
+        'businesses.Business',
+        on_delete=models.CASCADE,
+        related_name='monthly_sales_rollups'
+    )
+    month = models.DateField()
+    payment_method = models.CharField(max_length=20)
+
+    sale_count = models.IntegerField(default=0)
+    subtotal = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    discount_amount = models.DecimalField(
+        max_digits=16, decimal_places=2, default=0)
+    tax_amount = models.DecimalField(
+        max_digits=16, decimal_places=2, default=0)
+    total_amount = models.DecimalField(
+        max_digits=16, decimal_places=2, default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.business_id} {self.month:%Y-%m} {self.payment_method}"
+
+    class Meta:
+        ordering = ['month', 'payment_method']
+        verbose_name = _('Monthly Sales Rollup')
+        verbose_name_plural = _('Monthly Sales Rollups')
+        unique_together = ['business', 'month', 'payment_method']
+        indexes = [
+            models.Index(fields=['month', 'business']),
+        ]
+
+
+class RollupCheckpoint(models.Model):
+    """When a business's daily rollups were last brought up to date.
+
+    Days with sales updated since synced_at are rebuilt by the next
+    refresh; a business without a checkpoint is rebuilt in full.
+    """
+
+    business = models.OneToOneField(
+        'businesses.Business',
+        on_delete=models.CASCADE,
+        related_name='rollup_checkpoint'
+    )
+    synced_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.business_id} rollups synced at {self.synced_at}"
+
+    class Meta:
+        verbose_name = _('Rollup Checkpoint')
+        verbose_name_plural = _('Rollup Checkpoints')
@@ -0,0 +1,103 @@
+# reports/retention.py
+import gzip
+import json
+import os
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from businesses.models import Business
+from licenses.models import License
+from .models import AuditLog
+
+
+def retention_scopes(now=None):
+    """Yield (label, business ids, cutoff) for each retention policy.
+
+    Businesses keep audit entries for the number of days configured for
+    their license tier; businesses without a license fall back to the
+    demo policy and platform-level entries, listed under the business id
+    None, to their own setting.
+    """
+    now = now or timezone.now()
+    policies = settings.AUDIT_LOG_RETENTION_DAYS
+
+    for tier, days in policies.items():
+        scope = Q(license__tier=tier)
+        if tier == License.Tier.DEMO:
+            scope |= Q(license__isnull=True)
+        business_ids = Business.objects.filter(scope).order_by('id').values_list('id', flat=True)
+        yield tier, list(business_ids), now - timedelta(days=days)
+
+    yield (
+        'PLATFORM',
+        [None],
+        now - timedelta(days=settings.AUDIT_LOG_PLATFORM_RETENTION_DAYS)
+    )
+
+
+def _archive(rows, archive_dir):
+    """Append rows to monthly gzip JSON-lines archives."""
+    os.makedirs(archive_dir, exist_ok=True)
+    by_month = defaultdict(list)
+    for row in rows:
+        by_month[row['created_at'].strftime('%Y-%m')].append(row)
+
+    for month, month_rows in by_month.items():
+        path = os.path.join(archive_dir, f'auditlog-{month}.jsonl.gz')
+        with gzip.open(path, 'at', encoding='utf-8') as archive:
+            for row in month_rows:
+                archive.write(json.dumps(row, cls=DjangoJSONEncoder) + '\n')
+
+
+def prune_audit_logs(chunk_size=5000, archive_dir=None, pause=0, now=None):
+    """Delete audit entries older than their retention window.
+
+    Each business's rows are removed oldest first over the (business,
+    created_at) index, in chunks of primary keys, each chunk in its own
+    short transaction, so locks are never held for long and an
+    interrupted run simply continues where it stopped when started
+    again. Returns the number of deleted rows per policy.
+    """
+    deleted = {}
+    for label, business_ids, cutoff in retention_scopes(now):
+        deleted[label] = 0
+        for business_id in business_ids:
+            deleted[label] += _prune_business(
+                business_id, cutoff, chunk_size, archive_dir, pause)
+    return deleted
+
+
+def _prune_business(business_id, cutoff, chunk_size, archive_dir, pause):
+    expired = AuditLog.objects.filter(business_id=business_id, created_at__lt=cutoff)
+    # Each chunk starts after the last row of the one before, so the index
+    # is walked once instead of rescanned past the entries just deleted.
+    after = Q()
+    deleted = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                expired.filter(after).order_by('created_at', 'id').values_list(
+                    'id', 'created_at')[:chunk_size]
+            )
+            if not rows:
+                break
+
+            ids = [row_id for row_id, _ in rows]
+            if archive_dir:
+                _archive(AuditLog.objects.filter(id__in=ids).values(), archive_dir)
+            AuditLog.objects.filter(id__in=ids).delete()
+
+        last_id, last_created_at = rows[-1]
+        after = Q(created_at__gt=last_created_at) | Q(
+            created_at=last_created_at, id__gt=last_id)
+        deleted += len(ids)
+        if pause:
+            time.sleep(pause)
+    return deleted
@@ -0,0 +1,250 @@
+# reports/rollups.py
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, Min, Sum
+from django.db.models.functions import TruncDate, TruncMonth
+from django.utils import timezone
+
+from businesses.models import Business
+from pos.models import Sale, SaleItem
+from .models import DailySalesRollup, DailyTaxRollup, MonthlySalesRollup, RollupCheckpoint
+
+
+# Businesses rebuilt per aggregate query.
+BUSINESS_BATCH_SIZE = 500
+
+# Sales updated this long before a refresh's checkpoint are looked at
+# again by the next refresh, in case their transaction committed late.
+REFRESH_OVERLAP = timedelta(minutes=5)
+
+SALES_AMOUNT_FIELDS = ('subtotal', 'discount_amount', 'tax_amount', 'total_amount')
+
+
+def _businesses_by_timezone(business_ids=None):
+    """Group business ids by timezone, so each group shares day boundaries."""
+    businesses = Business.objects.all()
+    if business_ids is not None:
+        businesses = businesses.filter(id__in=business_ids)
+
+    groups = defaultdict(list)
+    for business in businesses.only('id', 'timezone').iterator():
+        groups[business.tzinfo].append(business.id)
+
+    for tz, ids in groups.items():
+        for i in range(0, len(ids), BUSINESS_BATCH_SIZE):
+            yield tz, ids[i:i + BUSINESS_BATCH_SIZE]
+
+
+def _local_bounds(start_date, end_date, tz):
+    return (
+        datetime.combine(start_date, time.min, tzinfo=tz),
+        datetime.combine(end_date + timedelta(days=1), time.min, tzinfo=tz),
+    )
+
+
+def rebuild_tax_rollups(start_date, end_date, business_ids=None):
+    """Recompute DailyTaxRollup rows for local dates in [start_date, end_date].
+
+    Sale items are aggregated in the database, one query per group of
+    businesses sharing a timezone, and the affected rows are replaced
+    in a single transaction per group.
+    """
+    for tz, ids in _businesses_by_timezone(business_ids):
+        _rebuild_tax_rollups(start_date, end_date, tz, ids)
+
+
+def _rebuild_tax_rollups(start_date, end_date, tz, ids):
+    start, end = _local_bounds(start_date, end_date, tz)
+
+    totals = SaleItem.objects.filter(
+        sale__business_id__in=ids,
+        sale__status=Sale.Status.COMPLETED,
+        sale__created_at__gte=start,
+        sale__created_at__lt=end
+    ).annotate(
+        day=TruncDate('sale__created_at', tzinfo=tz)
+    ).values(
+        'sale__business_id', 'day', 'tax_rate', 'sale__payment_method'
+    ).annotate(
+        items=Count('id'),
+        gross=Sum('subtotal'),
+        discount=Sum('discount_amount'),
+        tax=Sum('tax_amount'),
+        total=Sum('total')
+    ).order_by()
+
+    rollups = [
+        DailyTaxRollup(
+            business_id=row['sale__business_id'],
+            date=row['day'],
+            tax_rate=row['tax_rate'],
+            payment_method=row['sale__payment_method'],
+            item_count=row['items'],
+            gross_amount=row['gross'],
+            discount_amount=row['discount'],
+            taxable_amount=row['gross'] - row['discount'],
+            tax_amount=row['tax'],
+            total_amount=row['total']
+        )
+        for row in totals.iterator()
+    ]
+
+    with transaction.atomic():
+        DailyTaxRollup.objects.filter(
+            business_id__in=ids,
+            date__gte=start_date,
+            date__lte=end_date
+        ).delete()
+        DailyTaxRollup.objects.bulk_create(rollups, batch_size=1000)
+
+
+def rebuild_sales_rollups(start_date, end_date, business_ids=None):
+    """Recompute DailySalesRollup rows for local dates in [start_date, end_date].
+
+    The months the range touches are then recomputed from the daily rows.
+    """
+    for tz, ids in _businesses_by_timezone(business_ids):
+        _rebuild_daily_sales_rollups(start_date, end_date, tz, ids)
+        _rebuild_monthly_sales_rollups(start_date, end_date, ids)
+
+
+def _rebuild_daily_sales_rollups(start_date, end_date, tz, ids):
+    start, end = _local_bounds(start_date, end_date, tz)
+
+    totals = Sale.objects.filter(
+        business_id__in=ids,
+        status=Sale.Status.COMPLETED,
+        created_at__gte=start,
+        created_at__lt=end
+    ).annotate(
+        day=TruncDate('created_at', tzinfo=tz)
+    ).values(
+        'business_id', 'day', 'payment_method'
+    ).annotate(
+        sales=Count('id'),
+        **{field: Sum(field) for field in SALES_AMOUNT_FIELDS}
+    ).order_by()
+
+    rollups = [
+        DailySalesRollup(
+            business_id=row['business_id'],
+            date=row['day'],
+            payment_method=row['payment_method'],
+            sale_count=row['sales'],
+            **{field: row[field] for field in SALES_AMOUNT_FIELDS}
+        )
+        for row in totals.iterator()
+    ]
+
+    with transaction.atomic():
+        DailySalesRollup.objects.filter(
+            business_id__in=ids,
+            date__gte=start_date,
+            date__lte=end_date
+        ).delete()
+        DailySalesRollup.objects.bulk_create(rollups, batch_size=1000)
+
+
+def _rebuild_monthly_sales_rollups(start_date, end_date, business_ids):
+    first_month = start_date.replace(day=1)
+    last_month = end_date.replace(day=1)
+
+    totals = DailySalesRollup.objects.filter(
+        business_id__in=business_ids,
+        date__gte=first_month,
+        date__lt=(last_month + timedelta(days=31)).replace(day=1)
+    ).annotate(
+        month=TruncMonth('date')
+    ).values(
+        'business_id', 'month', 'payment_method'
+    ).annotate(
+        sales=Sum('sale_count'),
+        **{field: Sum(field) for field in SALES_AMOUNT_FIELDS}
+    ).order_by()
+
+    rollups = [
+        MonthlySalesRollup(
+            business_id=row['business_id'],
+            month=row['month'],
+            payment_method=row['payment_method'],
+            sale_count=row['sales'],
+            **{field: row[field] for field in SALES_AMOUNT_FIELDS}
+        )
+        for row in totals.iterator()
+    ]
+
+    with transaction.atomic():
+        MonthlySalesRollup.objects.filter(
+            business_id__in=business_ids,
+            month__gte=first_month,
+            month__lte=last_month
+        ).delete()
+        MonthlySalesRollup.objects.bulk_create(rollups, batch_size=1000)
+
+
+def _rebuild_days(start_date, end_date, tz, ids):
+    _rebuild_tax_rollups(start_date, end_date, tz, ids)
+    _rebuild_daily_sales_rollups(start_date, end_date, tz, ids)
+
+
+def _changed_days(since, tz, ids):
+    """{local date: [business id, ...]} of sales updated since `since`."""
+    days = defaultdict(list)
+    changed = Sale.objects.filter(
+        business_id__in=ids,
+        updated_at__gte=since
+    ).annotate(
+        day=TruncDate('created_at', tzinfo=tz)
+    ).values_list('day', 'business_id').distinct().order_by()
+    for day, business_id in changed.iterator():
+        days[day].append(business_id)
+    return days
+
+
+def refresh_rollups(business_ids=None, now=None):
+    """Bring the daily and monthly rollups up to date with changed sales.
+
+    Every local day with a sale updated since the business's checkpoint
+    is rebuilt, so refunds and edits of old sales are picked up as well
+    as new sales. Businesses without a checkpoint are rebuilt from their
+    first sale, which backfills them. Each group of businesses holds its
+    checkpoint rows locked while it is rebuilt, so concurrent refreshes
+    wait rather than race on the rollup rows. Returns the number of
+    (business, day) pairs rebuilt.
+    """
+    now = now or timezone.now()
+    rebuilt = 0
+    for tz, ids in _businesses_by_timezone(business_ids):
+        with transaction.atomic():
+            RollupCheckpoint.objects.bulk_create(
+                [RollupCheckpoint(business_id=business_id) for business_id in ids],
+                ignore_conflicts=True
+            )
+            checkpoints = dict(RollupCheckpoint.objects.select_for_update().filter(
+                business_id__in=ids).values_list('business_id', 'synced_at'))
+
+            months = defaultdict(set)
+            new_ids = [business_id for business_id in ids if checkpoints[business_id] is None]
+            first_sale = Sale.objects.filter(business_id__in=new_ids).aggregate(
+                first=Min('created_at'))['first'] if new_ids else None
+            if first_sale is not None:
+                start_date = timezone.localtime(first_sale, tz).date()
+                end_date = timezone.localtime(now, tz).date()
+                _rebuild_days(start_date, end_date, tz, new_ids)
+                _rebuild_monthly_sales_rollups(start_date, end_date, new_ids)
+                rebuilt += len(new_ids) * ((end_date - start_date).days + 1)
+
+            synced_ids = [business_id for business_id in ids if checkpoints[business_id]]
+            if synced_ids:
+                since = min(checkpoints[business_id] for business_id in synced_ids)
+                for day, day_ids in _changed_days(since - REFRESH_OVERLAP, tz, synced_ids).items():
+                    _rebuild_days(day, day, tz, day_ids)
+                    months[day.replace(day=1)].update(day_ids)
+                    rebuilt += len(day_ids)
+            for month, month_ids in months.items():
+                _rebuild_monthly_sales_rollups(month, month, list(month_ids))
+
+            RollupCheckpoint.objects.filter(business_id__in=ids).update(synced_at=now)
+    return rebuilt
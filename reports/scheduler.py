@@ -0,0 +1,177 @@
+# reports/scheduler.py
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import timedelta
+
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .generators import generate_report, parameter_period
+from .models import Report
+from .rollups import refresh_rollups
+
+
+FREQUENCY_STEPS = {
+    'DAILY': relativedelta(days=1),
+    'WEEKLY': relativedelta(weeks=1),
+    'MONTHLY': relativedelta(months=1),
+    'QUARTERLY': relativedelta(months=3),
+    'YEARLY': relativedelta(years=1),
+}
+
+# A failed run is retried after RETRY_DELAY, doubling per attempt, and
+# abandoned after MAX_ATTEMPTS; recurring reports then move on to their
+# next period.
+MAX_ATTEMPTS = 5
+RETRY_DELAY = timedelta(minutes=5)
+
+
+def next_run_after(run_at, frequency, now):
+    """Return the first run of the schedule that falls after now.
+
+    Steps are always taken from the original run time, so month-end
+    schedules don't drift (Jan 31 -> Feb 28 -> Mar 31).
+    """
+    step = FREQUENCY_STEPS[frequency]
+    multiple = 1
+    next_run = run_at + step
+    while next_run <= now:
+        multiple += 1
+        next_run = run_at + step * multiple
+    return next_run
+
+
+def claim_due_reports(limit=None, now=None):
+    """Claim up to `limit` due reports.
+
+    Due rows are locked with SKIP LOCKED so several schedulers can run
+    side by side. Recurring reports have next_scheduled_run advanced in
+    the same transaction; one-off reports queued by the web app have it
+    cleared. The claim stands in for a lease: a run that fails is put
+    back by record_failure(). Returns (report_id, scheduled_run,
+    period_start, period_end) tuples, with no period for one-off reports.
+    """
+    now = now or timezone.now()
+    limit = limit or settings.REPORT_SCHEDULER_BATCH_SIZE
+
+    with transaction.atomic():
+        due = list(
+            Report.objects.select_for_update(skip_locked=True).filter(
+                Q(is_scheduled=True, schedule_frequency__in=FREQUENCY_STEPS.keys()) |
+                Q(is_scheduled=False),
+                Q(retry_at__isnull=True) | Q(retry_at__lte=now),
+                next_scheduled_run__lte=now
+            ).only(
+                'id', 'is_scheduled', 'schedule_frequency', 'next_scheduled_run'
+            ).order_by('next_scheduled_run')[:limit]
+        )
+
+        claims = []
+        for report in due:
+            scheduled_run = report.next_scheduled_run
+            if not report.is_scheduled:
+                claims.append((report.id, scheduled_run, None, None))
+                report.next_scheduled_run = None
+                continue
+
+            period_start = scheduled_run - \
+                FREQUENCY_STEPS[report.schedule_frequency]
+            claims.append((report.id, scheduled_run, period_start, scheduled_run))
+            report.next_scheduled_run = next_run_after(
+                scheduled_run, report.schedule_frequency, now)
+
+        Report.objects.bulk_update(due, ['next_scheduled_run'])
+
+    return claims
+
+
+def record_failure(report_id, scheduled_run, error, now=None):
+    """Put back a claimed run whose generation failed.
+
+    The run is re-queued for the same period after a growing delay. Once
+    it has failed MAX_ATTEMPTS times it is abandoned, leaving the claim's
+    next_scheduled_run in place, and the error is kept in last_error.
+    """
+    now = now or timezone.now()
+    report = Report.objects.only(
+        'id', 'is_scheduled', 'next_scheduled_run', 'failed_attempts'
+    ).filter(id=report_id).first()
+    if report is None:
+        return
+
+    attempts = report.failed_attempts + 1
+    report.last_error = str(error) or error.__class__.__name__
+    if attempts < MAX_ATTEMPTS:
+        report.next_scheduled_run = scheduled_run
+        report.failed_attempts = attempts
+        report.retry_at = now + RETRY_DELAY * 2 ** (attempts - 1)
+    else:
+        # Recurring reports get a fresh set of attempts for the next period.
+        report.failed_attempts = 0 if report.is_scheduled else attempts
+        report.retry_at = None
+    report.save(update_fields=[
+        'next_scheduled_run', 'failed_attempts', 'retry_at', 'last_error'])
+
+
+def record_successes(report_ids):
+    """Clear the failure state of reports generated successfully."""
+    Report.objects.filter(id__in=report_ids).filter(
+        Q(failed_attempts__gt=0) | Q(retry_at__isnull=False) | ~Q(last_error='')
+    ).update(failed_attempts=0, retry_at=None, last_error='')
+
+
+def run_claimed_report(report_id, period_start, period_end):
+    """Generate a single claimed report. Runs inside a pool worker."""
+    report = Report.objects.select_related('business').get(id=report_id)
+    if period_start is None:
+        period_start, period_end = parameter_period(report)
+    # Tax reports read the daily tax rollups, so bring them up to date first.
+    if report.report_type == Report.ReportType.TAX:
+        refresh_rollups(business_ids=[report.business_id])
+    generate_report(report, period_start, period_end)
+    return report_id
+
+
+def _init_worker():
+    import django
+    django.setup()
+
+
+def run_due_reports(max_workers=None, batch_size=None, now=None):
+    """Claim due reports and generate them in a bounded process pool.
+
+    Returns a list of (report_id, error) tuples, where error is None
+    for reports that were generated successfully.
+    """
+    claims = claim_due_reports(batch_size, now)
+    if not claims:
+        return []
+
+    max_workers = max_workers or settings.REPORT_SCHEDULER_WORKERS
+
+    # Forked workers must not share the parent's database connections.
+    connections.close_all()
+
+    results = []
+    with ProcessPoolExecutor(
+        max_workers=min(max_workers, len(claims)),
+        initializer=_init_worker
+    ) as pool:
+        futures = {
+            pool.submit(run_claimed_report, report_id, period_start, period_end):
+                (report_id, scheduled_run)
+            for report_id, scheduled_run, period_start, period_end in claims
+        }
+        for future in as_completed(futures):
+            report_id, scheduled_run = futures[future]
+            try:
+                future.result()
+                results.append((report_id, None))
+            except Exception as e:
+                record_failure(report_id, scheduled_run, e)
+                results.append((report_id, e))
+
+    record_successes([report_id for report_id, error in results if error is None])
+    return results
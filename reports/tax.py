@@ -0,0 +1,82 @@
+# reports/tax.py
+from collections import OrderedDict
+from datetime import timedelta
+
+from dateutil.relativedelta import relativedelta
+from django.db.models import Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncQuarter, TruncYear
+
+from .models import DailyTaxRollup
+
+
+PERIODS = {
+    'day': (TruncDay, relativedelta(days=1)),
+    'month': (TruncMonth, relativedelta(months=1)),
+    'quarter': (TruncQuarter, relativedelta(months=3)),
+    'year': (TruncYear, relativedelta(years=1)),
+}
+
+AMOUNT_FIELDS = ('gross_amount', 'discount_amount', 'taxable_amount',
+                 'tax_amount', 'total_amount')
+
+
+def _totals(rows=()):
+    totals = {'item_count': 0}
+    totals.update({field: 0 for field in AMOUNT_FIELDS})
+    for row in rows:
+        for key in totals:
+            totals[key] += row[key]
+    return totals
+
+
+def vat_return(business, start_date, end_date, period='month'):
+    """Summarize tax collected by a business between two local dates.
+
+    Totals are aggregated in the database from DailyTaxRollup, grouped by
+    (period, tax_rate, payment_method), and arranged into per-period
+    summaries by rate, by payment method and overall. The rollups are
+    only read: they are as current as the last refresh_rollups() run,
+    which the scheduler makes before each tax report.
+    """
+    trunc, step = PERIODS[period]
+
+    grouped = DailyTaxRollup.objects.filter(
+        business=business,
+        date__gte=start_date,
+        date__lte=end_date
+    ).annotate(
+        period=trunc('date')
+    ).values(
+        'period', 'tax_rate', 'payment_method'
+    ).annotate(
+        item_count=Sum('item_count'),
+        **{field: Sum(field) for field in AMOUNT_FIELDS}
+    ).order_by('period', 'tax_rate', 'payment_method')
+
+    periods = OrderedDict()
+    for row in grouped:
+        periods.setdefault(row['period'], []).append(row)
+
+    summaries = []
+    for period_start, rows in periods.items():
+        by_rate = OrderedDict()
+        by_method = OrderedDict()
+        for row in rows:
+            by_rate.setdefault(row['tax_rate'], []).append(row)
+            by_method.setdefault(row['payment_method'], []).append(row)
+
+        summaries.append({
+            'period_start': max(period_start, start_date),
+            'period_end': min(period_start + step - timedelta(days=1), end_date),
+            'by_rate': [
+                {'tax_rate': rate, **_totals(rate_rows)}
+                for rate, rate_rows in by_rate.items()
+            ],
+            'by_payment_method': [
+                {'payment_method': method, **_totals(method_rows)}
+                for method, method_rows in by_method.items()
+            ],
+            'totals': _totals(rows),
+        })
+
+    return summaries
@@ -1,3 +1,631 @@
-from django.test import TestCase
+import atexit
+import csv
+import glob
+import gzip
+import io
+import json
+import os
+import re
+import tempfile
+import zipfile
+from datetime import date, datetime, timedelta
+from xml.etree import ElementTree
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import OperationalError, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts import backends
+from accounts.models import User
+from businesses.models import Business
+from licenses.models import License
+from pos.models import Product, Sale, SaleItem
+from .audit import BufferedWriter
+from .caching import get_or_queue_report
+from .generators import GENERATORS
+from .retention import prune_audit_logs
+from .models import AuditLog, DailySalesRollup, DailyTaxRollup, Report
+from .rollups import refresh_rollups
+from .scheduler import (
+    MAX_ATTEMPTS, claim_due_reports, record_failure, run_claimed_report, run_due_reports
+)
+from .tax import vat_return
+from .tracking import tracked_update
+from .writers import CSVWriter, ExcelWriter, HTMLWriter, PDFWriter
+
+
+def create_business(name='Shop'):
+    return Business.objects.create(
+        name=name, email=f'{name.lower()}@example.com', phone='1', address='a',
+        city='c', state='s', country='KE', postal_code='1')
+
+
+def create_sale(business, number, total, created_at=None, product=None):
+    sale = Sale.objects.create(
+        business=business, transaction_id=f'T{number}', receipt_number=f'R{number}',
+        subtotal=total, total_amount=total, amount_paid=total)
+    if product is not None:
+        SaleItem.objects.create(
+            sale=sale, product=product, quantity=1, unit_price=total, tax_rate=16)
+    if created_at is not None:
+        Sale.objects.filter(id=sale.id).update(created_at=created_at)
+    return sale
+
+
+@override_settings(AUDIT_LOG_SYNC=True, ACTIVITY_LOG_SYNC=True)
+class SchedulerFailureTests(TestCase):
+    def setUp(self):
+        self.business = create_business()
+        self.now = timezone.now()
+        self.run_at = self.now - timedelta(minutes=1)
+        self.report = Report.objects.create(
+            business=self.business, report_type=Report.ReportType.SALES_SUMMARY,
+            name='Daily', is_scheduled=True, schedule_frequency='DAILY',
+            next_scheduled_run=self.run_at)
+
+    def test_failed_run_is_requeued_for_the_same_period(self):
+        [(report_id, scheduled_run, start, end)] = claim_due_reports(now=self.now)
+        record_failure(report_id, scheduled_run, ValueError('boom'), now=self.now)
+
+        self.report.refresh_from_db()
+        self.assertEqual(self.report.next_scheduled_run, self.run_at)
+        self.assertEqual(self.report.failed_attempts, 1)
+        self.assertEqual(self.report.last_error, 'boom')
+        # Not claimed again until the retry delay has passed.
+        self.assertEqual(claim_due_reports(now=self.now), [])
+        claims = claim_due_reports(now=self.report.retry_at)
+        self.assertEqual([claim[3] for claim in claims], [end])
+
+    def test_recurring_run_moves_on_after_max_attempts(self):
+        now = self.now
+        for _ in range(MAX_ATTEMPTS):
+            [(report_id, scheduled_run, _, _)] = claim_due_reports(now=now)
+            record_failure(report_id, scheduled_run, ValueError('boom'), now=now)
+            self.report.refresh_from_db()
+            now = self.report.retry_at or now
+
+        self.assertEqual(self.report.failed_attempts, 0)
+        self.assertGreater(self.report.next_scheduled_run, self.run_at)
+        self.assertEqual(self.report.last_error, 'boom')
+
+    def test_successful_run_clears_failure_state(self):
+        Report.objects.filter(id=self.report.id).update(
+            failed_attempts=2, last_error='boom')
+        with mock.patch('reports.scheduler.ProcessPoolExecutor') as pool, \
+                mock.patch('reports.scheduler.as_completed', side_effect=lambda futures: futures):
+            pool.return_value.__enter__.return_value.submit.return_value = mock.Mock(
+                result=mock.Mock(return_value=self.report.id))
+            results = run_due_reports(now=self.now)
+
+        self.assertEqual(results, [(self.report.id, None)])
+        self.report.refresh_from_db()
+        self.assertEqual((self.report.failed_attempts, self.report.last_error), (0, ''))
+
+
+@override_settings(AUDIT_LOG_SYNC=True, ACTIVITY_LOG_SYNC=True)
+class ReportCacheTests(TestCase):
+    def setUp(self):
+        self.business = create_business()
+        today = timezone.localdate()
+        self.parameters = {
+            'start_date': (today - timedelta(days=40)).isoformat(),
+            'end_date': (today - timedelta(days=10)).isoformat(),
+        }
+        create_sale(self.business, 1, 10, timezone.now() - timedelta(days=20))
+
+    def test_sales_outside_the_period_keep_the_cached_report(self):
+        report, created = get_or_queue_report(
+            self.business, Report.ReportType.SALES_SUMMARY, self.parameters)
+        self.assertTrue(created)
+
+        create_sale(self.business, 2, 5)
+        again, created = get_or_queue_report(
+            self.business, Report.ReportType.SALES_SUMMARY, self.parameters)
+        self.assertFalse(created)
+        self.assertEqual(again.id, report.id)
+
+    def test_changes_inside_the_period_queue_a_new_report(self):
+        report, _ = get_or_queue_report(
+            self.business, Report.ReportType.SALES_SUMMARY, self.parameters)
+
+        Sale.objects.filter(receipt_number='R1').update(
+            status=Sale.Status.REFUNDED, updated_at=timezone.now() + timedelta(seconds=1))
+        again, created = get_or_queue_report(
+            self.business, Report.ReportType.SALES_SUMMARY, self.parameters)
+        self.assertTrue(created)
+        self.assertNotEqual(again.id, report.id)
+
+    def test_deleting_a_sale_inside_the_period_queues_a_new_report(self):
+        create_sale(self.business, 2, 5, timezone.now() - timedelta(days=20))
+        report, _ = get_or_queue_report(
+            self.business, Report.ReportType.SALES_SUMMARY, self.parameters)
+
+        Sale.objects.filter(receipt_number='R1').delete()
+        again, created = get_or_queue_report(
+            self.business, Report.ReportType.SALES_SUMMARY, self.parameters)
+        self.assertTrue(created)
+        self.assertNotEqual(again.id, report.id)
+
+    def test_report_being_generated_is_reused(self):
+        report, _ = get_or_queue_report(
+            self.business, Report.ReportType.SALES_SUMMARY, self.parameters)
+        [(report_id, scheduled_run, _, _)] = claim_due_reports()
+        again, created = get_or_queue_report(
+            self.business, Report.ReportType.SALES_SUMMARY, self.parameters)
+        self.assertFalse(created)
+        self.assertEqual(again.id, report.id)
+
+        # Once abandoned, the next request queues a fresh run.
+        Report.objects.filter(id=report_id).update(failed_attempts=MAX_ATTEMPTS)
+        again, created = get_or_queue_report(
+            self.business, Report.ReportType.SALES_SUMMARY, self.parameters)
+        self.assertTrue(created)
+
+    def test_tax_period_is_validated(self):
+        cache.clear()
+        backends._users.clear()
+        today = timezone.localdate()
+        License.objects.create(
+            business=self.business, license_key='KEY', tier=License.Tier.PRO,
+            start_date=today, end_date=today + timedelta(days=30), monthly_price=10)
+        self.client.force_login(User.objects.create_user(
+            'admin', password='pw', business=self.business, role=User.Role.BUSINESS_ADMIN))
+
+        def generate(period):
+            return self.client.post(reverse('generate_report_api'), json.dumps({
+                'report_type': 'TAX', 'file_format': 'CSV', 'parameters': {'period': period},
+            }), content_type='application/json')
+
+        response = generate('fortnight')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Invalid period', response.json()['message'])
+        self.assertEqual(generate('quarter').status_code, 202)
+
+
+@override_settings(AUDIT_LOG_SYNC=True, ACTIVITY_LOG_SYNC=True)
+class RollupRefreshTests(TestCase):
+    def setUp(self):
+        self.business = create_business()
+        self.product = Product.objects.create(
+            business=self.business, name='Tea', sku='TEA',
+            cost_price=1, selling_price=10)
+        self.old = timezone.now() - timedelta(days=90)
+        self.sale = create_sale(self.business, 1, 10, self.old, self.product)
+        create_sale(self.business, 2, 20, product=self.product)
+
+    def tax_total(self):
+        return sum(DailyTaxRollup.objects.values_list('total_amount', flat=True))
+
+    def test_first_refresh_backfills_every_day(self):
+        refresh_rollups()
+
+        self.assertEqual(self.tax_total(), Decimal('34.80'))
+        self.assertEqual(
+            DailySalesRollup.objects.filter(business=self.business).count(), 2)
+
+    def test_refund_of_an_old_sale_reaches_the_rollups(self):
+        refresh_rollups()
+
+        self.sale.refresh_from_db()
+        self.sale.status = Sale.Status.REFUNDED
+        self.sale.save()
+        refresh_rollups()
+
+        self.assertEqual(self.tax_total(), Decimal('23.20'))
+        self.assertFalse(DailySalesRollup.objects.filter(
+            date=timezone.localtime(self.old).date()).exists())
+
+
+    def test_tax_report_runs_refresh_the_rollups_first(self):
+        report = Report.objects.create(
+            business=self.business, report_type=Report.ReportType.TAX, name='VAT')
+        with mock.patch('reports.scheduler.generate_report') as generate:
+            run_claimed_report(report.id, self.old, timezone.now())
+        generate.assert_called_once()
+        self.assertEqual(self.tax_total(), Decimal('34.80'))
+
+
+class VatReturnTests(TestCase):
+    def setUp(self):
+        self.business = create_business()
+        for day, rate, method, amount in (
+                (date(2025, 1, 31), 16, 'CASH', 100),
+                (date(2025, 2, 1), 16, 'CASH', 50),
+                (date(2025, 2, 1), 8, 'MPESA', 20),
+                (date(2025, 4, 2), 16, 'MPESA', 10)):
+            DailyTaxRollup.objects.create(
+                business=self.business, date=day, tax_rate=rate, payment_method=method,
+                item_count=1, gross_amount=amount, taxable_amount=amount,
+                tax_amount=amount * rate / 100, total_amount=amount * (100 + rate) / 100)
+
+    def test_months_are_clipped_to_the_requested_dates(self):
+        summaries = vat_return(self.business, date(2025, 1, 15), date(2025, 3, 31))
+        self.assertEqual(
+            [(summary['period_start'], summary['period_end']) for summary in summaries],
+            [(date(2025, 1, 15), date(2025, 1, 31)), (date(2025, 2, 1), date(2025, 2, 28))])
+
+        february = summaries[1]
+        self.assertEqual(
+            [(row['tax_rate'], row['gross_amount']) for row in february['by_rate']],
+            [(Decimal('8.00'), Decimal('20.00')), (Decimal('16.00'), Decimal('50.00'))])
+        self.assertEqual(
+            {row['payment_method']: row['total_amount'] for row in february['by_payment_method']},
+            {'CASH': Decimal('58.00'), 'MPESA': Decimal('21.60')})
+        self.assertEqual(february['totals']['tax_amount'], Decimal('9.60'))
+
+    def test_quarters_and_years(self):
+        quarters = vat_return(self.business, date(2025, 1, 1), date(2025, 12, 31), 'quarter')
+        self.assertEqual(
+            [(summary['period_start'], summary['period_end'], summary['totals']['gross_amount'])
+             for summary in quarters],
+            [(date(2025, 1, 1), date(2025, 3, 31), Decimal('170.00')),
+             (date(2025, 4, 1), date(2025, 6, 30), Decimal('10.00'))])
+
+        [year] = vat_return(self.business, date(2025, 1, 1), date(2025, 12, 31), 'year')
+        self.assertEqual(year['totals']['item_count'], 4)
+
+    def test_other_businesses_are_left_out(self):
+        other = create_business('Other')
+        self.assertEqual(vat_return(other, date(2025, 1, 1), date(2025, 12, 31)), [])
+
+
+@override_settings(AUDIT_LOG_SYNC=True, ACTIVITY_LOG_SYNC=True)
+class AuditTrackingTests(TestCase):
+    def setUp(self):
+        self.business = create_business()
+        Product.objects.create(
+            business=self.business, name='Tea', sku='TEA', cost_price=1,
+            selling_price=10, additional_images=['a.png'])
+
+    def updates(self):
+        return list(AuditLog.objects.filter(
+            action_type=AuditLog.ActionType.UPDATE).values_list('changes', flat=True))
+
+    def test_in_place_json_mutation_is_recorded(self):
+        product = Product.objects.get(sku='TEA')
+        product.additional_images.append('b.png')
+        product.save()
+
+        self.assertEqual(self.updates(), [
+            {'additional_images': [['a.png'], ['a.png', 'b.png']]}])
+
+    def test_tracked_update_records_each_changed_row(self):
+        Product.objects.create(
+            business=self.business, name='Coffee', sku='COF', cost_price=1,
+            selling_price=10, status=Product.Status.INACTIVE)
+
+        updated = tracked_update(Product.objects.all(), status=Product.Status.INACTIVE)
+
+        self.assertEqual(updated, 2)
+        self.assertEqual(self.updates(), [
+            {'status': [Product.Status.ACTIVE, Product.Status.INACTIVE]}])
+
+
+# Above any pid the kernel hands out, so never a live process.
+DEAD_PID = 2 ** 22 + 1
+
+
+@override_settings(AUDIT_LOG_SYNC=True, ACTIVITY_LOG_SYNC=True,
+                   TEST_LOG_BATCH_SIZE=3, TEST_LOG_FLUSH_INTERVAL=3600)
+class BufferedWriterTests(TransactionTestCase):
+    def setUp(self):
+        spool_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(spool_dir.cleanup)
+        self.spool_dir = spool_dir.name
+        self.enterContext(self.settings(TEST_LOG_SPOOL_DIR=self.spool_dir))
+        self.enterContext(mock.patch.object(BufferedWriter, '_start_flusher'))
+        self.writer = self.new_writer()
+
+    def new_writer(self):
+        writer = BufferedWriter(AuditLog, 'TEST_LOG')
+        self.addCleanup(BufferedWriter.writers.remove, writer)
+        self.addCleanup(atexit.unregister, writer._flush_at_exit)
+        return writer
+
+    def log(self, writer=None, **fields):
+        (writer or self.writer).log(
+            action_type=AuditLog.ActionType.OTHER, model_name='test', **fields)
+
+    def spool_files(self, suffix='*'):
+        return glob.glob(os.path.join(self.spool_dir, f'reports_auditlog-*.{suffix}'))
+
+    def test_batch_is_written_when_full(self):
+        self.log()
+        self.log()
+        self.assertEqual(AuditLog.objects.count(), 0)
+        [spool] = self.spool_files()
+        with open(spool) as f:
+            self.assertEqual(len(f.readlines()), 2)
+
+        self.log()
+        self.assertEqual(AuditLog.objects.count(), 3)
+        self.assertEqual(self.spool_files(), [])
+        self.assertEqual(self.writer.stats['flushes'], 1)
+
+    def test_entries_are_queued_on_commit(self):
+        with transaction.atomic():
+            self.log()
+            self.assertEqual(self.writer._buffer, [])
+        self.assertEqual(len(self.writer._buffer), 1)
+
+        with self.assertRaises(ValueError):
+            with transaction.atomic():
+                self.log()
+                raise ValueError
+        self.assertEqual(len(self.writer._buffer), 1)
+
+    def test_spool_of_a_dead_process_is_replayed(self):
+        self.log(object_id='a')
+        self.log(object_id='b')
+        [spool] = self.spool_files()
+        os.replace(spool, spool.replace(f'-{os.getpid()}-', f'-{DEAD_PID}-'))
+
+        self.assertEqual(self.new_writer().replay_spool(), 2)
+        self.assertEqual(
+            sorted(AuditLog.objects.values_list('object_id', flat=True)), ['a', 'b'])
+        self.assertIsNotNone(AuditLog.objects.first().created_at)
+        self.assertEqual(self.spool_files(), [])
+
+    def test_spool_of_a_live_process_is_left_alone(self):
+        self.log()
+        self.assertEqual(self.new_writer().replay_spool(), 0)
+        self.assertEqual(len(self.spool_files()), 1)
+
+    def test_failed_flush_is_kept_for_replay(self):
+        self.log()
+        with mock.patch.object(self.writer, '_write', side_effect=OperationalError):
+            self.assertEqual(self.writer.flush(), 0)
+        self.assertEqual(self.writer.stats['failed_flushes'], 1)
+        self.assertEqual(len(self.spool_files('failed')), 1)
+
+        # Failed spools are replayed even while their process lives.
+        self.assertEqual(self.writer.replay_spool(), 1)
+        self.assertEqual(AuditLog.objects.count(), 1)
+        self.assertEqual(self.spool_files(), [])
+
+    def test_rows_with_dangling_references_are_written_one_by_one(self):
+        self.log(object_id='kept')
+        self.log(object_id='orphan', user_id=999999)
+        with mock.patch.object(self.writer, '_write_each', wraps=self.writer._write_each) as each:
+            self.log(object_id='also kept')
+        each.assert_called_once()
+        self.assertEqual(
+            sorted(AuditLog.objects.values_list('object_id', 'user_id')),
+            [('also kept', None), ('kept', None), ('orphan', None)])
+
+
+TRICKY = 'Tom\'s "best", <b>&\x01 (1/2)\\'
+
+
+def write_report(writer_class, rows, title='Sales: Q1 [draft]'):
+    buffer = io.BytesIO()
+    writer = writer_class(buffer, title, ['Name', 'Amount'])
+    for row in rows:
+        writer.write_row(row)
+    writer.close()
+    return buffer.getvalue()
+
+
+class WriterTests(SimpleTestCase):
+    def test_csv_round_trips(self):
+        data = write_report(CSVWriter, [(TRICKY, Decimal('1.50')), ('line\nbreak', None)])
+        self.assertEqual(list(csv.reader(io.StringIO(data.decode()))), [
+            ['Name', 'Amount'], [TRICKY, '1.50'], ['line\nbreak', ''],
+        ])
+
+    def test_html_is_escaped(self):
+        data = write_report(HTMLWriter, [(TRICKY, date(2025, 3, 1))]).decode()
+        self.assertIn('<td>Tom&#x27;s &quot;best&quot;, &lt;b&gt;&amp;', data)
+        self.assertIn('<td>2025-03-01</td>', data)
+        self.assertNotIn('<b>', data)
+
+    def test_xlsx_sheet_parses(self):
+        data = write_report(ExcelWriter, [(TRICKY, Decimal('1.50')), (None, 7)])
+        ns = {'x': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'}
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            self.assertIsNone(archive.testzip())
+            workbook = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+            sheet = ElementTree.fromstring(archive.read('xl/worksheets/sheet1.xml'))
+
+        self.assertEqual(workbook.find('.//x:sheet', ns).get('name'), 'Sales  Q1  draft ')
+
+        def cell(c):
+            if c.get('t') == 'inlineStr':
+                return c.find('x:is/x:t', ns).text
+            value = c.find('x:v', ns)
+            return None if value is None else value.text
+
+        rows = [[cell(c) for c in row.findall('x:c', ns)]
+                for row in sheet.findall('x:sheetData/x:row', ns)]
+        self.assertEqual(rows, [
+            ['Name', 'Amount'], [TRICKY.replace('\x01', ''), '1.50'], [None, '7'],
+        ])
+
+    def test_pdf_xref_and_pages(self):
+        lines_per_page = PDFWriter(io.BytesIO(), 't', ['a']).lines_per_page
+        rows = [(f'row {i}', i) for i in range(lines_per_page * 2 + 1)] + [(TRICKY, 1)]
+        data = write_report(PDFWriter, rows)
+
+        self.assertTrue(data.startswith(b'%PDF-1.4'))
+        self.assertTrue(data.endswith(b'%%EOF\n'))
+        xref_position = int(data.rsplit(b'startxref\n', 1)[1].split(b'\n')[0])
+        xref = data[xref_position:].split(b'\n')
+        self.assertEqual(xref[0], b'xref')
+        size = int(xref[1].split()[1])
+        for object_id in range(1, size):
+            offset = int(xref[2 + object_id][:10])
+            self.assertTrue(data[offset:].startswith(b'%d 0 obj' % object_id), object_id)
+
+        self.assertEqual(len(re.findall(rb'/Type /Page ', data)), 3)
+        self.assertIn(b'/Count 3', data)
+        self.assertIn(b'\\(1/2\\)\\\\', data)
+
+
+@override_settings(AUDIT_LOG_SYNC=True, ACTIVITY_LOG_SYNC=True)
+class GeneratorTests(TestCase):
+    def setUp(self):
+        self.business = create_business()
+        self.business.timezone = 'Africa/Nairobi'
+        self.business.save()
+        tz = self.business.tzinfo
+        self.cashier = User.objects.create_user(
+            'jane', first_name='Jane', last_name='Doe', business=self.business)
+        self.tea = Product.objects.create(
+            business=self.business, name='Tea', sku='TEA', cost_price=4,
+            selling_price=10, stock_quantity=5)
+        cake = Product.objects.create(
+            business=self.business, name='Cake', sku='CAKE', cost_price=10,
+            selling_price=25, stock_quantity=0)
+
+        self.sales = [
+            self.sell(1, datetime(2025, 3, 1, 10, tzinfo=tz), self.tea, 2, 16,
+                      customer_name='Ann', customer_phone='0700'),
+            # 22:00 UTC on the 1st, but the 2nd in Nairobi.
+            self.sell(2, datetime(2025, 3, 2, 1, tzinfo=tz), cake, 1, 0,
+                      payment_method=Sale.PaymentMethod.MPESA),
+            self.sell(3, datetime(2025, 3, 2, 9, tzinfo=tz), self.tea, 1, 16,
+                      status=Sale.Status.REFUNDED, customer_phone='0700'),
+            self.sell(4, datetime(2025, 4, 1, 9, tzinfo=tz), self.tea, 1, 16),
+        ]
+        # Later cost changes leave the cost of goods already sold alone.
+        self.tea.cost_price = 6
+        self.tea.save()
+
+        self.period = (datetime(2025, 3, 1, tzinfo=tz), datetime(2025, 4, 1, tzinfo=tz))
+
+    def sell(self, number, created_at, product, quantity, tax_rate, **fields):
+        subtotal = product.selling_price * quantity
+        tax = subtotal * tax_rate / 100
+        sale = Sale.objects.create(
+            business=self.business, cashier=self.cashier,
+            transaction_id=f'T{number}', receipt_number=f'R{number}',
+            subtotal=subtotal, tax_amount=tax, total_amount=subtotal + tax,
+            amount_paid=subtotal + tax, **fields)
+        SaleItem.objects.create(sale=sale, product=product, quantity=quantity,
+                                unit_price=product.selling_price, tax_rate=tax_rate)
+        Sale.objects.filter(id=sale.id).update(created_at=created_at)
+        sale.refresh_from_db()
+        return sale
+
+    def generate(self, report_type):
+        report = Report(business=self.business, report_type=report_type, name='r')
+        columns, rows = GENERATORS[report_type](report, *self.period)
+        rows = [tuple(row) for row in rows]
+        for row in rows:
+            self.assertEqual(len(row), len(columns))
+        return rows
+
+    def test_sales_summary(self):
+        self.assertEqual(self.generate(Report.ReportType.SALES_SUMMARY), [
+            (date(2025, 3, 1), 1, Decimal('20.00'), Decimal('3.20'), Decimal('0.00'),
+             Decimal('23.20'), Decimal('23.20')),
+            (date(2025, 3, 2), 1, Decimal('25.00'), Decimal('0.00'), Decimal('0.00'),
+             Decimal('25.00'), Decimal('25.00')),
+        ])
+
+    def test_inventory(self):
+        self.assertEqual(
+            [(row[0], row[4], row[8]) for row in self.generate(Report.ReportType.INVENTORY)],
+            [('CAKE', 0, Decimal('0')), ('TEA', 5, Decimal('30'))])
+
+    def test_staff_performance(self):
+        self.assertEqual(self.generate(Report.ReportType.STAFF_PERFORMANCE), [
+            ('jane', 'Jane', 'Doe', 2, Decimal('48.20'), Decimal('24.10'),
+             Decimal('0.00'), self.sales[1].created_at),
+        ])
+
+    def test_customers(self):
+        self.assertEqual(self.generate(Report.ReportType.CUSTOMER), [
+            ('Ann', '0700', None, 1, Decimal('23.20'), Decimal('23.20'),
+             self.sales[0].created_at),
+        ])
+
+    def test_financial_uses_the_cost_when_sold(self):
+        self.assertEqual(self.generate(Report.ReportType.FINANCIAL), [
+            (date(2025, 3, 1), Decimal('20.00'), Decimal('0.00'), Decimal('20.00'),
+             Decimal('3.20'), Decimal('23.20'), Decimal('8.00'), Decimal('12.00')),
+            (date(2025, 3, 2), Decimal('25.00'), Decimal('0.00'), Decimal('25.00'),
+             Decimal('0.00'), Decimal('25.00'), Decimal('10.00'), Decimal('15.00')),
+        ])
+
+    def test_financial_falls_back_to_the_current_cost(self):
+        SaleItem.objects.filter(product=self.tea).update(unit_cost=None)
+        [first, _] = self.generate(Report.ReportType.FINANCIAL)
+        self.assertEqual(first[6:], (Decimal('12.00'), Decimal('8.00')))
+
+    def test_tax(self):
+        refresh_rollups([self.business.id])
+        rows = self.generate(Report.ReportType.TAX)
+        self.assertEqual(
+            [row[2:5] for row in rows],
+            [(Decimal('0.00'), 'All', 1), (Decimal('16.00'), 'All', 1),
+             ('All', 'MPESA', 1), ('All', 'CASH', 1), ('All', 'All', 2)])
+        self.assertEqual(rows[-1][:2], (date(2025, 3, 1), date(2025, 3, 31)))
+        self.assertEqual(rows[-1][8:], (Decimal('3.20'), Decimal('48.20')))
+
+
+@override_settings(AUDIT_LOG_SYNC=True, ACTIVITY_LOG_SYNC=True,
+                   AUDIT_LOG_RETENTION_DAYS={'DEMO': 30, 'PRO': 365},
+                   AUDIT_LOG_PLATFORM_RETENTION_DAYS=90)
+class RetentionTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        today = timezone.localdate()
+        self.pro = create_business('Pro')
+        self.demo = create_business('Demo')
+        self.unlicensed = create_business('Unlicensed')
+        for business, tier in ((self.pro, License.Tier.PRO), (self.demo, License.Tier.DEMO)):
+            License.objects.create(
+                business=business, license_key=f'KEY-{business.id}', tier=tier,
+                start_date=today, end_date=today + timedelta(days=30), monthly_price=10)
+        AuditLog.objects.all().delete()
+
+    def entry(self, business, days_old, object_id=''):
+        return AuditLog.objects.create(
+            business=business, action_type=AuditLog.ActionType.OTHER, model_name='test',
+            object_id=object_id, object_repr='', created_at=self.now - timedelta(days=days_old))
+
+    def remaining(self):
+        return sorted(AuditLog.objects.values_list('object_id', flat=True))
+
+    def test_each_scope_keeps_its_window(self):
+        for business, name in ((self.pro, 'pro'), (self.demo, 'demo'),
+                               (self.unlicensed, 'unlicensed'), (None, 'platform')):
+            for days in (20, 60, 100, 400):
+                self.entry(business, days, f'{name}-{days}')
+
+        deleted = prune_audit_logs(now=self.now)
+        self.assertEqual(deleted, {'DEMO': 6, 'PRO': 1, 'PLATFORM': 2})
+        self.assertEqual(self.remaining(), [
+            'demo-20', 'platform-20', 'platform-60',
+            'pro-100', 'pro-20', 'pro-60', 'unlicensed-20',
+        ])
+
+    def test_chunks_resume_after_ties(self):
+        created_at = self.now - timedelta(days=40)
+        AuditLog.objects.bulk_create([
+            AuditLog(business=self.demo, action_type=AuditLog.ActionType.OTHER,
+                     model_name='test', object_id=str(i), object_repr='',
+                     created_at=created_at)
+            for i in range(5)
+        ])
+        self.entry(self.demo, 10, 'recent')
+        self.assertEqual(prune_audit_logs(chunk_size=2, now=self.now)['DEMO'], 5)
+        self.assertEqual(self.remaining(), ['recent'])
+
+    def test_pruned_rows_are_archived_by_month(self):
+        old = self.entry(self.demo, 40, 'old')
+        self.entry(self.demo, 10, 'recent')
+        with tempfile.TemporaryDirectory() as archive_dir:
+            prune_audit_logs(archive_dir=archive_dir, now=self.now)
+            path = os.path.join(archive_dir, f"auditlog-{old.created_at:%Y-%m}.jsonl.gz")
+            with gzip.open(path, 'rt', encoding='utf-8') as archive:
+                rows = [json.loads(line) for line in archive]
+            self.assertEqual(os.listdir(archive_dir), [os.path.basename(path)])
+
+        self.assertEqual([(row['id'], row['object_id'], row['business_id']) for row in rows],
+                         [(old.id, 'old', self.demo.id)])
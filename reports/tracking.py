@@ -0,0 +1,187 @@
+# reports/tracking.py
+import copy
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import DEFERRED
+from django.db.models.expressions import Combinable
+
+from .audit import log_action
+from .models import AuditLog
+
+
+# Primary keys updated per statement by tracked_update().
+UPDATE_CHUNK_SIZE = 1000
+
+_encoder = DjangoJSONEncoder()
+
+
+def _copy(value):
+    # JSONField values are mutated in place, so the snapshot must not
+    # share them with the instance.
+    if isinstance(value, (dict, list)):
+        return copy.deepcopy(value)
+    return value
+
+
+def _jsonable(value):
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, list):
+        return [_jsonable(item) for item in value]
+    if isinstance(value, dict):
+        return {str(key): _jsonable(item) for key, item in value.items()}
+    try:
+        return _encoder.default(value)
+    except TypeError:
+        return str(value)
+
+
+class AuditTrackedMixin:
+    """Record field-level changes in AuditLog on save and delete.
+
+    Field values are snapshotted when a row is loaded from the database,
+    so computing what changed at save time needs no extra query. Fields
+    in `audit_exclude` are ignored and fields in `audit_mask` are
+    recorded as changed without their values.
+    """
+
+    audit_exclude = ('updated_at',)
+    audit_mask = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            name: _copy(value) for name, value in zip(field_names, values)
+            if value is not DEFERRED
+        }
+        return instance
+
+    def _snapshot(self, names=None):
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None or names is None:
+            self._loaded_values = loaded = {}
+        for field in self._meta.concrete_fields:
+            if names is not None and field.attname not in names:
+                continue
+            if field.attname in self.__dict__:
+                loaded[field.attname] = _copy(self.__dict__[field.attname])
+
+    def get_audit_changes(self, update_fields=None):
+        """Return {field: [old, new]} for fields changed since loading."""
+        loaded = getattr(self, '_loaded_values', None)
+        changes = {}
+
+        for field in self._meta.concrete_fields:
+            name = field.attname
+            if name in self.audit_exclude or field.name in self.audit_exclude:
+                continue
+            if update_fields is not None and field.name not in update_fields \
+                    and name not in update_fields:
+                continue
+            # Deferred fields were neither loaded nor assigned.
+            if name not in self.__dict__:
+                continue
+
+            new = self.__dict__[name]
+            if loaded is None:
+                old = None
+            else:
+                if name not in loaded:
+                    continue
+                old = loaded[name]
+                try:
+                    if field.to_python(new) == old:
+                        continue
+                except Exception:
+                    if new == old:
+                        continue
+
+            if field.name in self.audit_mask or name in self.audit_mask:
+                changes[field.name] = ['***', '***']
+            elif loaded is None and new is None:
+                continue
+            else:
+                changes[field.name] = [_jsonable(old), _jsonable(new)]
+
+        return changes
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        update_fields = kwargs.get('update_fields')
+        changes = self.get_audit_changes(update_fields)
+
+        super().save(*args, **kwargs)
+
+        if adding or changes:
+            log_action(
+                AuditLog.ActionType.CREATE if adding else AuditLog.ActionType.UPDATE,
+                self,
+                changes=changes
+            )
+        self._snapshot(update_fields and {
+            self._meta.get_field(name).attname for name in update_fields})
+
+    def delete(self, *args, **kwargs):
+        object_id, object_repr = str(self.pk), str(self)
+        result = super().delete(*args, **kwargs)
+        log_action(
+            AuditLog.ActionType.DELETE,
+            self,
+            object_id=object_id,
+            object_repr=object_repr
+        )
+        return result
+
+
+def tracked_update(queryset, **values):
+    """QuerySet.update() that records one AuditLog entry per changed row.
+
+    The old values of the updated fields are read in the same query that
+    collects the primary keys, so the audit costs one query for the
+    whole set rather than one per row. Returns the number of rows updated.
+    """
+    model = queryset.model
+    attnames = [model._meta.get_field(name).attname for name in values]
+    has_business = any(
+        field.attname == 'business_id' for field in model._meta.concrete_fields)
+    columns = ['pk', *attnames] + (['business_id'] if has_business else [])
+
+    updated = 0
+    with transaction.atomic():
+        rows = list(queryset.select_for_update().values(*columns))
+        pks = [row['pk'] for row in rows]
+        for i in range(0, len(pks), UPDATE_CHUNK_SIZE):
+            updated += model._default_manager.filter(
+                pk__in=pks[i:i + UPDATE_CHUNK_SIZE]).update(**values)
+
+        excluded = getattr(model, 'audit_exclude', ())
+        masked = getattr(model, 'audit_mask', ())
+        is_business = model._meta.label == 'businesses.Business'
+        for row in rows:
+            changes = {}
+            for name, attname in zip(values, attnames):
+                if name in excluded:
+                    continue
+                new = values[name]
+                if isinstance(new, Combinable):
+                    new = str(new)
+                elif row[attname] == new:
+                    continue
+                if name in masked:
+                    changes[name] = ['***', '***']
+                else:
+                    changes[name] = [_jsonable(row[attname]), _jsonable(new)]
+
+            if changes:
+                log_action(
+                    AuditLog.ActionType.UPDATE,
+                    model_name=model._meta.label,
+                    object_id=str(row['pk']),
+                    object_repr=f"{model._meta.verbose_name} #{row['pk']}",
+                    changes=changes,
+                    business_id=row['pk'] if is_business else row.get('business_id')
+                )
+
+    return updated
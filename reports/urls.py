@@ -1,6 +1,8 @@
 # reports/urls.py
 from django.urls import path
+from . import views
 
 urlpatterns = [
-    # Will add views later
+    path('api/generate/', views.generate_report_view, name='generate_report_api'),
+    path('api/<int:report_id>/', views.report_status_view, name='report_status_api'),
 ]
@@ -1,3 +1,80 @@
-from django.shortcuts import render
+# reports/views.py
+import json
 
-# Create your views here.
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from licenses.features import REPORTS, require_feature
+from .caching import get_or_queue_report
+from .models import Report
+from .tax import PERIODS
+
+
+def _report_data(report):
+    return {
+        'id': report.id,
+        'name': report.name,
+        'report_type': report.report_type,
+        'file_format': report.file_format,
+        'status': 'ready' if report.file else 'queued',
+        'download_url': report.download_url,
+    }
+
+
+@csrf_exempt
+@require_POST
+@login_required
+@require_feature(REPORTS)
+def generate_report_view(request):
+    """API endpoint to request a report, reusing identical earlier output."""
+    business = request.user.business
+    if not business:
+        return JsonResponse({'success': False, 'message': 'No business assigned to your account'}, status=403)
+
+    try:
+        data = json.loads(request.body)
+        report_type = data.get('report_type')
+        file_format = data.get('file_format', 'PDF')
+
+        if report_type not in Report.ReportType.values:
+            return JsonResponse({'success': False, 'message': 'Invalid report type'}, status=400)
+        if file_format not in dict(Report._meta.get_field('file_format').choices):
+            return JsonResponse({'success': False, 'message': 'Invalid file format'}, status=400)
+        parameters = data.get('parameters') or {}
+        if not isinstance(parameters, dict):
+            return JsonResponse({'success': False, 'message': 'Invalid parameters'}, status=400)
+        if report_type == Report.ReportType.TAX and parameters.get('period', 'month') not in PERIODS:
+            return JsonResponse({
+                'success': False,
+                'message': f"Invalid period, expected one of: {', '.join(PERIODS)}"
+            }, status=400)
+
+        report, created = get_or_queue_report(
+            business,
+            report_type,
+            parameters=parameters,
+            file_format=file_format,
+            name=data.get('name'),
+            generated_by=request.user
+        )
+
+        return JsonResponse({
+            'success': True,
+            'cached': not created,
+            'report': _report_data(report)
+        }, status=202 if not report.file else 200)
+    except Exception as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
+
+
+@login_required
+@require_feature(REPORTS)
+def report_status_view(request, report_id):
+    """API endpoint to poll a requested report."""
+    try:
+        report = Report.objects.get(id=report_id, business=request.user.business)
+        return JsonResponse({'success': True, 'report': _report_data(report)})
+    except Report.DoesNotExist:
+        return JsonResponse({'success': False, 'message': 'Report not found'}, status=404)
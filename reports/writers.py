@@ -0,0 +1,269 @@
+# reports/writers.py
+# Streaming file writers for generated reports. Rows are written to a
+# binary file object one at a time, so memory doesn't grow with size.
+import csv
+import io
+import re
+import zipfile
+from datetime import date, datetime
+from decimal import Decimal
+from xml.sax.saxutils import escape as xml_escape
+
+from django.utils.html import escape as html_escape
+
+
+def display_value(value):
+    """Format a cell value as text."""
+    if value is None:
+        return ''
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+class CSVWriter:
+    extension = 'csv'
+
+    def __init__(self, fileobj, title, columns):
+        self.stream = io.TextIOWrapper(fileobj, encoding='utf-8', newline='')
+        self.writer = csv.writer(self.stream)
+        self.writer.writerow(columns)
+
+    def write_row(self, values):
+        self.writer.writerow([display_value(value) for value in values])
+
+    def close(self):
+        self.stream.flush()
+        self.stream.detach()
+
+
+class HTMLWriter:
+    extension = 'html'
+
+    def __init__(self, fileobj, title, columns):
+        self.fileobj = fileobj
+        self._write(
+            '<!DOCTYPE html>\n<html><head><meta charset="utf-8">'
+            f'<title>{html_escape(title)}</title></head><body>'
+            f'<h1>{html_escape(title)}</h1><table border="1"><thead><tr>'
+            + ''.join(f'<th>{html_escape(column)}</th>' for column in columns)
+            + '</tr></thead><tbody>\n'
+        )
+
+    def _write(self, text):
+        self.fileobj.write(text.encode('utf-8'))
+
+    def write_row(self, values):
+        self._write(
+            '<tr>'
+            + ''.join(f'<td>{html_escape(display_value(value))}</td>' for value in values)
+            + '</tr>\n'
+        )
+
+    def close(self):
+        self._write('</tbody></table></body></html>\n')
+
+
+class ExcelWriter:
+    """Minimal single-sheet XLSX writer.
+
+    The worksheet part is streamed into the zip archive row by row, so
+    large reports never sit in memory the way they would with a DOM
+    based spreadsheet library.
+    """
+    extension = 'xlsx'
+
+    CONTENT_TYPES = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    )
+    ROOT_RELS = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    )
+    WORKBOOK_RELS = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    )
+    INVALID_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+    INVALID_SHEET_CHARS = re.compile(r'[\[\]:*?/\\]')
+
+    def __init__(self, fileobj, title, columns):
+        self.archive = zipfile.ZipFile(fileobj, 'w', zipfile.ZIP_DEFLATED)
+        sheet_name = self.INVALID_SHEET_CHARS.sub(' ', title)[:31] or 'Report'
+
+        self.archive.writestr('[Content_Types].xml', self.CONTENT_TYPES)
+        self.archive.writestr('_rels/.rels', self.ROOT_RELS)
+        self.archive.writestr(
+            'xl/workbook.xml',
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            f'<sheets><sheet name="{self._escape(sheet_name)}" sheetId="1" r:id="rId1"/></sheets>'
+            '</workbook>'
+        )
+        self.archive.writestr('xl/_rels/workbook.xml.rels', self.WORKBOOK_RELS)
+
+        self.sheet = self.archive.open(
+            'xl/worksheets/sheet1.xml', 'w', force_zip64=True)
+        self.sheet.write(
+            b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+            b'<sheetData>'
+        )
+        self.write_row(columns)
+
+    def _escape(self, text):
+        return xml_escape(self.INVALID_XML_CHARS.sub('', text), {'"': '&quot;'})
+
+    def _cell(self, value):
+        if value is None:
+            return '<c/>'
+        if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+            return f'<c><v>{value}</v></c>'
+        return f'<c t="inlineStr"><is><t>{self._escape(display_value(value))}</t></is></c>'
+
+    def write_row(self, values):
+        row = '<row>' + ''.join(self._cell(value) for value in values) + '</row>'
+        self.sheet.write(row.encode('utf-8'))
+
+    def close(self):
+        self.sheet.write(b'</sheetData></worksheet>')
+        self.sheet.close()
+        self.archive.close()
+
+
+class PDFWriter:
+    """Minimal text PDF writer.
+
+    Rows are laid out in a monospaced font and each page is written as
+    soon as it fills up; only object offsets are kept until the end.
+    """
+    extension = 'pdf'
+
+    PAGE_WIDTH = 842  # A4 landscape, in points
+    PAGE_HEIGHT = 595
+    MARGIN = 36
+    FONT_SIZE = 8
+    LEADING = 10
+    LINE_CHARS = 160
+    MAX_COLUMN_CHARS = 30
+
+    # Object ids 1-3 are reserved for the catalog, page tree and font.
+    CATALOG_ID, PAGES_ID, FONT_ID = 1, 2, 3
+
+    def __init__(self, fileobj, title, columns):
+        self.fileobj = fileobj
+        self.position = 0
+        self.offsets = {}
+        self.page_ids = []
+        self.next_id = 4
+
+        self.width = max(
+            4, min(self.MAX_COLUMN_CHARS, self.LINE_CHARS // max(len(columns), 1)))
+        self.header = self._format_line(columns)
+        self.lines = [title, '']
+        self.lines_per_page = (
+            self.PAGE_HEIGHT - 2 * self.MARGIN) // self.LEADING - 2
+
+        self._write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+        self._write_object(
+            self.FONT_ID, b'<< /Type /Font /Subtype /Type1 /BaseFont /Courier >>')
+
+    def _write(self, data):
+        self.fileobj.write(data)
+        self.position += len(data)
+
+    def _write_object(self, object_id, body):
+        self.offsets[object_id] = self.position
+        self._write(b'%d 0 obj\n' % object_id + body + b'\nendobj\n')
+
+    def _allocate_id(self):
+        object_id = self.next_id
+        self.next_id += 1
+        return object_id
+
+    def _format_line(self, values):
+        cells = []
+        for value in values:
+            text = display_value(value)
+            if len(text) >= self.width:
+                text = text[:self.width - 2] + '~'
+            cells.append(text.ljust(self.width))
+        return ''.join(cells).rstrip()
+
+    def _pdf_string(self, text):
+        text = text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+        return b'(' + text.encode('latin-1', errors='replace') + b')'
+
+    def _flush_page(self):
+        top = self.PAGE_HEIGHT - self.MARGIN
+        content = [
+            b'BT /F1 %d Tf %d TL %d %d Td' % (
+                self.FONT_SIZE, self.LEADING, self.MARGIN, top)
+        ]
+        for line in [self.header, ''] + self.lines:
+            content.append(self._pdf_string(line) + b" '")
+        content.append(b'ET')
+        stream = b'\n'.join(content)
+
+        content_id = self._allocate_id()
+        self._write_object(
+            content_id,
+            b'<< /Length %d >>\nstream\n' % len(stream) + stream + b'\nendstream'
+        )
+
+        page_id = self._allocate_id()
+        self._write_object(
+            page_id,
+            b'<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] '
+            b'/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>' % (
+                self.PAGES_ID, self.PAGE_WIDTH, self.PAGE_HEIGHT,
+                self.FONT_ID, content_id)
+        )
+        self.page_ids.append(page_id)
+        self.lines = []
+
+    def write_row(self, values):
+        self.lines.append(self._format_line(values))
+        if len(self.lines) >= self.lines_per_page:
+            self._flush_page()
+
+    def close(self):
+        if self.lines or not self.page_ids:
+            self._flush_page()
+
+        kids = b' '.join(b'%d 0 R' % page_id for page_id in self.page_ids)
+        self._write_object(
+            self.PAGES_ID,
+            b'<< /Type /Pages /Kids [' + kids + b'] /Count %d >>' % len(self.page_ids)
+        )
+        self._write_object(
+            self.CATALOG_ID, b'<< /Type /Catalog /Pages %d 0 R >>' % self.PAGES_ID)
+
+        xref_position = self.position
+        xref = [b'xref\n0 %d\n' % self.next_id, b'0000000000 65535 f \n']
+        for object_id in range(1, self.next_id):
+            xref.append(b'%010d 00000 n \n' % self.offsets[object_id])
+        self._write(b''.join(xref))
+        self._write(
+            b'trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (
+                self.next_id, self.CATALOG_ID, xref_position)
+        )
+
+
+WRITERS = {
+    'CSV': CSVWriter,
+    'HTML': HTMLWriter,
+    'EXCEL': ExcelWriter,
+    'PDF': PDFWriter,
+}
@@ -3,6 +3,20 @@ ASGI config for saas_pos project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve it with an ASGI server, e.g. ``uvicorn saas_pos.asgi:application``,
+for the notification stream (accounts.views.notification_stream_view):
+idle streams are held as suspended coroutines on the worker's event
+loop.
+
+Notification events are published in-process (superadmin/events.py).
+A stream only receives them instantly from the worker serving it. With
+several workers or servers, and for notifications published by the
+process_notifications command, they arrive instead as an updated unread
+count at the stream's next heartbeat, up to HEARTBEAT_INTERVAL seconds
+later; without a shared cache (REDIS_URL), up to LOCAL_CACHE_TIMEOUT
+(saas_pos/cache.py) later still. Run a single ASGI worker if
+notifications must arrive instantly.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
 """
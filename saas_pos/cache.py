@@ -0,0 +1,80 @@
+# saas_pos/cache.py
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.checks import Error, Tags, register
+
+
+# Backends that keep entries in one process: a delete or generation bump
+# made by one worker never reaches the others.
+PROCESS_LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+# On such a cache, entries kept current by invalidation expire after at
+# most this many seconds, which bounds how stale other workers get.
+LOCAL_CACHE_TIMEOUT = 30
+
+
+def cache_is_shared():
+    return settings.CACHES['default']['BACKEND'] not in PROCESS_LOCAL_BACKENDS
+
+
+def invalidated_timeout(timeout):
+    """Timeout for an entry that is kept current by invalidation.
+
+    Unchanged on a shared cache; capped at LOCAL_CACHE_TIMEOUT on a
+    per-process one, where invalidations stay in the worker making them.
+    """
+    if cache_is_shared():
+        return timeout
+    if timeout is None:
+        return LOCAL_CACHE_TIMEOUT
+    return min(timeout, LOCAL_CACHE_TIMEOUT)
+
+
+def _new_generation():
+    # Never reuses a value, even if the previous counter was evicted.
+    return time.time_ns()
+
+
+def bump_generation(key):
+    """Advance a generation counter, invalidating what was cached under it."""
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _new_generation(), None)
+
+
+def bump_generations(keys):
+    """Advance many generation counters in one cache round trip."""
+    generation = _new_generation()
+    cache.set_many(dict.fromkeys(keys, generation), None)
+
+
+def generations(keys):
+    """Current values of generation counters, creating missing ones.
+
+    Read them before loading the data cached under them, so a write
+    during the load leaves the entry stale rather than current.
+    """
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, _new_generation(), None)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    if cache_is_shared():
+        return []
+    return [Error(
+        'The default cache is per process, so cache invalidations do not '
+        'reach other workers.',
+        hint='Set REDIS_URL to use a shared cache.',
+        id='saas_pos.E001',
+    )]
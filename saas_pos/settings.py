@@ -62,6 +62,9 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'accounts.middleware.SessionRefreshMiddleware',
+    'accounts.middleware.BusinessContextMiddleware',
+    'reports.middleware.AuditMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -112,6 +115,27 @@ DATABASES = {
 # }
 
 
+# Cache
+# Per-process memory by default; set REDIS_URL to share the cache
+# between workers (requires the redis package). Without it, cached
+# entries that rely on invalidation are kept for at most 30 seconds
+# (saas_pos.cache), and `check --deploy` fails.
+
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -164,14 +188,78 @@ CRISPY_TEMPLATE_PACK = "bootstrap5"
 # Custom user model
 AUTH_USER_MODEL = 'accounts.User'
 
+# Session users are loaded with their business and license and cached
+# per process for this many seconds (see accounts/backends.py).
+AUTHENTICATION_BACKENDS = ['accounts.backends.CachedModelBackend']
+AUTH_CONTEXT_CACHE_TTL = 30
+
+# License tokens (see licenses/tokens.py) are Ed25519-signed with the
+# first (key id, private key) pair of LICENSE_SIGNING_KEYS. Tokens are
+# accepted from those keys and the (key id, public key) pairs of
+# LICENSE_VERIFY_KEYS, which is all terminals are given. Set each as
+# "id:key,id:key", newest first, to rotate keys; create keys with
+# `manage.py generate_license_signing_key`. No tokens are issued unless
+# signing keys are set.
+def _key_pairs(name):
+    return [
+        tuple(pair.split(':', 1))
+        for pair in os.getenv(name, '').split(',') if ':' in pair
+    ]
+
+
+LICENSE_SIGNING_KEYS = _key_pairs('LICENSE_SIGNING_KEYS')
+LICENSE_VERIFY_KEYS = _key_pairs('LICENSE_VERIFY_KEYS')
+# Tokens expire this many days after issue at most, so a revoked license
+# stops working offline within that time.
+LICENSE_TOKEN_MAX_AGE_DAYS = int(os.getenv('LICENSE_TOKEN_MAX_AGE_DAYS', 7))
+
 # Login/Logout URLs
 LOGIN_URL = '/accounts/login/'
 LOGIN_REDIRECT_URL = '/dashboard/'
 LOGOUT_REDIRECT_URL = '/accounts/login/'
 
 # Session settings
+# With a shared cache, sessions are read from it and written through to
+# the database; a per-process cache would serve stale sessions (e.g. after
+# logout) from other workers, so without one they are read from the database.
+if os.getenv('REDIS_URL'):
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+else:
+    SESSION_ENGINE = 'django.contrib.sessions.backends.db'
 SESSION_COOKIE_AGE = 86400  # 24 hours in seconds
-SESSION_SAVE_EVERY_REQUEST = True
+SESSION_SAVE_EVERY_REQUEST = False
+# Active sessions are extended once less than this many seconds remain
+# (see accounts/middleware.py), rather than saved on every request.
+SESSION_REFRESH_THRESHOLD = SESSION_COOKIE_AGE // 2
+
+# Scheduled reports (run by `manage.py run_scheduled_reports`)
+REPORT_SCHEDULER_WORKERS = int(os.getenv('REPORT_SCHEDULER_WORKERS', 2))
+REPORT_SCHEDULER_BATCH_SIZE = int(os.getenv('REPORT_SCHEDULER_BATCH_SIZE', 20))
+
+# Audit log batching (see reports/audit.py)
+AUDIT_LOG_BATCH_SIZE = 200
+AUDIT_LOG_FLUSH_INTERVAL = 5  # seconds
+AUDIT_LOG_SPOOL_DIR = os.getenv('AUDIT_LOG_SPOOL_DIR', BASE_DIR / 'spool')
+AUDIT_LOG_SYNC = False  # write every entry immediately, e.g. in tests
+
+# SystemActivity batching, same behavior as the audit log
+ACTIVITY_LOG_BATCH_SIZE = 200
+ACTIVITY_LOG_FLUSH_INTERVAL = 5  # seconds
+ACTIVITY_LOG_SPOOL_DIR = AUDIT_LOG_SPOOL_DIR
+ACTIVITY_LOG_SYNC = False
+
+# Audit log retention in days, by license tier (`manage.py prune_audit_logs`)
+AUDIT_LOG_RETENTION_DAYS = {
+    'DEMO': 30,
+    'BASIC': 90,
+    'PRO': 365,
+    'ENTERPRISE': 730,
+}
+AUDIT_LOG_PLATFORM_RETENTION_DAYS = 365  # entries not tied to a business
+AUDIT_LOG_ARCHIVE_DIR = os.getenv('AUDIT_LOG_ARCHIVE_DIR')
+
+# Notifications
+NOTIFICATION_RETENTION_DAYS = 90  # inactive notifications kept this long
 
 # Messages framework
 MESSAGE_TAGS = {
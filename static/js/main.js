@@ -17,6 +17,9 @@ document.addEventListener('DOMContentLoaded', function() {
     
     // Initialize counters animation
     initCounters();
+    
+    // Initialize live notifications
+    initNotificationStream();
 });
 
 function initBootstrapComponents() {
@@ -447,4 +450,56 @@ function confirmDialog(message, callback) {
     modal.addEventListener('hidden.bs.modal', function() {
         document.body.removeChild(modal);
     });
-}
\ No newline at end of file
+}
+function initNotificationStream() {
+    const url = document.body.dataset.notificationStream;
+    if (!url || !window.EventSource) return;
+    
+    let unreadCount = 0;
+    const source = new EventSource(url);
+    
+    source.addEventListener('unread', function(e) {
+        unreadCount = JSON.parse(e.data).unread_count;
+        updateNotificationBadges(unreadCount);
+    });
+    
+    source.addEventListener('notification', function(e) {
+        const notification = JSON.parse(e.data);
+        unreadCount += 1;
+        updateNotificationBadges(unreadCount);
+        
+        document.querySelectorAll('.notification-dropdown .notification-list').forEach(function(list) {
+            const item = document.createElement('a');
+            item.className = 'dropdown-item notification-item unread';
+            item.href = notification.action_url || '#';
+            item.dataset.id = notification.id;
+            item.innerHTML = `
+                <div class="d-flex w-100 justify-content-between">
+                    <strong class="mb-1"></strong>
+                    <small>just now</small>
+                </div>
+                <p class="mb-0 text-muted"></p>
+            `;
+            item.querySelector('strong').textContent = notification.title;
+            item.querySelector('p').textContent = notification.message;
+            list.prepend(item);
+        });
+    });
+}
+
+function updateNotificationBadges(count) {
+    document.querySelectorAll('.nav-link .fa-bell, .dropdown-toggle .fa-bell').forEach(function(icon) {
+        const parent = icon.parentElement;
+        let badge = parent.querySelector('.badge');
+        if (count <= 0) {
+            if (badge) badge.remove();
+            return;
+        }
+        if (!badge) {
+            badge = document.createElement('span');
+            badge.className = 'badge bg-danger';
+            parent.appendChild(badge);
+        }
+        badge.textContent = count;
+    });
+}
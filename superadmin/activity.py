@@ -0,0 +1,27 @@
+# superadmin/activity.py
+from reports.audit import BufferedWriter
+
+from .models import SystemActivity
+
+
+activity_writer = BufferedWriter(SystemActivity, 'ACTIVITY_LOG')
+
+RELATED_FIELDS = ('business', 'user', 'performed_by')
+
+
+def log_activity(activity_type, description, **fields):
+    """Record a SystemActivity entry through the batched writer.
+
+    Takes the same fields as SystemActivity; related objects may be
+    passed as instances and are stored by primary key.
+    """
+    for name in RELATED_FIELDS:
+        if name in fields:
+            obj = fields.pop(name)
+            fields[f'{name}_id'] = obj.pk if obj is not None else None
+
+    activity_writer.log(
+        activity_type=activity_type,
+        description=description,
+        **fields
+    )
@@ -0,0 +1,207 @@
+# superadmin/analytics.py
+from datetime import datetime, time, timedelta
+
+from dateutil.relativedelta import relativedelta
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from accounts.models import User
+from businesses.models import Business
+from licenses.models import License
+from reports.models import DailySalesRollup, MonthlySalesRollup
+from .stats import count_stats
+
+
+ANALYTICS_KEY = 'superadmin:analytics'
+ANALYTICS_TIMEOUT = 5 * 60
+
+PERIOD_DAYS = 30
+REVENUE_CHART_DAYS = 7
+USER_GROWTH_MONTHS = 6
+TOP_BUSINESSES = 10
+
+# Revenue series up to this many days have a point per day, longer ones
+# a point per month. Periods are capped at MAX_REVENUE_DAYS.
+DAILY_SERIES_DAYS = 90
+MAX_REVENUE_DAYS = 5 * 366
+REVENUE_SERIES_KEY = 'superadmin:analytics:revenue:%s:%s'
+REVENUE_SERIES_TIMEOUT = 60
+
+
+def _growth(current, previous):
+    if not previous:
+        return 0
+    return round((float(current) - float(previous)) / float(previous) * 100, 1)
+
+
+def _revenue_by_day(today):
+    start = today - timedelta(days=REVENUE_CHART_DAYS - 1)
+    totals = dict(DailySalesRollup.objects.filter(
+        date__gte=start, date__lte=today
+    ).values('date').annotate(
+        revenue=Sum('total_amount')
+    ).order_by().values_list('date', 'revenue'))
+
+    return [
+        {'date': day, 'revenue': float(totals.get(day) or 0)}
+        for day in (start + timedelta(days=i) for i in range(REVENUE_CHART_DAYS))
+    ]
+
+
+def _top_businesses(period_start):
+    """Top businesses by revenue with growth over the previous period.
+
+    Both periods are summed by the same grouped query over the rollups.
+    """
+    current = Q(date__gte=period_start)
+    rows = DailySalesRollup.objects.filter(
+        date__gte=period_start - timedelta(days=PERIOD_DAYS)
+    ).values(
+        'business_id', 'business__name', 'business__license__tier'
+    ).annotate(
+        revenue=Sum('total_amount', filter=current),
+        sale_count=Sum('sale_count', filter=current),
+        previous_revenue=Sum('total_amount', filter=~current)
+    ).filter(revenue__gt=0).order_by('-revenue')[:TOP_BUSINESSES]
+
+    return [
+        {
+            'id': row['business_id'],
+            'name': row['business__name'],
+            'license_tier': row['business__license__tier'],
+            'revenue': float(row['revenue']),
+            'sale_count': row['sale_count'],
+            'growth': _growth(row['revenue'], row['previous_revenue']),
+        }
+        for row in rows
+    ]
+
+
+def _user_growth(today):
+    first_month = today.replace(day=1) - relativedelta(months=USER_GROWTH_MONTHS - 1)
+    counts = {
+        row['month'].date(): row['count']
+        for row in User.objects.filter(
+            date_joined__gte=datetime.combine(
+                first_month, time.min, tzinfo=timezone.get_current_timezone())
+        ).annotate(
+            month=TruncMonth('date_joined')
+        ).values('month').annotate(count=Count('id')).order_by()
+    }
+
+    months = (first_month + relativedelta(months=i) for i in range(USER_GROWTH_MONTHS))
+    return [
+        {'month': month.strftime('%b'), 'count': counts.get(month, 0)}
+        for month in months
+    ]
+
+
+def compute_analytics():
+    """Compute the super admin analytics page from the sales rollups.
+
+    Sales figures are read from DailySalesRollup, as last refreshed by
+    the scheduled build_rollups command, and user, business and license
+    counters are each gathered with one conditional aggregation.
+    """
+    now = timezone.now()
+    today = timezone.localdate()
+    period_start = today - timedelta(days=PERIOD_DAYS)
+    since = now - timedelta(days=PERIOD_DAYS)
+
+    sales = DailySalesRollup.objects.filter(date__gte=period_start).aggregate(
+        total_sales=Sum('sale_count'),
+        total_revenue=Sum('total_amount')
+    )
+    users = count_stats(User.objects.all(), {
+        'new_users': Q(date_joined__gte=since),
+        'active_users': Q(last_login__gte=since),
+    })
+    businesses = count_stats(Business.objects.all(), {
+        'new_businesses': Q(created_at__gte=since),
+        'previous_businesses': Q(
+            created_at__gte=since - timedelta(days=2 * PERIOD_DAYS),
+            created_at__lt=since),
+    })
+    stats = {
+        'total_sales': sales['total_sales'] or 0,
+        'total_revenue': sales['total_revenue'] or 0,
+        'new_users': users['new_users'],
+        'new_businesses': businesses['new_businesses'],
+    }
+
+    return {
+        'revenue_data': _revenue_by_day(today),
+        'top_businesses': _top_businesses(period_start),
+        'user_growth_data': _user_growth(today),
+        'license_distribution': list(License.objects.values('tier').annotate(
+            count=Count('id')
+        ).order_by('tier')),
+        'stats': stats,
+        'active_users_count': users['active_users'],
+        'business_growth_percentage': _growth(
+            businesses['new_businesses'], businesses['previous_businesses']),
+        'expiring_count': License.objects.filter(
+            is_active=True,
+            end_date__gte=today,
+            end_date__lte=today + timedelta(days=30)
+        ).count(),
+        'total_revenue_k': round(float(stats['total_revenue']) / 1000, 1),
+    }
+
+
+def analytics_snapshot():
+    """The cached analytics page context, recomputed when missing."""
+    snapshot = cache.get(ANALYTICS_KEY)
+    if snapshot is None:
+        snapshot = compute_analytics()
+        cache.set(ANALYTICS_KEY, snapshot, ANALYTICS_TIMEOUT)
+    return snapshot
+
+
+def revenue_series(days):
+    """Revenue chart points for the last `days` days, gaps filled with 0.
+
+    Short periods are read from the daily rollups and long ones from the
+    monthly rollups, so no period reads more than a few hundred rows per
+    business. Cached for a minute per period and date.
+    """
+    days = max(1, min(days, MAX_REVENUE_DAYS))
+    today = timezone.localdate()
+    key = REVENUE_SERIES_KEY % (days, today.isoformat())
+
+    series = cache.get(key)
+    if series is not None:
+        return series
+
+    start = today - timedelta(days=days - 1)
+
+    if days <= DAILY_SERIES_DAYS:
+        totals = dict(DailySalesRollup.objects.filter(
+            date__gte=start, date__lte=today
+        ).values('date').annotate(
+            revenue=Sum('total_amount')
+        ).order_by().values_list('date', 'revenue'))
+        points = [start + timedelta(days=i) for i in range(days)]
+        label_format = '%b %d'
+        granularity = 'day'
+    else:
+        start = start.replace(day=1)
+        totals = dict(MonthlySalesRollup.objects.filter(
+            month__gte=start, month__lte=today
+        ).values('month').annotate(
+            revenue=Sum('total_amount')
+        ).order_by().values_list('month', 'revenue'))
+        months = (today.year - start.year) * 12 + today.month - start.month + 1
+        points = [start + relativedelta(months=i) for i in range(months)]
+        label_format = '%b %Y'
+        granularity = 'month'
+
+    series = {
+        'granularity': granularity,
+        'labels': [point.strftime(label_format) for point in points],
+        'values': [float(totals.get(point) or 0) for point in points],
+    }
+    cache.set(key, series, REVENUE_SERIES_TIMEOUT)
+    return series
@@ -6,3 +6,7 @@ class SuperadminConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'superadmin'
     verbose_name = 'Super Admin'
+
+    def ready(self):
+        from saas_pos import cache  # noqa: F401
+        from . import signals  # noqa: F401
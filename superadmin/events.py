@@ -0,0 +1,130 @@
+# superadmin/events.py
+import asyncio
+import json
+import threading
+from collections import defaultdict
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+
+# Seconds between comments sent on an idle stream, so proxies keep the
+# connection open.
+HEARTBEAT_INTERVAL = 15
+
+# Milliseconds browsers wait before reconnecting a dropped stream.
+RETRY_MS = 3000
+
+# Events kept per connection before the oldest are dropped; a client
+# that falls this far behind reloads its counters on reconnect anyway.
+QUEUE_SIZE = 100
+
+
+class NotificationBroker:
+    """In-process publish/subscribe of notification events per user.
+
+    Subscribers are asyncio queues owned by the event loop serving the
+    stream; publishers may run in any thread and hand events over with
+    call_soon_threadsafe(). Only streams served by this process receive
+    events published in it; see saas_pos/asgi.py for running several.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(dict)
+
+    def subscribe(self, user_id):
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        with self._lock:
+            self._subscribers[user_id][queue] = asyncio.get_running_loop()
+        return queue
+
+    def unsubscribe(self, user_id, queue):
+        with self._lock:
+            queues = self._subscribers.get(user_id)
+            if queues is not None:
+                queues.pop(queue, None)
+                if not queues:
+                    del self._subscribers[user_id]
+
+    @property
+    def connections(self):
+        with self._lock:
+            return sum(len(queues) for queues in self._subscribers.values())
+
+    def publish(self, event, user_ids=None):
+        """Send an event to the given users, or to everyone connected."""
+        with self._lock:
+            if user_ids is None:
+                targets = [
+                    item for queues in self._subscribers.values()
+                    for item in queues.items()
+                ]
+            else:
+                targets = [
+                    item for user_id in user_ids
+                    for item in self._subscribers.get(user_id, {}).items()
+                ]
+
+        for queue, loop in targets:
+            try:
+                loop.call_soon_threadsafe(_put, queue, event)
+            except RuntimeError:
+                # The serving loop has shut down.
+                pass
+
+
+def _put(queue, event):
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(event)
+
+
+broker = NotificationBroker()
+
+
+def notification_event(notification):
+    """Serialize a notification as a server-sent event."""
+    data = {
+        'id': notification.id,
+        'title': notification.title,
+        'message': notification.message,
+        'notification_type': notification.notification_type,
+        'icon': notification.get_icon,
+        'color': notification.get_color,
+        'action_url': notification.action_url,
+        'created_at': notification.created_at,
+    }
+    return (f'id: {notification.id}\nevent: notification\n'
+            f'data: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n')
+
+
+def publish_notification(notification, user_ids=None):
+    """Push a new notification to its recipients' open streams."""
+    broker.publish(notification_event(notification), user_ids)
+
+
+def unread_event(unread_count):
+    return (f'retry: {RETRY_MS}\nevent: unread\n'
+            f'data: {json.dumps({"unread_count": unread_count})}\n\n')
+
+
+async def event_stream(user_id, *initial_events, resync=None):
+    """Yield a user's events until the client disconnects.
+
+    When the stream has been idle for HEARTBEAT_INTERVAL, the event
+    returned by awaiting `resync()` is sent, or a heartbeat comment if
+    there is none. It catches up on changes published in other
+    processes, which never reach this broker.
+    """
+    queue = broker.subscribe(user_id)
+    try:
+        for event in initial_events:
+            yield event
+        while True:
+            try:
+                yield await asyncio.wait_for(queue.get(), HEARTBEAT_INTERVAL)
+            except asyncio.TimeoutError:
+                event = await resync() if resync is not None else None
+                yield event or ': heartbeat\n\n'
+    finally:
+        broker.unsubscribe(user_id, queue)
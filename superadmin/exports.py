@@ -0,0 +1,189 @@
+# superadmin/exports.py
+import csv
+import json
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from businesses.models import Business
+from reports.models import DailySalesRollup
+from reports.writers import display_value
+
+
+# Metric name -> (column title, DailySalesRollup field summed)
+METRICS = {
+    'sales': ('Sales', 'sale_count'),
+    'revenue': ('Revenue', 'total_amount'),
+    'subtotal': ('Subtotal', 'subtotal'),
+    'discount': ('Discount', 'discount_amount'),
+    'tax': ('Tax', 'tax_amount'),
+}
+
+# Dimension name -> ((rollup lookup, column title), ...)
+DIMENSIONS = {
+    'business': (('business_id', 'Business ID'), ('business__name', 'Business')),
+    'tier': (('business__license__tier', 'Tier'),),
+    'day': (('date', 'Date'),),
+    'payment_method': (('payment_method', 'Payment Method'),),
+}
+
+FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+DEFAULT_DAYS = 30
+MAX_EXPORT_DAYS = 2 * 366
+
+# Businesses grouped per query when exporting by business, so every
+# query stays short and rows are streamed as each batch completes.
+BUSINESS_BATCH_SIZE = 200
+
+# Chunks produced per thread hop when streaming to an async response.
+ASYNC_CHUNK_SIZE = 500
+
+
+class ExportError(Exception):
+    """Raised for an invalid export request."""
+
+
+class AnalyticsExport:
+    """Sales metrics summed over rollups, grouped by some dimensions.
+
+    Rows are ordered by the dimensions in the order given, except that
+    exports by business are ordered by business first, the order its
+    batches are queried in.
+    """
+
+    def __init__(self, metrics, dimensions, start_date, end_date):
+        self.metrics = metrics
+        self.dimensions = dimensions
+        self.start_date = start_date
+        self.end_date = end_date
+
+        self.lookups = [
+            lookup for name in dimensions for lookup, _ in DIMENSIONS[name]]
+        self.columns = [
+            title for name in dimensions for _, title in DIMENSIONS[name]
+        ] + [METRICS[name][0] for name in metrics]
+
+    @classmethod
+    def from_params(cls, params):
+        """Build an export from request parameters.
+
+        metrics and dimensions are comma separated; the period is either
+        start and end dates or a number of days ending today.
+        """
+        metrics = [name for name in params.get('metrics', '').split(',') if name]
+        dimensions = [name for name in params.get('dimensions', '').split(',') if name]
+        if not metrics:
+            raise ExportError('Choose at least one metric')
+        for name in metrics:
+            if name not in METRICS:
+                raise ExportError(f'Unknown metric {name}; choose from {", ".join(METRICS)}')
+        for name in dimensions:
+            if name not in DIMENSIONS:
+                raise ExportError(f'Unknown dimension {name}; choose from {", ".join(DIMENSIONS)}')
+
+        today = timezone.localdate()
+        if params.get('start') or params.get('end'):
+            start_date = parse_date(params.get('start') or '')
+            end_date = parse_date(params.get('end') or '') or today
+            if start_date is None:
+                raise ExportError('start must be a YYYY-MM-DD date')
+        else:
+            try:
+                days = int(params.get('days', DEFAULT_DAYS))
+            except ValueError:
+                raise ExportError('days must be a number')
+            end_date = today
+            start_date = today - timedelta(days=max(days, 1) - 1)
+
+        if start_date > end_date:
+            raise ExportError('start must not be after end')
+        if (end_date - start_date).days >= MAX_EXPORT_DAYS:
+            raise ExportError(f'Exports cover at most {MAX_EXPORT_DAYS} days')
+
+        return cls(list(dict.fromkeys(metrics)), list(dict.fromkeys(dimensions)),
+                   start_date, end_date)
+
+    def _queryset(self, ordering=None):
+        return DailySalesRollup.objects.filter(
+            date__gte=self.start_date,
+            date__lte=self.end_date
+        ).values(*self.lookups).annotate(**self._sums()).order_by(*(ordering or self.lookups))
+
+    def _sums(self):
+        return {f'metric_{name}': Sum(METRICS[name][1]) for name in self.metrics}
+
+    def _results(self):
+        if not self.dimensions:
+            yield DailySalesRollup.objects.filter(
+                date__gte=self.start_date,
+                date__lte=self.end_date
+            ).aggregate(**self._sums())
+            return
+        if 'business' not in self.dimensions:
+            yield from self._queryset().iterator()
+            return
+
+        # Business first, so rows keep one order across batches.
+        ordering = ['business_id'] + [
+            lookup for lookup in self.lookups if lookup != 'business_id']
+        business_ids = list(Business.objects.order_by('id').values_list('id', flat=True))
+        for i in range(0, len(business_ids), BUSINESS_BATCH_SIZE):
+            yield from self._queryset(ordering).filter(
+                business_id__in=business_ids[i:i + BUSINESS_BATCH_SIZE])
+
+    def rows(self):
+        """Yield one list of values per group, in column order."""
+        keys = self.lookups + [f'metric_{name}' for name in self.metrics]
+        for result in self._results():
+            yield [result[key] for key in keys]
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def stream_csv(export):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(export.columns)
+    for row in export.rows():
+        yield writer.writerow([display_value(value) for value in row])
+
+
+def stream_jsonl(export):
+    for row in export.rows():
+        yield json.dumps(dict(zip(export.columns, row)), cls=DjangoJSONEncoder) + '\n'
+
+
+STREAMS = {
+    'csv': stream_csv,
+    'jsonl': stream_jsonl,
+}
+
+
+def _next_chunks(chunks, size):
+    return [chunk for _, chunk in zip(range(size), chunks)]
+
+
+async def stream_async(chunks, size=ASYNC_CHUNK_SIZE):
+    """Serve a synchronous stream to an async (ASGI) response.
+
+    Django buffers a synchronous iterator whole under ASGI; this hands
+    it over `size` chunks at a time, produced in the thread that holds
+    the request's database connection.
+    """
+    next_chunks = sync_to_async(_next_chunks)
+    while True:
+        batch = await next_chunks(chunks, size)
+        if not batch:
+            return
+        for chunk in batch:
+            yield chunk
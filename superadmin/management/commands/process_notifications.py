@@ -0,0 +1,36 @@
+# superadmin/management/commands/process_notifications.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from superadmin.notifications import (
+    expire_notifications, publish_due_notifications, purge_notifications
+)
+
+
+class Command(BaseCommand):
+    help = 'Publish scheduled notifications, deactivate expired ones and purge old inactive ones.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Notifications handled per statement.')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep running passes.')
+        parser.add_argument('--interval', type=int, default=60,
+                            help='Seconds between passes when looping.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        while True:
+            published = publish_due_notifications(batch_size=batch_size)
+            expired = expire_notifications(batch_size=batch_size)
+            purged = purge_notifications(batch_size=batch_size)
+
+            if published or expired or purged:
+                self.stdout.write(self.style.SUCCESS(
+                    f'{published} published, {expired} expired, {purged} purged'))
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,20 @@
+# superadmin/management/commands/rebuild_search_index.py
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from superadmin.search import SOURCES, rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the super admin global search index from scratch.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('models', nargs='*', metavar='app_label.Model',
+                            help='Only rebuild these models (default: all indexed models).')
+
+    def handle(self, *args, **options):
+        for label in options['models'] or SOURCES:
+            if label not in SOURCES:
+                raise CommandError(f'{label} is not indexed; choose from {", ".join(SOURCES)}')
+            count = rebuild_search_index(apps.get_model(label))
+            self.stdout.write(self.style.SUCCESS(f'{label}: {count} objects indexed'))
@@ -0,0 +1,132 @@
+# superadmin/metrics.py
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+from accounts.models import User
+from businesses.models import Business
+from licenses.models import License
+from pos.models import Sale
+from saas_pos.cache import invalidated_timeout
+from .models import SystemActivity
+from .stats import TableTotal, count_stats
+
+
+SNAPSHOT_KEY = 'superadmin:platform-metrics'
+
+# Writes to businesses, licenses and users drop the snapshot at once;
+# sales and activities only show up when it expires.
+SNAPSHOT_TIMEOUT = 5 * 60
+
+EXPIRING_WITHIN_DAYS = 30
+
+BUSINESS_TYPE_COLORS = ['#4e73df', '#1cc88a', '#36b9cc', '#f6c23e', '#e74a3b']
+
+BUSINESS_TYPES = Business._meta.get_field('business_type').choices
+
+
+def _percentage(count, total):
+    return count / total * 100 if total > 0 else 0
+
+
+def _platform_stats(today, month_start):
+    """Business, license and user counters and this month's revenue.
+
+    Each business has at most one license, so licenses are counted over
+    the businesses they are joined to.
+    """
+    current = Q(license__is_active=True, license__end_date__gte=today)
+    counters = {
+        'businesses': None,
+        'licenses': Q(license__isnull=False),
+        'active_flag': Q(license__is_active=True),
+        'active': current,
+        'expired': Q(license__is_active=False) | Q(license__end_date__lt=today),
+        'demo': Q(license__tier=License.Tier.DEMO),
+        'expiring_soon': current & Q(
+            license__end_date__lte=today + timedelta(days=EXPIRING_WITHIN_DAYS)),
+        'users': TableTotal(User.objects.all()),
+        'monthly_revenue': TableTotal(
+            Sale.objects.filter(created_at__gte=month_start), 'SUM', 'total_amount'),
+    }
+    for business_type, label in BUSINESS_TYPES:
+        counters[f'type_{business_type}'] = Q(business_type=business_type)
+    return count_stats(Business.objects.all(), counters)
+
+
+def _license_stats(stats):
+    license_stats = {
+        name: stats[name] for name in ('active', 'expired', 'demo', 'expiring_soon')
+    }
+    for name in ('active', 'expired', 'demo'):
+        license_stats[f'{name}_percentage'] = _percentage(stats[name], stats['licenses'])
+    license_stats['expiring_percentage'] = _percentage(
+        stats['expiring_soon'], stats['licenses'])
+    return license_stats
+
+
+def _business_types(stats):
+    counts = sorted(
+        ((label, stats[f'type_{business_type}']) for business_type, label in BUSINESS_TYPES),
+        key=lambda item: -item[1])
+    return [
+        {'name': label, 'count': count, 'color': color}
+        for (label, count), color in zip(counts, BUSINESS_TYPE_COLORS)
+        if count
+    ]
+
+
+def compute_platform_metrics():
+    """Compute the super admin dashboard figures.
+
+    Every counter comes from one conditional aggregation over businesses,
+    their licenses, users and sales; the recent businesses and activities
+    are the only other queries.
+    """
+    now = timezone.localtime()
+    today = now.date()
+    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+    stats = _platform_stats(today, month_start)
+
+    return {
+        'businesses_count': stats['businesses'],
+        'users_count': stats['users'],
+        'active_licenses': stats['active_flag'],
+        'monthly_revenue': stats['monthly_revenue'] or 0,
+        'business_types': _business_types(stats),
+        'license_stats': _license_stats(stats),
+        'recent_businesses': list(
+            Business.objects.select_related('license').order_by('-created_at')[:5]
+        ),
+        'recent_activities': [
+            {
+                'icon': activity.icon,
+                'color': activity.color,
+                'text': activity.description,
+                'created_at': activity.created_at,
+            }
+            for activity in SystemActivity.objects.order_by('-created_at')[:10]
+        ],
+        'computed_at': now,
+    }
+
+
+def refresh_platform_metrics():
+    snapshot = compute_platform_metrics()
+    cache.set(SNAPSHOT_KEY, snapshot, invalidated_timeout(SNAPSHOT_TIMEOUT))
+    return snapshot
+
+
+def platform_metrics():
+    """The cached dashboard snapshot, recomputed when missing."""
+    snapshot = cache.get(SNAPSHOT_KEY)
+    if snapshot is None:
+        snapshot = refresh_platform_metrics()
+    return snapshot
+
+
+def invalidate_platform_metrics():
+    cache.delete(SNAPSHOT_KEY)
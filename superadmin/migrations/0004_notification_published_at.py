@@ -0,0 +1,37 @@
+# Generated by Django 6.0 on 2026-10-18 23:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def publish_existing(apps, schema_editor):
+    # Notifications created before scheduling was honored were shown at once.
+    Notification = apps.get_model('superadmin', 'Notification')
+    Notification.objects.filter(published_at__isnull=True).update(
+        published_at=models.F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('businesses', '0001_initial'),
+        ('superadmin', '0003_usernotification_read_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='published_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(publish_existing, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['published_at', 'scheduled_for'], name='superadmin__publish_282e1c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['is_active', 'expires_at'], name='superadmin__is_acti_1c7065_idx'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 # superadmin/models.py (update)
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 import json
 
@@ -54,6 +55,8 @@ class Notification(models.Model):
     # Scheduling
     scheduled_for = models.DateTimeField(blank=True, null=True)
     expires_at = models.DateTimeField(blank=True, null=True)
+    # Set when delivered to the audience, see process_notifications
+    published_at = models.DateTimeField(blank=True, null=True, editable=False)
 
     # Status
     is_active = models.BooleanField(default=True)
@@ -75,6 +78,16 @@ class Notification(models.Model):
     def __str__(self):
         return f"{self.title} ({self.notification_type})"
 
+    def save(self, *args, **kwargs):
+        # Scheduled notifications are published later by the scheduler
+        if self._state.adding and self.published_at is None and not self.is_scheduled:
+            self.published_at = timezone.now()
+        super().save(*args, **kwargs)
+
+    @property
+    def is_scheduled(self):
+        return self.scheduled_for is not None and self.scheduled_for > timezone.now()
+
     @property
     def get_icon(self):
         """Get icon based on notification type."""
@@ -109,13 +122,16 @@ class Notification(models.Model):
 
     @property
     def is_expired(self):
-        from django.utils import timezone
         if self.expires_at:
             return self.expires_at < timezone.now()
         return False
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['published_at', 'scheduled_for']),
+            models.Index(fields=['is_active', 'expires_at']),
+        ]
         verbose_name = _('Notification')
         verbose_name_plural = _('Notifications')
 
@@ -137,7 +153,8 @@ class UserNotification(models.Model):
     is_read = models.BooleanField(default=False)
     read_at = models.DateTimeField(blank=True, null=True)
 
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Set to the notification's publication time on fan-out
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
 
     def __str__(self):
         return f"{self.user.username} - {self.notification.title}"
@@ -150,6 +167,9 @@ class UserNotification(models.Model):
 
     class Meta:
         unique_together = ['user', 'notification']
+        indexes = [
+            models.Index(fields=['user', 'is_read', 'created_at']),
+        ]
         verbose_name = _('User Notification')
         verbose_name_plural = _('User Notifications')
 
@@ -210,7 +230,8 @@ class SystemActivity(models.Model):
     ip_address = models.GenericIPAddressField(blank=True, null=True)
     user_agent = models.TextField(blank=True, null=True)
 
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Set when the activity is logged, not when its batch is written
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
 
     def __str__(self):
         return f"{self.activity_type} - {self.description[:50]}..."
@@ -269,3 +290,60 @@ class SystemActivity(models.Model):
         ordering = ['-created_at']
         verbose_name = _('System Activity')
         verbose_name_plural = _('System Activities')
+
+
+class SearchEntry(models.Model):
+    """An object found by the super admin global search."""
+
+    class Kind(models.TextChoices):
+        BUSINESS = 'BUSINESS', _('Business')
+        USER = 'USER', _('User')
+        LICENSE = 'LICENSE', _('License')
+        SALE = 'SALE', _('Sale')
+
+    kind = models.CharField(max_length=20, choices=Kind.choices)
+    object_id = models.PositiveBigIntegerField()
+    # Users outlive their business, so their entries must too.
+    business = models.ForeignKey(
+        'businesses.Business',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='search_entries'
+    )
+
+    title = models.CharField(max_length=255)
+    subtitle = models.CharField(max_length=255, blank=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.kind} #{self.object_id} - {self.title}"
+
+    class Meta:
+        unique_together = ['kind', 'object_id']
+        verbose_name = _('Search Entry')
+        verbose_name_plural = _('Search Entries')
+
+
+class SearchToken(models.Model):
+    """A normalized token of a search entry, matched by prefix."""
+
+    entry = models.ForeignKey(
+        SearchEntry,
+        on_delete=models.CASCADE,
+        related_name='tokens'
+    )
+    token = models.CharField(max_length=64)
+    weight = models.PositiveSmallIntegerField(default=1)
+
+    def __str__(self):
+        return self.token
+
+    class Meta:
+        unique_together = ['entry', 'token']
+        indexes = [
+            models.Index(fields=['token', 'entry', 'weight']),
+        ]
+        verbose_name = _('Search Token')
+        verbose_name_plural = _('Search Tokens')
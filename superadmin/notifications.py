@@ -0,0 +1,343 @@
+# superadmin/notifications.py
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import User
+from saas_pos.cache import bump_generation, generations, invalidated_timeout
+from .events import publish_notification
+from .models import Notification, UserNotification
+
+
+RECENT_LIMIT = 5
+
+# UserNotification rows written per bulk_create during fan-out.
+FANOUT_CHUNK_SIZE = 1000
+
+# Notifications updated or deleted per statement by the scheduler.
+SWEEP_BATCH_SIZE = 1000
+
+# Cached summaries are invalidated explicitly, the timeout only bounds
+# how long an unused entry lingers.
+CACHE_TIMEOUT = 60 * 60 * 24
+
+GLOBAL_GENERATION_KEY = 'notifications:generation'
+USER_GENERATION_KEY = 'notifications:user:%s:generation'
+SUMMARY_KEY = 'notifications:user:%s:%s:%s'
+
+
+def bump_notifications():
+    """Invalidate every user's summary, after notifications change."""
+    bump_generation(GLOBAL_GENERATION_KEY)
+
+
+def bump_user_notifications(user_id):
+    """Invalidate one user's summary, after their read state changes."""
+    bump_generation(USER_GENERATION_KEY % user_id)
+
+
+def bump_users_notifications(user_ids):
+    """Invalidate the summaries of many users in one cache round trip."""
+    # A missing counter is recreated with a fresh value on next read.
+    cache.delete_many([USER_GENERATION_KEY % user_id for user_id in user_ids])
+
+
+def audience_users(notification):
+    """Return the users a notification is addressed to."""
+    Audience = Notification.Audience
+    users = User.objects.filter(is_active=True)
+
+    if notification.audience == Audience.SUPER_ADMINS:
+        return users.filter(role=User.Role.SUPER_ADMIN)
+    if notification.audience == Audience.ALL:
+        return users
+
+    if notification.business_id is not None:
+        users = users.filter(business_id=notification.business_id)
+    elif notification.audience == Audience.SPECIFIC_BUSINESS:
+        return users.none()
+
+    if notification.audience == Audience.BUSINESS_ADMINS:
+        return users.filter(role=User.Role.BUSINESS_ADMIN)
+    if notification.audience == Audience.CASHIERS:
+        return users.filter(role=User.Role.CASHIER)
+    return users
+
+
+def _deliver(notification, user_ids):
+    UserNotification.objects.bulk_create(
+        [
+            UserNotification(
+                user_id=user_id,
+                notification_id=notification.id,
+                created_at=notification.published_at
+            )
+            for user_id in user_ids
+        ],
+        ignore_conflicts=True
+    )
+    bump_users_notifications(user_ids)
+    publish_notification(notification, user_ids)
+
+
+def fan_out(notification):
+    """Write a UserNotification row for every user in the audience.
+
+    Rows are written with bulk_create in chunks of user ids. Broadcasts
+    to ALL users are not fanned out here but materialized per user the
+    first time that user's notifications are read. Returns the number of
+    users the notification was delivered to.
+    """
+    if (notification.audience == Notification.Audience.ALL or
+            not notification.is_active or notification.published_at is None):
+        return 0
+
+    delivered = 0
+    user_ids = audience_users(notification).values_list('id', flat=True)
+    chunk = []
+    for user_id in user_ids.iterator(chunk_size=FANOUT_CHUNK_SIZE):
+        chunk.append(user_id)
+        if len(chunk) == FANOUT_CHUNK_SIZE:
+            _deliver(notification, chunk)
+            delivered += len(chunk)
+            chunk = []
+    if chunk:
+        _deliver(notification, chunk)
+        delivered += len(chunk)
+    return delivered
+
+
+# Audiences narrowed to one role within the target business.
+AUDIENCE_ROLES = {
+    Notification.Audience.BUSINESS_ADMINS: User.Role.BUSINESS_ADMIN,
+    Notification.Audience.CASHIERS: User.Role.CASHIER,
+}
+
+
+def fan_out_to_businesses(notifications):
+    """Deliver many notifications that each target one business.
+
+    Recipients of all of them are found with one query and their rows
+    written with one bulk_create, where fan_out() would take a query
+    and a write per notification. Returns the number of rows written.
+    """
+    targeted = [
+        notification for notification in notifications
+        if notification.business_id is not None and notification.is_active
+        and notification.published_at is not None
+        and notification.audience not in (Notification.Audience.ALL,
+                                          Notification.Audience.SUPER_ADMINS)
+    ]
+    if not targeted:
+        return 0
+
+    members = {}
+    users = User.objects.filter(
+        is_active=True,
+        business_id__in={notification.business_id for notification in targeted}
+    ).values_list('id', 'business_id', 'role')
+    for user_id, business_id, role in users.iterator(chunk_size=FANOUT_CHUNK_SIZE):
+        members.setdefault(business_id, []).append((user_id, role))
+
+    rows = []
+    recipients = []
+    for notification in targeted:
+        role = AUDIENCE_ROLES.get(notification.audience)
+        user_ids = [
+            user_id for user_id, user_role in members.get(notification.business_id, ())
+            if role is None or user_role == role
+        ]
+        rows.extend(
+            UserNotification(
+                user_id=user_id,
+                notification_id=notification.id,
+                created_at=notification.published_at
+            )
+            for user_id in user_ids
+        )
+        recipients.append((notification, user_ids))
+
+    UserNotification.objects.bulk_create(
+        rows, ignore_conflicts=True, batch_size=FANOUT_CHUNK_SIZE)
+    bump_users_notifications({row.user_id for row in rows})
+    for notification, user_ids in recipients:
+        if user_ids:
+            publish_notification(notification, user_ids)
+    return len(rows)
+
+
+def materialize_broadcasts(user):
+    """Deliver active ALL-audience notifications the user has not received."""
+    missing = Notification.objects.filter(
+        audience=Notification.Audience.ALL,
+        is_active=True,
+        published_at__isnull=False
+    ).exclude(
+        user_notifications__user=user
+    ).values_list('id', 'published_at')
+
+    UserNotification.objects.bulk_create(
+        [
+            UserNotification(
+                user_id=user.pk,
+                notification_id=notification_id,
+                created_at=published_at
+            )
+            for notification_id, published_at in missing
+        ],
+        ignore_conflicts=True
+    )
+
+
+def user_notifications(user):
+    """The user's active notifications, newest first."""
+    materialize_broadcasts(user)
+    return UserNotification.objects.filter(
+        user=user,
+        notification__is_active=True
+    ).order_by('-created_at')
+
+
+def mark_read(user, notification_ids=None):
+    """Mark the user's notifications read, all of them by default."""
+    unread = user_notifications(user).filter(is_read=False)
+    if notification_ids is not None:
+        unread = unread.filter(notification_id__in=notification_ids)
+    updated = unread.update(is_read=True, read_at=timezone.now())
+    if updated:
+        bump_user_notifications(user.pk)
+    return updated
+
+
+def mark_notification_read(user, notification_id):
+    """Mark one notification read for a user it is addressed to.
+
+    The user's row is created if fan-out never wrote one, as for users
+    who joined after it was published. Returns False when the
+    notification is not active, published and in the user's audience.
+    """
+    notification = Notification.objects.filter(
+        id=notification_id, is_active=True, published_at__isnull=False).first()
+    if notification is None or not audience_users(notification).filter(pk=user.pk).exists():
+        return False
+
+    delivery, _ = UserNotification.objects.get_or_create(
+        user=user,
+        notification=notification,
+        defaults={'created_at': notification.published_at}
+    )
+    if UserNotification.objects.filter(pk=delivery.pk, is_read=False).update(
+            is_read=True, read_at=timezone.now()):
+        bump_user_notifications(user.pk)
+    return True
+
+
+def _build_summary(user):
+    notifications = user_notifications(user)
+    recent = []
+    for delivery in notifications.select_related(
+            'notification__business')[:RECENT_LIMIT]:
+        # Templates read the per-user state from the notification.
+        delivery.notification.is_read = delivery.is_read
+        recent.append(delivery.notification)
+
+    return {
+        'unread_count': notifications.filter(is_read=False).count(),
+        'recent': recent,
+    }
+
+
+def notification_summary(user):
+    """Return the user's unread count and most recent notifications.
+
+    Summaries are cached per user under the current generation counters,
+    so a render in the steady state costs cache reads but no queries.
+    """
+    key = SUMMARY_KEY % (user.pk, *generations(
+        [GLOBAL_GENERATION_KEY, USER_GENERATION_KEY % user.pk]))
+    summary = cache.get(key)
+    if summary is None:
+        summary = _build_summary(user)
+        cache.set(key, summary, invalidated_timeout(CACHE_TIMEOUT))
+    return summary
+
+
+def publish_due_notifications(now=None, batch_size=SWEEP_BATCH_SIZE):
+    """Publish scheduled notifications whose time has come.
+
+    Each batch is claimed with SELECT ... FOR UPDATE SKIP LOCKED, so
+    concurrent schedulers never publish the same notification twice,
+    then fanned out to its audience. Returns the number published.
+    """
+    now = now or timezone.now()
+    due = Notification.objects.filter(
+        published_at__isnull=True,
+        is_active=True,
+        scheduled_for__lte=now
+    ).exclude(expires_at__lte=now)
+
+    published = 0
+    while True:
+        with transaction.atomic():
+            ids = list(
+                due.select_for_update(skip_locked=True).order_by(
+                    'scheduled_for').values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            Notification.objects.filter(id__in=ids).update(
+                published_at=now, updated_at=now)
+
+        notifications = list(Notification.objects.filter(id__in=ids))
+        for notification in notifications:
+            if notification.audience == Notification.Audience.ALL:
+                publish_notification(notification)
+            else:
+                fan_out(notification)
+        published += len(ids)
+
+    if published:
+        # Broadcasts are materialized on read.
+        bump_notifications()
+    return published
+
+
+def expire_notifications(now=None, batch_size=SWEEP_BATCH_SIZE):
+    """Deactivate notifications past their expiry, in batches."""
+    now = now or timezone.now()
+    expired = Notification.objects.filter(is_active=True, expires_at__lte=now)
+
+    deactivated = 0
+    while True:
+        ids = list(expired.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            break
+        deactivated += Notification.objects.filter(
+            id__in=ids, is_active=True).update(is_active=False, updated_at=now)
+
+    if deactivated:
+        bump_notifications()
+    return deactivated
+
+
+def purge_notifications(now=None, batch_size=SWEEP_BATCH_SIZE):
+    """Delete notifications inactive for longer than the retention period.
+
+    Their UserNotification rows go with them. Returns the number of
+    notifications deleted.
+    """
+    now = now or timezone.now()
+    cutoff = now - timedelta(days=settings.NOTIFICATION_RETENTION_DAYS)
+    stale = Notification.objects.filter(is_active=False, updated_at__lt=cutoff)
+
+    purged = 0
+    while True:
+        ids = list(stale.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            break
+        Notification.objects.filter(id__in=ids).delete()
+        purged += len(ids)
+    return purged
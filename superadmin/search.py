@@ -0,0 +1,322 @@
+# superadmin/search.py
+import operator
+import re
+import unicodedata
+from functools import reduce
+
+from django.db.models import Case, Exists, F, IntegerField, Max, OuterRef, Q, Sum, When
+from django.urls import reverse
+
+from .models import SearchEntry, SearchToken
+
+
+MAX_TOKEN_LENGTH = 64
+
+# Query words beyond this are ignored.
+MAX_QUERY_TERMS = 6
+
+# Entries ranked per query. Candidates are taken in token order of the
+# most selective query word, so exact matches come first; very broad
+# queries rank only the first candidates rather than scanning every match.
+CANDIDATE_LIMIT = 500
+
+# Matches counted per word when picking the most selective one.
+SELECTIVITY_LIMIT = 5000
+
+# Objects indexed per bulk write when rebuilding.
+REBUILD_CHUNK_SIZE = 1000
+
+# Sorts after every string a token can start with.
+_PREFIX_END = '\U0010ffff'
+
+_WORD_SEPARATORS = re.compile(r'[\W_]+')
+
+
+def words(text):
+    """Split text into case- and accent-folded words."""
+    if not text:
+        return []
+    text = unicodedata.normalize('NFKD', str(text))
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return [word for word in _WORD_SEPARATORS.split(text.casefold()) if word]
+
+
+def tokenize(terms, identifiers=()):
+    """Return {token: weight} for (text, weight) pairs.
+
+    Identifiers (emails, phone numbers, keys, receipt numbers) are also
+    indexed as one compact token, so they match however they are typed.
+    """
+    tokens = {}
+
+    def add(token, weight):
+        token = token[:MAX_TOKEN_LENGTH]
+        tokens[token] = max(tokens.get(token, 0), weight)
+
+    for text, weight in terms:
+        for word in words(text):
+            add(word, weight)
+    for text, weight in identifiers:
+        parts = words(text)
+        for word in parts:
+            add(word, weight)
+        if len(parts) > 1:
+            add(''.join(parts), weight)
+    return tokens
+
+
+def _business_document(business):
+    return {
+        'business_id': business.id,
+        'title': business.name,
+        'subtitle': business.email,
+        'terms': [(business.name, 3)],
+        'identifiers': [(business.email, 2), (business.phone, 2)],
+    }
+
+
+def _user_document(user):
+    return {
+        'business_id': user.business_id,
+        'title': user.get_full_name() or user.username,
+        'subtitle': ' - '.join(filter(None, [user.get_role_display(), user.email])),
+        'terms': [(user.username, 3), (user.first_name, 2), (user.last_name, 2)],
+        'identifiers': [(user.username, 3), (user.email, 2), (user.phone_number, 1)],
+    }
+
+
+def _license_document(license_obj):
+    return {
+        'business_id': license_obj.business_id,
+        'title': license_obj.license_key,
+        'subtitle': f"{license_obj.get_tier_display()} license",
+        'terms': [],
+        'identifiers': [(license_obj.license_key, 3)],
+    }
+
+
+def _sale_document(sale):
+    return {
+        'business_id': sale.business_id,
+        'title': f"Receipt {sale.receipt_number}",
+        'subtitle': sale.created_at.strftime('%Y-%m-%d %H:%M') if sale.created_at else '',
+        'terms': [],
+        'identifiers': [(sale.receipt_number, 3)],
+    }
+
+
+# Indexed models: label -> (kind, fields the document depends on, builder)
+SOURCES = {
+    'businesses.Business': (
+        SearchEntry.Kind.BUSINESS,
+        ('name', 'email', 'phone'),
+        _business_document
+    ),
+    'accounts.User': (
+        SearchEntry.Kind.USER,
+        ('username', 'first_name', 'last_name', 'email', 'phone_number',
+         'role', 'business_id'),
+        _user_document
+    ),
+    'licenses.License': (
+        SearchEntry.Kind.LICENSE,
+        ('license_key', 'tier', 'business_id'),
+        _license_document
+    ),
+    'pos.Sale': (
+        SearchEntry.Kind.SALE,
+        ('receipt_number',),
+        _sale_document
+    ),
+}
+
+
+def needs_reindex(instance, created=False):
+    """Whether a saved object's indexed fields changed since it was loaded."""
+    _, fields, _ = SOURCES[instance._meta.label]
+    loaded = getattr(instance, '_loaded_values', None)
+    if created or loaded is None:
+        return True
+    return any(
+        name not in loaded or loaded[name] != instance.__dict__.get(name)
+        for name in fields
+    )
+
+
+def _tokens(entry_id, document):
+    return [
+        SearchToken(entry_id=entry_id, token=token, weight=weight)
+        for token, weight in tokenize(
+            document['terms'], document['identifiers']).items()
+    ]
+
+
+def index_object(instance):
+    """Add or refresh one object's search entry and tokens."""
+    kind, _, build = SOURCES[instance._meta.label]
+    document = build(instance)
+
+    entry, created = SearchEntry.objects.update_or_create(
+        kind=kind,
+        object_id=instance.pk,
+        defaults={
+            'business_id': document['business_id'],
+            'title': document['title'][:255],
+            'subtitle': document['subtitle'][:255],
+        }
+    )
+    if not created:
+        SearchToken.objects.filter(entry=entry).delete()
+    SearchToken.objects.bulk_create(_tokens(entry.id, document))
+
+
+def remove_object(model, pk):
+    kind, _, _ = SOURCES[model._meta.label]
+    SearchEntry.objects.filter(kind=kind, object_id=pk).delete()
+
+
+def rebuild_search_index(model):
+    """Reindex every object of an indexed model with bulk writes.
+
+    Returns the number of objects indexed.
+    """
+    kind, _, build = SOURCES[model._meta.label]
+    SearchEntry.objects.filter(kind=kind).delete()
+
+    indexed = 0
+    chunk = []
+    for instance in model._default_manager.order_by('pk').iterator(
+            chunk_size=REBUILD_CHUNK_SIZE):
+        chunk.append(build(instance) | {'object_id': instance.pk})
+        if len(chunk) == REBUILD_CHUNK_SIZE:
+            _write_chunk(kind, chunk)
+            indexed += len(chunk)
+            chunk = []
+    if chunk:
+        _write_chunk(kind, chunk)
+        indexed += len(chunk)
+    return indexed
+
+
+def _write_chunk(kind, documents):
+    SearchEntry.objects.bulk_create([
+        SearchEntry(
+            kind=kind,
+            object_id=document['object_id'],
+            business_id=document['business_id'],
+            title=document['title'][:255],
+            subtitle=document['subtitle'][:255]
+        )
+        for document in documents
+    ])
+    # Not every database returns primary keys from bulk_create.
+    entry_ids = dict(SearchEntry.objects.filter(
+        kind=kind,
+        object_id__in=[document['object_id'] for document in documents]
+    ).values_list('object_id', 'id'))
+
+    SearchToken.objects.bulk_create([
+        token
+        for document in documents
+        for token in _tokens(entry_ids[document['object_id']], document)
+    ], batch_size=REBUILD_CHUNK_SIZE)
+
+
+def _prefix(term):
+    return Q(token__gte=term, token__lt=term + _PREFIX_END)
+
+
+def _ranked_entries(query, kinds=None, candidates=CANDIDATE_LIMIT):
+    """Entry ids matching every query word by prefix, with a score.
+
+    Candidates come from a range scan of the (token, entry, weight)
+    index on the most selective word and are checked against the other
+    words; their few tokens are then scored through the (entry, token)
+    index. Exact word matches count double.
+    """
+    terms = words(query)[:MAX_QUERY_TERMS]
+    if not terms:
+        return None
+
+    anchor = max(terms, key=len)
+    if candidates and len(terms) > 1:
+        # Capped counts, so each estimate is a short index scan.
+        anchor = min(terms, key=lambda term: (
+            SearchToken.objects.filter(_prefix(term))[:SELECTIVITY_LIMIT].count(),
+            -len(term)
+        ))
+
+    matches = SearchToken.objects.filter(_prefix(anchor))
+    for term in terms:
+        if term != anchor:
+            matches = matches.filter(Exists(SearchToken.objects.filter(
+                _prefix(term), entry_id=OuterRef('entry_id'))))
+    if kinds:
+        matches = matches.filter(entry__kind__in=kinds)
+    if candidates:
+        matches = matches.order_by('token')[:candidates]
+    entry_ids = set(matches.values_list('entry_id', flat=True))
+
+    conditions = [_prefix(term) for term in terms]
+    tokens = SearchToken.objects.filter(entry_id__in=entry_ids)
+
+    return tokens.values('entry_id', 'entry__object_id').annotate(
+        matched=reduce(operator.add, [
+            Max(Case(When(condition, then=1), default=0,
+                     output_field=IntegerField()))
+            for condition in conditions
+        ]),
+        score=Sum(Case(
+            When(token__in=terms, then=F('weight') * 2),
+            When(reduce(operator.or_, conditions), then='weight'),
+            default=0,
+            output_field=IntegerField()
+        ))
+    ).filter(matched=len(terms))
+
+
+def result_url(entry):
+    if entry.kind == SearchEntry.Kind.BUSINESS:
+        return reverse('business_detail', args=[entry.object_id])
+    if entry.business_id:
+        return reverse('business_detail', args=[entry.business_id])
+    return reverse('manage_users')
+
+
+def search(query, kinds=None, limit=20):
+    """Return the best matching objects of any indexed kind."""
+    ranked = _ranked_entries(query, kinds)
+    if ranked is None:
+        return []
+
+    rows = list(ranked.order_by('-score', '-entry_id')[:limit])
+    entries = SearchEntry.objects.in_bulk([row['entry_id'] for row in rows])
+
+    results = []
+    for row in rows:
+        entry = entries[row['entry_id']]
+        results.append({
+            'type': entry.kind,
+            'id': entry.object_id,
+            'title': entry.title,
+            'subtitle': entry.subtitle,
+            'url': result_url(entry),
+            'score': row['score'],
+        })
+    return results
+
+
+def is_indexed(kind):
+    """Whether any objects of a kind are in the index yet.
+
+    The index starts empty on upgrade until rebuild_search_index runs.
+    """
+    return SearchEntry.objects.filter(kind=kind).exists()
+
+
+def matching_ids(query, kind):
+    """Primary keys of all objects of one kind matching the query."""
+    ranked = _ranked_entries(query, [kind], candidates=None)
+    if ranked is None:
+        return []
+    return [row['entry__object_id'] for row in ranked]
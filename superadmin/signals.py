@@ -0,0 +1,84 @@
+# superadmin/signals.py
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from accounts.models import User
+from businesses.models import Business
+from licenses.models import License
+from pos.models import Sale
+from .events import publish_notification
+from .metrics import invalidate_platform_metrics
+from .models import Notification, UserNotification
+from .notifications import bump_notifications, bump_user_notifications, fan_out
+from .search import index_object, needs_reindex, remove_object
+from .stats import bump_stats
+
+
+@receiver(post_save, sender=Notification)
+def notification_saved(sender, instance, created, **kwargs):
+    if created and instance.published_at is None:
+        # Scheduled; published later by process_notifications.
+        return
+    if created and instance.audience != Notification.Audience.ALL:
+        # Targeted notifications invalidate only their recipients.
+        transaction.on_commit(partial(fan_out, instance))
+    else:
+        bump_notifications()
+        if created:
+            transaction.on_commit(partial(publish_notification, instance))
+
+
+@receiver(post_delete, sender=Notification)
+def notification_deleted(sender, instance, **kwargs):
+    # Inactive notifications are no longer shown to anyone.
+    if instance.is_active:
+        bump_notifications()
+
+
+# No post_delete receiver, so purges can cascade with a single DELETE.
+@receiver(post_save, sender=UserNotification)
+def user_notification_changed(sender, instance, **kwargs):
+    bump_user_notifications(instance.user_id)
+
+
+@receiver(post_save, sender=Business)
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=License)
+@receiver(post_save, sender=Sale)
+def searchable_saved(sender, instance, created, **kwargs):
+    # Indexed after commit, keeping its writes off the checkout transaction.
+    if needs_reindex(instance, created):
+        transaction.on_commit(partial(index_object, instance))
+
+
+@receiver(post_delete, sender=Business)
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=License)
+@receiver(post_delete, sender=Sale)
+def searchable_deleted(sender, instance, **kwargs):
+    transaction.on_commit(partial(remove_object, sender, instance.pk))
+
+
+# Saves that only touch these fields leave the dashboard figures unchanged.
+UNMETERED_FIELDS = {'last_login', 'updated_at'}
+
+
+@receiver(post_save, sender=Business)
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=License)
+def metered_saved(sender, instance, created, update_fields=None, **kwargs):
+    if not created and update_fields and set(update_fields) <= UNMETERED_FIELDS:
+        return
+    transaction.on_commit(invalidate_platform_metrics)
+    transaction.on_commit(partial(bump_stats, sender))
+
+
+@receiver(post_delete, sender=Business)
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=License)
+def metered_deleted(sender, instance, **kwargs):
+    transaction.on_commit(invalidate_platform_metrics)
+    transaction.on_commit(partial(bump_stats, sender))
@@ -0,0 +1,65 @@
+# superadmin/stats.py
+import hashlib
+
+from django.core.cache import cache
+from django.db.models import Count, Func, Subquery
+
+from saas_pos.cache import bump_generation, generations, invalidated_timeout
+
+
+# Stats pages tolerate slightly stale counters; writes through the ORM
+# invalidate them at once, bulk updates within this many seconds.
+STATS_TIMEOUT = 60
+
+GENERATION_KEY = 'stats:%s:generation'
+STATS_KEY = 'stats:%s:%s:%s:%s'
+
+
+class TableTotal(Subquery):
+    """An aggregate over another table, selected next to count_stats() counts.
+
+    It does not refer to the outer query, so aggregate() may select it.
+    """
+    contains_aggregate = True
+
+    def __init__(self, queryset, function='COUNT', field='pk'):
+        super().__init__(queryset.order_by().values(
+            total=Func(field, function=function)))
+
+
+def count_stats(queryset, counters):
+    """Count the rows matching each condition in a single query.
+
+    counters maps a name to a Q object, or to None to count every row,
+    or to a TableTotal to total another table in the same query.
+    """
+    return queryset.aggregate(**{
+        name: condition if isinstance(condition, TableTotal)
+        else Count('pk', filter=condition)
+        for name, condition in counters.items()
+    })
+
+
+def bump_stats(model):
+    """Invalidate every cached stats set of a model."""
+    bump_generation(GENERATION_KEY % model._meta.label)
+
+
+def cached_stats(model, name, counters, filters=None, timeout=STATS_TIMEOUT):
+    """count_stats() over a model, cached per name and filter set.
+
+    The counters for one name should not change between calls, apart
+    from the current date or time they are relative to.
+    """
+    filters = filters or {}
+    digest = hashlib.md5(
+        repr(sorted(filters.items())).encode(), usedforsecurity=False
+    ).hexdigest()
+    [generation] = generations([GENERATION_KEY % model._meta.label])
+    key = STATS_KEY % (model._meta.label, generation, name, digest)
+
+    stats = cache.get(key)
+    if stats is None:
+        stats = count_stats(model._default_manager.filter(**filters), counters)
+        cache.set(key, stats, invalidated_timeout(timeout))
+    return stats
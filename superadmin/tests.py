@@ -1,3 +1,415 @@
-from django.test import TestCase
+import asyncio
+import json
+import threading
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts import backends
+from accounts.models import User
+from businesses.models import Business
+from licenses.models import License
+from pos.models import Sale
+from reports.models import DailySalesRollup
+from reports.rollups import refresh_rollups
+from . import events
+from .analytics import _top_businesses, compute_analytics
+from .events import NotificationBroker, event_stream
+from .exports import MAX_EXPORT_DAYS, AnalyticsExport, ExportError, stream_async, stream_csv
+from .metrics import compute_platform_metrics
+from .models import Notification, SearchEntry, UserNotification
+from .notifications import notification_summary, user_notifications
+from .search import _ranked_entries, matching_ids, rebuild_search_index, search, tokenize
+
+
+def create_business(name, email=None, phone='1'):
+    return Business.objects.create(
+        name=name, email=email or f'{name.split()[0].lower()}@example.com', phone=phone,
+        address='a', city='c', state='s', country='KE', postal_code='1')
+
+
+class TokenizeTests(TestCase):
+    def test_words_are_folded_and_identifiers_compacted(self):
+        tokens = tokenize([('Café Noël', 3)], [('+254 700-123', 2)])
+        self.assertEqual(tokens, {
+            'cafe': 3, 'noel': 3, '254': 2, '700': 2, '123': 2, '254700123': 2,
+        })
+
+    def test_highest_weight_wins(self):
+        self.assertEqual(tokenize([('shop', 1), ('Shop', 3)]), {'shop': 3})
+
+
+@override_settings(AUDIT_LOG_SYNC=True, ACTIVITY_LOG_SYNC=True)
+class SearchTests(TestCase):
+    def setUp(self):
+        self.tea = create_business('Green Tea House', phone='0700 111 222')
+        self.teak = create_business('Teak Furniture')
+        self.shop = create_business('Corner Shop', email='hello@teashop.example')
+        rebuild_search_index(Business)
+
+    def ids(self, query):
+        return set(matching_ids(query, SearchEntry.Kind.BUSINESS))
+
+    def test_every_word_must_prefix_a_token(self):
+        self.assertEqual(self.ids('tea'), {self.tea.id, self.teak.id, self.shop.id})
+        self.assertEqual(self.ids('green te'), {self.tea.id})
+        self.assertEqual(self.ids('0700111222'), {self.tea.id})
+        # Word prefixes only, not substrings.
+        self.assertEqual(self.ids('ouse'), set())
+
+    def test_exact_and_weighted_matches_rank_first(self):
+        results = search('tea')
+        self.assertEqual(results[0]['id'], self.tea.id)
+        self.assertEqual({result['id'] for result in results[1:]}, {self.teak.id, self.shop.id})
+
+    def test_candidates_are_capped(self):
+        ranked = _ranked_entries('tea', candidates=2)
+        self.assertEqual(len(list(ranked)), 2)
+        self.assertEqual(len(list(_ranked_entries('tea', candidates=None))), 3)
+
+    def test_index_follows_saves_and_deletes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.teak.name = 'Oak Tables'
+            self.teak.save()
+        self.assertEqual(self.ids('furniture'), set())
+        self.assertEqual(self.ids('oak'), {self.teak.id})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.teak.delete()
+        self.assertEqual(self.ids('oak'), set())
+
+    def test_users_stay_searchable_after_their_business_is_deleted(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            user = User.objects.create_user('mwangi', password='pw', business=self.teak)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.teak.delete()
+        self.assertEqual(matching_ids('mwangi', SearchEntry.Kind.USER), [user.id])
+
+
+@override_settings(AUDIT_LOG_SYNC=True, ACTIVITY_LOG_SYNC=True)
+class BusinessListSearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        backends._users.clear()
+        self.shop = create_business('Corner Shop')
+        admin = User.objects.create_user('root', password='pw', role=User.Role.SUPER_ADMIN)
+        self.client.force_login(admin)
+
+    def names(self, query):
+        response = self.client.get(reverse('manage_businesses'), {'search': query})
+        return [business.name for business in response.context['businesses']]
+
+    def test_substring_match_until_the_index_is_built(self):
+        SearchEntry.objects.all().delete()
+        self.assertEqual(self.names('orner'), ['Corner Shop'])
+
+        rebuild_search_index(Business)
+        self.assertEqual(self.names('orner'), [])
+        self.assertEqual(self.names('corn'), ['Corner Shop'])
+
+
+@override_settings(AUDIT_LOG_SYNC=True, ACTIVITY_LOG_SYNC=True)
+class NotificationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        backends._users.clear()
+        self.shop = create_business('Corner Shop')
+        self.other = create_business('Tea House')
+        self.admin = User.objects.create_user(
+            'admin', business=self.shop, role=User.Role.BUSINESS_ADMIN)
+        self.cashier = User.objects.create_user(
+            'cashier', business=self.shop, role=User.Role.CASHIER)
+        self.outsider = User.objects.create_user(
+            'outsider', business=self.other, role=User.Role.BUSINESS_ADMIN)
+
+    def notify(self, audience, business=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Notification.objects.create(
+                title='Hello', message='m', audience=audience, business=business)
+
+    def recipients(self, notification):
+        return set(UserNotification.objects.filter(
+            notification=notification).values_list('user__username', flat=True))
+
+    def mark_read(self, user, notification):
+        self.client.force_login(user)
+        return self.client.post(reverse('mark_notification_read', args=[notification.id]))
+
+    def test_fan_out_reaches_only_the_audience(self):
+        admins = self.notify(Notification.Audience.BUSINESS_ADMINS, self.shop)
+        self.assertEqual(self.recipients(admins), {'admin'})
+
+        everyone = self.notify(Notification.Audience.SPECIFIC_BUSINESS, self.shop)
+        self.assertEqual(self.recipients(everyone), {'admin', 'cashier'})
+
+    def test_broadcasts_are_materialized_on_read(self):
+        broadcast = self.notify(Notification.Audience.ALL)
+        self.assertEqual(self.recipients(broadcast), set())
+
+        self.assertEqual(notification_summary(self.cashier)['unread_count'], 1)
+        self.assertEqual(self.recipients(broadcast), {'cashier'})
+        self.assertEqual(user_notifications(self.cashier).get().notification, broadcast)
+
+    def test_read_state_is_per_user(self):
+        notification = self.notify(Notification.Audience.SPECIFIC_BUSINESS, self.shop)
+        self.assertEqual(self.mark_read(self.admin, notification).status_code, 200)
+
+        self.assertEqual(notification_summary(self.admin)['unread_count'], 0)
+        self.assertEqual(notification_summary(self.cashier)['unread_count'], 1)
+
+    def test_mark_read_creates_a_missing_row(self):
+        notification = self.notify(Notification.Audience.CASHIERS, self.shop)
+        late = User.objects.create_user(
+            'late', business=self.shop, role=User.Role.CASHIER)
+        self.assertEqual(self.mark_read(late, notification).status_code, 200)
+        self.assertTrue(UserNotification.objects.get(user=late, notification=notification).is_read)
+
+    def test_mark_read_outside_the_audience_is_not_found(self):
+        notification = self.notify(Notification.Audience.SPECIFIC_BUSINESS, self.shop)
+        self.assertEqual(self.mark_read(self.outsider, notification).status_code, 404)
+        self.assertFalse(UserNotification.objects.filter(user=self.outsider).exists())
+
+
+@override_settings(AUDIT_LOG_SYNC=True, ACTIVITY_LOG_SYNC=True)
+class AnalyticsExportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        backends._users.clear()
+        self.shops = [create_business('Alpha Shop'), create_business('Beta, "The" Shop')]
+        for day, shop, amount in ((date(2025, 3, 1), 1, 30), (date(2025, 3, 1), 0, 10),
+                                  (date(2025, 3, 2), 0, 20)):
+            DailySalesRollup.objects.create(
+                business=self.shops[shop], date=day, payment_method='CASH',
+                sale_count=1, subtotal=amount, total_amount=amount)
+        self.client.force_login(User.objects.create_user('root', role=User.Role.SUPER_ADMIN))
+
+    def export(self, **params):
+        params = {'start': '2025-03-01', 'end': '2025-03-31', **params}
+        return self.client.get(reverse('export_analytics_api'), params)
+
+    def content(self, response):
+        return b''.join(response.streaming_content).decode()
+
+    def test_invalid_parameters_are_rejected(self):
+        for params, message in (
+                ({'metrics': ''}, 'Choose at least one metric'),
+                ({'metrics': 'profit'}, 'Unknown metric profit'),
+                ({'metrics': 'sales', 'dimensions': 'city'}, 'Unknown dimension city'),
+                ({'metrics': 'sales', 'start': 'March'}, 'start must be a YYYY-MM-DD date'),
+                ({'metrics': 'sales', 'start': '2025-04-01'}, 'start must not be after end'),
+                ({'metrics': 'sales', 'format': 'xml'}, 'Format must be one of csv, jsonl')):
+            response = self.export(**params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertIn(message, response.json()['message'])
+
+    def test_period_is_capped(self):
+        end = date(2025, 3, 31)
+        AnalyticsExport.from_params({
+            'metrics': 'sales', 'start': str(end - timedelta(days=MAX_EXPORT_DAYS - 1)), 'end': str(end)})
+        with self.assertRaisesMessage(ExportError, f'at most {MAX_EXPORT_DAYS} days'):
+            AnalyticsExport.from_params({
+                'metrics': 'sales', 'start': str(end - timedelta(days=MAX_EXPORT_DAYS)), 'end': str(end)})
+        with self.assertRaisesMessage(ExportError, f'at most {MAX_EXPORT_DAYS} days'):
+            AnalyticsExport.from_params({'metrics': 'sales', 'days': MAX_EXPORT_DAYS + 1})
+
+    def test_csv_is_escaped(self):
+        response = self.export(metrics='sales', dimensions='business')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(self.content(response).splitlines(), [
+            'Business ID,Business,Sales',
+            f'{self.shops[0].id},Alpha Shop,2',
+            f'{self.shops[1].id},"Beta, ""The"" Shop",1',
+        ])
+
+    def test_jsonl(self):
+        response = self.export(metrics='sales', dimensions='day', format='jsonl')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(
+            [json.loads(line) for line in self.content(response).splitlines()],
+            [{'Date': '2025-03-01', 'Sales': 2}, {'Date': '2025-03-02', 'Sales': 1}])
+
+    def test_business_batches_keep_one_order(self):
+        export = AnalyticsExport.from_params({
+            'metrics': 'revenue', 'dimensions': 'day,business',
+            'start': '2025-03-01', 'end': '2025-03-31'})
+        with mock.patch('superadmin.exports.BUSINESS_BATCH_SIZE', 1):
+            rows = [row[:2] for row in export.rows()]
+        self.assertEqual(rows, [[date(2025, 3, 1), self.shops[0].id],
+                                [date(2025, 3, 2), self.shops[0].id],
+                                [date(2025, 3, 1), self.shops[1].id]])
+
+    def test_async_stream_yields_every_chunk(self):
+        export = AnalyticsExport.from_params({
+            'metrics': 'sales', 'dimensions': 'business',
+            'start': '2025-03-01', 'end': '2025-03-31'})
+
+        async def collect():
+            return [chunk async for chunk in stream_async(stream_csv(export), size=2)]
+
+        self.assertEqual(async_to_sync(collect)(), list(stream_csv(export)))
+
+
+class NotificationBrokerTests(SimpleTestCase):
+    def test_events_reach_only_their_users(self):
+        async def run():
+            broker = NotificationBroker()
+            first, second = broker.subscribe(1), broker.subscribe(2)
+            broker.publish('one', [1])
+            broker.publish('all')
+            await asyncio.sleep(0)
+            drained = [[queue.get_nowait() for _ in range(queue.qsize())]
+                       for queue in (first, second)]
+
+            broker.unsubscribe(1, first)
+            broker.unsubscribe(2, second)
+            return drained, broker.connections
+
+        self.assertEqual(asyncio.run(run()), ([['one', 'all'], ['all']], 0))
+
+    def test_publishing_from_another_thread(self):
+        async def run():
+            broker = NotificationBroker()
+            queue = broker.subscribe(1)
+            threading.Thread(target=broker.publish, args=('hello', [1])).start()
+            return await asyncio.wait_for(queue.get(), 1)
+
+        self.assertEqual(asyncio.run(run()), 'hello')
+
+    def test_full_queue_drops_the_oldest_event(self):
+        async def run():
+            broker = NotificationBroker()
+            queue = broker.subscribe(1)
+            for i in range(events.QUEUE_SIZE + 1):
+                broker.publish(i, [1])
+            await asyncio.sleep(0)
+            return queue.qsize(), queue.get_nowait()
+
+        self.assertEqual(asyncio.run(run()), (events.QUEUE_SIZE, 1))
+
+    def test_idle_streams_send_heartbeats_or_resync(self):
+        pending = ['event: unread\n\n']
+
+        async def resync():
+            return pending.pop() if pending else None
+
+        async def run():
+            stream = event_stream(1, 'hello', resync=resync)
+            chunks = [await anext(stream) for _ in range(3)]
+            connected = events.broker.connections
+            await stream.aclose()
+            return chunks, connected, events.broker.connections
+
+        with mock.patch.object(events, 'HEARTBEAT_INTERVAL', 0.01):
+            self.assertEqual(asyncio.run(run()), (
+                ['hello', 'event: unread\n\n', ': heartbeat\n\n'], 1, 0))
+
+
+@override_settings(AUDIT_LOG_SYNC=True, ACTIVITY_LOG_SYNC=True)
+class NotificationStreamTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        backends._users.clear()
+        self.user = User.objects.create_user('cashier', business=create_business('Shop'))
+
+    def test_not_available_under_wsgi(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse('notification_stream')).status_code, 501)
+
+    async def test_stream_starts_with_the_unread_count(self):
+        response = await self.async_client.get(reverse('notification_stream'))
+        self.assertEqual(response.status_code, 401)
+
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('notification_stream'))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        self.assertIn(b'"unread_count": 0', await anext(stream))
+        await stream.aclose()
+
+
+@override_settings(AUDIT_LOG_SYNC=True, ACTIVITY_LOG_SYNC=True)
+class AnalyticsTests(TestCase):
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.period_start = self.today - timedelta(days=30)
+        self.growing = create_business('Growing Shop')
+        self.new = create_business('New Shop')
+        self.gone = create_business('Gone Shop')
+        License.objects.create(
+            business=self.growing, license_key='KEY', tier=License.Tier.PRO,
+            start_date=self.today, end_date=self.today, monthly_price=10)
+
+    def rollup(self, business, days_ago, amount):
+        DailySalesRollup.objects.create(
+            business=business, date=self.today - timedelta(days=days_ago),
+            payment_method='CASH', sale_count=1, total_amount=amount)
+
+    def test_top_businesses_with_growth_in_one_query(self):
+        self.rollup(self.growing, 5, 150)
+        self.rollup(self.growing, 1, 50)
+        self.rollup(self.growing, 40, 100)
+        self.rollup(self.new, 3, 50)
+        self.rollup(self.gone, 45, 500)
+
+        with self.assertNumQueries(1):
+            top = _top_businesses(self.period_start)
+        self.assertEqual(
+            [(row['name'], row['license_tier'], row['revenue'], row['sale_count'], row['growth'])
+             for row in top],
+            [('Growing Shop', 'PRO', 200.0, 2, 100.0), ('New Shop', None, 50.0, 1, 0)])
+
+    def test_revenue_counts_completed_sales_only(self):
+        for number, status in enumerate((Sale.Status.COMPLETED, Sale.Status.REFUNDED,
+                                         Sale.Status.CANCELLED)):
+            Sale.objects.create(
+                business=self.new, transaction_id=f'T{number}', receipt_number=f'R{number}',
+                subtotal=10, total_amount=10, amount_paid=10, status=status)
+        refresh_rollups()
+
+        analytics = compute_analytics()
+        self.assertEqual(analytics['stats']['total_sales'], 1)
+        self.assertEqual(analytics['stats']['total_revenue'], 10)
+        self.assertEqual([row['revenue'] for row in analytics['top_businesses']], [10.0])
+        self.assertEqual(analytics['revenue_data'][-1], {'date': self.today, 'revenue': 10.0})
+
+
+@override_settings(AUDIT_LOG_SYNC=True, ACTIVITY_LOG_SYNC=True)
+class PlatformMetricsTests(TestCase):
+    def test_counters_come_from_one_aggregation(self):
+        today = timezone.localdate()
+        shops = [create_business(f'Shop{i}') for i in range(4)]
+        Business.objects.filter(pk=shops[3].pk).update(business_type='RESTAURANT')
+        for shop, tier, is_active, end_date in (
+                (shops[0], License.Tier.PRO, True, today + timedelta(days=90)),
+                (shops[1], License.Tier.DEMO, True, today + timedelta(days=10)),
+                (shops[2], License.Tier.BASIC, False, today + timedelta(days=90))):
+            License.objects.create(
+                business=shop, license_key=f'KEY{shop.pk}', tier=tier, is_active=is_active,
+                start_date=today, end_date=end_date, monthly_price=10)
+        User.objects.create_user('owner', business=shops[0])
+        User.objects.create_user('root')
+        for number, total in enumerate((10, 15)):
+            Sale.objects.create(
+                business=shops[0], transaction_id=f'T{number}', receipt_number=f'R{number}',
+                subtotal=total, total_amount=total, amount_paid=total)
+
+        with self.assertNumQueries(3):
+            metrics = compute_platform_metrics()
+
+        self.assertEqual(metrics['businesses_count'], 4)
+        self.assertEqual(metrics['users_count'], 2)
+        self.assertEqual(metrics['active_licenses'], 2)
+        self.assertEqual(int(metrics['monthly_revenue']), 25)
+        self.assertEqual(
+            [(row['name'], row['count']) for row in metrics['business_types']],
+            [('Retail Store', 3), ('Restaurant', 1)])
+        self.assertEqual(
+            {name: metrics['license_stats'][name]
+             for name in ('active', 'expired', 'demo', 'expiring_soon')},
+            {'active': 2, 'expired': 1, 'demo': 1, 'expiring_soon': 1})
+        self.assertAlmostEqual(metrics['license_stats']['active_percentage'], 200 / 3)